@@ -3,10 +3,7 @@ import re
 from flask import Flask, render_template
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_apscheduler import APScheduler
-from flask_migrate import Migrate
 from flask_wtf import CSRFProtect
-from whitenoise import WhiteNoise
 from jinja2 import pass_context
 from markupsafe import Markup, escape
 from config import Config
@@ -14,9 +11,11 @@ from config import Config
 # Initialize extensions
 db = SQLAlchemy(engine_options={"pool_pre_ping": True, "pool_recycle": 300})
 login_manager = LoginManager()
-scheduler = APScheduler()
-migrate = Migrate()
 csrf = CSRFProtect()
+# The scheduler and Flask-Migrate (which pulls in alembic) are only created by the full web
+# app, so job scripts built with create_app(minimal=True) never import them.
+scheduler = None
+migrate = None
 
 # Helper: Convert newlines to HTML paragraphs and line breaks
 _paragraph_re = re.compile(r'(?:\r\n|\r|\n){2,}')
@@ -29,7 +28,13 @@ def nl2br(context, value):
     return Markup(result) if context.environment.autoescape else result
 
 
-def create_app(config_class=Config):
+def create_app(config_class=Config, minimal=False):
+    """
+    Builds the application. With minimal=True only the config, database and models are set
+    up: no blueprints, login, CSRF, scheduler, migrations, metrics or WhiteNoise. That is all
+    cron job scripts need, and it skips most of the web app's import cost.
+    """
+    global scheduler, migrate
     app = Flask(__name__)
     app.config.from_object(config_class)
 
@@ -48,27 +53,57 @@ def create_app(config_class=Config):
     if app.config.get('SECRET_KEY') in (None, '', 'your_secret_key'):
         print("⚠️  WARNING: Insecure or missing SECRET_KEY — set a secure key in production!")
 
+    db.init_app(app)
+
+    # Models must be imported before first use
+    from app import models  # noqa: F401 (registers every table on db.metadata)
+
+    # Committed writes evict the dashboards they touch, in web requests and cron jobs alike
+    from app.services.dashboard_service import register_session_listeners
+    register_session_listeners()
+
+    if minimal:
+        return app
+
+    from flask_apscheduler import APScheduler
+    from flask_migrate import Migrate
+    from whitenoise import WhiteNoise
+
     # Serve static files with WhiteNoise
     static_dir = os.path.join(os.path.dirname(__file__), 'static')
     app.wsgi_app = WhiteNoise(app.wsgi_app, root=static_dir, prefix='static/')
 
+    # Take the client address and scheme from the trusted proxies only (rate limits key on it)
+    proxy_count = app.config.get('TRUSTED_PROXY_COUNT', 0)
+    if proxy_count:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_count, x_proto=proxy_count)
+
     # Initialize Flask extensions
-    db.init_app(app)
+    if scheduler is None:
+        scheduler = APScheduler()
+    if migrate is None:
+        migrate = Migrate()
     login_manager.init_app(app)
     scheduler.init_app(app)
     migrate.init_app(app, db)
     csrf.init_app(app)
 
-    # Models must be imported before first use
-    from app.models import (
-        User, Account, Transaction, TransactionType, TaxBracket,
-        AutomatedTaxDeductionLog, Ticket, TicketStatus, PermitApplication,
-        PermitApplicationStatus, MarketplaceListing, MarketplaceListingStatus,
-        Inspection, UserRole, UserVehicle, VehicleRegion, Conversation,
-        ConversationStatus, Message, Notification, NotificationType,
-        AuctionItem, AuctionStatus, AuctionBid, RulesContent, Company,
-        Farmer, Parcel
-    )
+    # `flask bootstrap`: migrations and default data, run once per deploy instead of at boot
+    from app.cli import bootstrap_command
+    app.cli.add_command(bootstrap_command)
+
+    # Per-request query counting and slow request logging
+    from app.logging_config import setup_performance_logging
+    from app.instrumentation import init_instrumentation
+    setup_performance_logging(app)
+    init_instrumentation(app, db)
+
+    # Prometheus request, DB pool, job and integration metrics
+    from app.metrics import init_metrics
+    init_metrics(app, db)
+
+    from app.models import User, UserRole
 
     # Template-wide injection: User roles
     @app.context_processor
@@ -110,6 +145,7 @@ def create_app(config_class=Config):
     from app.api_fs25 import api_fs25_bp
     from app.routes.export import export_bp
     from app.routes.health import health_bp
+    from app.routes.metrics import metrics_bp
     # from app.routes.timesheet import timesheet_bp
     from app.routes.store import store_bp
 
@@ -118,6 +154,8 @@ def create_app(config_class=Config):
     app.register_blueprint(main_bp)
     # app.register_blueprint(timesheet_bp, url_prefix='/timesheet')
     app.register_blueprint(admin_bp)
+    # The game server authenticates with an API key, not a session, so CSRF tokens don't apply.
+    csrf.exempt(api_fs25_bp)
     app.register_blueprint(api_fs25_bp)
     app.register_blueprint(vehicle_bp, url_prefix='/vehicle')
     app.register_blueprint(banking_bp, url_prefix='/banking')
@@ -130,5 +168,6 @@ def create_app(config_class=Config):
     app.register_blueprint(notifications_bp, url_prefix='/notifications')
     app.register_blueprint(export_bp, url_prefix='/export')
     app.register_blueprint(health_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp)
 
     return app
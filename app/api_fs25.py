@@ -1,11 +1,63 @@
 # api_fs25.py
-from flask import Blueprint, request, jsonify, current_app
-from app.models import db, Farmer, Account, Transaction, TransactionType, FarmerStats, Notification, Conversation, SiloStorage, StoreItem, UserVehicle
+from flask import Blueprint, g, request, jsonify, current_app
+from app.models import db, User, Farmer, Account, Transaction, TransactionType, FarmerStats, Notification, Conversation, SiloStorage, StoreItem, UserVehicle, VehicleRegion
+from app.rate_limiter import check_rate_limit, client_ip
+from app.idempotency import idempotent
+from app.services import api_key_service, posting_service, vehicle_service, fleet_import_service, savegame_service, store_service
+from app.services.api_key_service import SCOPE_SYNC, SCOPE_STORE_INVENTORY, SCOPE_STORE_PURCHASE
 from datetime import datetime
 
 api_fs25_bp = Blueprint('api_fs25', __name__)
 
+# Scope each endpoint requires; the scope also names the rate limit bucket it counts against.
+ENDPOINT_SCOPES = {
+    'api_fs25.update_balance': SCOPE_SYNC,
+    'api_fs25.update_stats': SCOPE_SYNC,
+    'api_fs25.get_notifications': SCOPE_SYNC,
+    'api_fs25.update_silo': SCOPE_SYNC,
+    'api_fs25.store_inventory': SCOPE_STORE_INVENTORY,
+    'api_fs25.store_purchase': SCOPE_STORE_PURCHASE,
+    'api_fs25.fleet_import': SCOPE_SYNC,
+    'api_fs25.link_farm': SCOPE_SYNC,
+}
+
+SCOPE_RATE_LIMITS = {
+    SCOPE_SYNC: 'RATE_LIMIT_FS25_REQUESTS',
+    SCOPE_STORE_INVENTORY: 'RATE_LIMIT_FS25_INVENTORY_REQUESTS',
+    SCOPE_STORE_PURCHASE: 'RATE_LIMIT_FS25_PURCHASE_REQUESTS',
+}
+
+
+@api_fs25_bp.before_request
+def authenticate_fs25_request():
+    scope = ENDPOINT_SCOPES.get(request.endpoint, SCOPE_SYNC)
+    window = current_app.config.get('RATE_LIMIT_FS25_WINDOW_SECONDS', 60)
+    scope_limit = current_app.config.get(SCOPE_RATE_LIMITS[scope], 120)
+
+    if not current_app.config.get('FS25_API_KEYS_REQUIRED', True):
+        return check_rate_limit(scope_limit, window, scope=f"fs25:{scope}")
+
+    # A client IP that keeps failing verification is turned away before its key is even
+    # checked, so guessing keys can't hammer the database or the password hash.
+    failure_limit = current_app.config.get('RATE_LIMIT_FS25_AUTH_FAILURES', 10)
+    limited = check_rate_limit(failure_limit, window, scope='fs25:auth_failures', identity=client_ip(), count=False)
+    if limited is not None:
+        return limited
+
+    verified = api_key_service.verify_api_key(request.headers.get('X-API-Key'))
+    if not verified:
+        check_rate_limit(failure_limit, window, scope='fs25:auth_failures', identity=client_ip())
+        return jsonify({"error": "Invalid or missing API key"}), 401
+    # Later limits and idempotency keys belong to the verified key, not to whatever was sent.
+    g.api_key_id = verified[0]
+    if scope not in verified[1]:
+        return jsonify({"error": f"API key lacks the '{scope}' scope"}), 403
+    # Limits apply per scope and per verified key.
+    return check_rate_limit(scope_limit, window, scope=f"fs25:{scope}")
+
+
 @api_fs25_bp.route('/api/fs25/update_balance', methods=['POST'])
+@idempotent
 def update_balance():
     data = request.json
     farmer_id = data.get('farmer_id')
@@ -28,19 +80,11 @@ def update_balance():
     if not account:
         return jsonify({"error": "Bank account not found for this farmer"}), 404
 
-    change = new_balance - float(account.balance)
-    account.balance = new_balance
-
-    history = Transaction(
-        account_id=account.id,
-        amount=change,
-        description='Balance synced from FS25',
-        type=TransactionType.FS25_SYNC
-    )
-    db.session.add(history)
-    db.session.commit()
+    # @idempotent commits the posting together with the stored response.
+    posting = posting_service.set_balance(account.id, new_balance, TransactionType.FS25_SYNC, 'Balance synced from FS25',
+                                          commit=False)
 
-    return jsonify({"status": "success", "new_balance": float(account.balance)}), 200
+    return jsonify({"status": "success", "new_balance": float(posting.balances[account.id])}), 200
 
 
 @api_fs25_bp.route('/api/fs25/update_stats', methods=['POST'])
@@ -148,19 +192,8 @@ def store_inventory():
         return jsonify({"error": "Expected a list of store items"}), 400
 
     try:
-        # Clear existing store items
-        db.session.query(StoreItem).delete()
-
-        for item_data in data:
-            new_item = StoreItem(
-                name=item_data.get('name'),
-                price=item_data.get('price'),
-                brand=item_data.get('brand'),
-                category=item_data.get('category'),
-                xml_filename=item_data.get('xml_filename')
-            )
-            db.session.add(new_item)
-
+        # Replaces the catalog and rebuilds the store browser's facet counts in one transaction.
+        store_service.replace_inventory(data)
         db.session.commit()
         return jsonify({"status": "success", "message": f"{len(data)} store items updated."}), 200
     except Exception as e:
@@ -169,6 +202,7 @@ def store_inventory():
         return jsonify({"error": "An unexpected error occurred."}), 500
 
 @api_fs25_bp.route('/api/fs25/store/purchase', methods=['POST'])
+@idempotent
 def store_purchase():
     data = request.json
     xml_filename = data.get('xml')
@@ -191,15 +225,10 @@ def store_purchase():
         return jsonify({"error": "Item not found"}), 404
 
     try:
-        # Deduct funds
-        account.balance -= price
-        new_transaction = Transaction(
-            account_id=account.id,
-            type=TransactionType.MARKETPLACE_PURCHASE,
-            amount=-price,
-            description=f'Purchase of {item.name} from the store.'
-        )
-        db.session.add(new_transaction)
+        # Deduct funds; raises InsufficientFunds if a concurrent purchase got there first
+        posting_service.post_entries([posting_service.Entry(
+            account.id, -price, TransactionType.MARKETPLACE_PURCHASE, f'Purchase of {item.name} from the store.'
+        )], commit=False)
 
         # Add vehicle to user's garage
         new_vehicle = UserVehicle(
@@ -207,14 +236,83 @@ def store_purchase():
             vehicle_make=item.brand,
             vehicle_model=item.name,
             vehicle_type=item.category,
-            license_plate=f"{user.username}-{item.name.replace(' ', '')[:5]}-{user.id}", # Generate a unique license plate
-            region_format='US' # Default to US format
+            license_plate=vehicle_service.generate_license_plate_number(VehicleRegion.US),
+            region_format=VehicleRegion.US # Default to US format
         )
         db.session.add(new_vehicle)
 
-        db.session.commit()
+        # @idempotent commits the debit and the vehicle together with the stored response.
+        db.session.flush()
         return jsonify({"status": "success"}), 200
+    except posting_service.InsufficientFunds:
+        db.session.rollback()
+        return jsonify({"error": "Insufficient funds"}), 400
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error processing purchase for user {user.id}: {e}", exc_info=True)
         return jsonify({"error": "An unexpected error occurred."}), 500
+
+@api_fs25_bp.route('/api/fs25/link_farm', methods=['POST'])
+def link_farm():
+    """
+    Links a farmer to their farm in the server savegame, so savegame ingestion syncs that farm
+    to them. Expects {"farmer_id": ..., "game_farm_id": ...}; a null game_farm_id unlinks.
+    """
+    data = request.json
+    farmer_id = data.get('farmer_id')
+    game_farm_id = data.get('game_farm_id')
+
+    if farmer_id is None or 'game_farm_id' not in data:
+        return jsonify({"error": "Missing farmer_id or game_farm_id"}), 400
+    if game_farm_id is not None and (not isinstance(game_farm_id, int) or isinstance(game_farm_id, bool) or game_farm_id < 1):
+        return jsonify({"error": "game_farm_id should be a positive integer or null"}), 400
+
+    farmer = Farmer.query.get(farmer_id)
+    if not farmer:
+        return jsonify({"error": "Farmer not found"}), 404
+
+    try:
+        changed = savegame_service.link_farm(farmer, game_farm_id)
+    except savegame_service.SavegameIngestError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 409
+    return jsonify({"status": "success", "changed": changed, "farmer_id": farmer.id, "game_farm_id": farmer.game_farm_id}), 200
+
+
+@api_fs25_bp.route('/api/fs25/fleet/import', methods=['POST'])
+def fleet_import():
+    """
+    Registers a company's fleet from a savegame vehicles.xml sent as the raw request body.
+    Query parameters: discordId of the company owner, region (US or EURO, default US) and an
+    optional farmId to import only that farm's vehicles. The body is parsed as it streams in.
+    """
+    discord_id = request.args.get('discordId')
+    region_name = request.args.get('region', 'US').upper()
+    farm_id = request.args.get('farmId', type=int)
+
+    if not discord_id:
+        return jsonify({"error": "Missing discordId"}), 400
+    if region_name not in VehicleRegion.__members__:
+        return jsonify({"error": f"Unknown region '{region_name}'"}), 400
+
+    user = User.query.filter_by(discord_user_id=discord_id).first()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    if not user.company:
+        return jsonify({"error": "User has no company"}), 404
+
+    try:
+        result = fleet_import_service.import_fleet(user.company.id, request.stream, VehicleRegion[region_name], farm_id)
+        return jsonify({
+            "status": "success",
+            "created": result.created,
+            "summary": fleet_import_service.status_counts(result.rows),
+            "rows": result.rows,
+        }), 200
+    except fleet_import_service.FleetImportError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error importing fleet for user {user.id}: {e}", exc_info=True)
+        return jsonify({"error": "An unexpected error occurred."}), 500
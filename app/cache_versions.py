@@ -0,0 +1,87 @@
+from flask import current_app
+import itertools
+import threading
+import time
+import uuid
+
+# Version tokens for per-worker caches: a cache remembers the tokens of what it cached and
+# compares them on read, and a write replaces the tokens, so a write in one worker makes
+# every other worker's copy stale (see dashboard_service).
+#
+# The store is chosen by CACHE_VERSION_STORAGE_URL: "memory://" (per worker, for tests and
+# single-process runs) or "redis://..." so every gunicorn worker sees the same tokens.
+
+
+class MemoryVersionStore:
+    """Per-process tokens. Expired tokens are swept periodically so old owners can't grow it forever."""
+
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._tokens = {}  # name -> (token, expires_at)
+        self._lock = threading.Lock()
+        self._next_token = itertools.count(1)
+        self._bumps_since_sweep = 0
+
+    def versions(self, names):
+        now = time.monotonic()
+        with self._lock:
+            entries = [self._tokens.get(name) for name in names]
+        return [entry[0] if entry and entry[1] > now else None for entry in entries]
+
+    def bump_versions(self, names, ttl):
+        now = time.monotonic()
+        with self._lock:
+            for name in names:
+                self._tokens[name] = (next(self._next_token), now + ttl)
+            self._bumps_since_sweep += 1
+            if self._bumps_since_sweep >= self.SWEEP_EVERY:
+                self._bumps_since_sweep = 0
+                for name in [n for n, entry in self._tokens.items() if entry[1] <= now]:
+                    del self._tokens[name]
+
+    def reset(self):
+        with self._lock:
+            self._tokens.clear()
+
+
+class RedisVersionStore:
+    """Shared tokens in Redis. Each token expires with its ttl, so idle owners cost nothing."""
+
+    def __init__(self, url, prefix='cacheversion'):
+        import redis  # Only needed when a redis:// storage URL is configured.
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def versions(self, names):
+        if not names:
+            return []
+        return self.client.mget([f"{self.prefix}:{name}" for name in names])
+
+    def bump_versions(self, names, ttl):
+        # A fresh random token rather than INCR: a key that expired and was set again can
+        # never come back to a value some cache still holds.
+        pipe = self.client.pipeline(transaction=False)
+        for name in names:
+            pipe.set(f"{self.prefix}:{name}", uuid.uuid4().hex, ex=ttl)
+        pipe.execute()
+
+    def reset(self):
+        for key in self.client.scan_iter(f"{self.prefix}:*"):
+            self.client.delete(key)
+
+
+def create_version_store(storage_url):
+    if storage_url.startswith(('redis://', 'rediss://')):
+        return RedisVersionStore(storage_url)
+    if storage_url.startswith('memory://'):
+        return MemoryVersionStore()
+    raise ValueError(f"Unsupported CACHE_VERSION_STORAGE_URL: {storage_url}")
+
+
+def get_version_store():
+    store = current_app.extensions.get('cache_versions')
+    if store is None:
+        store = create_version_store(current_app.config.get('CACHE_VERSION_STORAGE_URL', 'memory://'))
+        current_app.extensions['cache_versions'] = store
+    return store
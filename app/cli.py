@@ -0,0 +1,35 @@
+import secrets
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('bootstrap')
+@click.option('--admin-password', envvar='BOOTSTRAP_ADMIN_PASSWORD',
+              help='Password for the default admin user if it has to be created. '
+                   'Defaults to a random one, printed once.')
+@with_appcontext
+def bootstrap_command(admin_password):
+    """Create or migrate the schema and seed the default fines, insurance rates and admin user.
+
+    Run it once per deploy (e.g. as a release command) rather than from the web workers; it is
+    safe to run again.
+    """
+    from app.services import bootstrap_service
+
+    schema = bootstrap_service.prepare_schema()
+    click.echo({
+        'created': 'Database schema created and stamped at the latest migration.',
+        'baselined': f'Existing tables stamped at {bootstrap_service.BASELINE_REVISION} and later migrations applied.',
+        'upgraded': 'Database migrations applied.',
+    }[schema])
+
+    generated = not admin_password
+    if generated:
+        admin_password = secrets.token_urlsafe(12)
+    result = bootstrap_service.seed_defaults(admin_password)
+    click.echo(f"Seeded {result.fines} fine(s) and {result.insurance_rates} insurance rate(s).")
+    if result.admin_created:
+        click.echo(f"Created admin user '{bootstrap_service.DEFAULT_ADMIN_USERNAME}'"
+                   + (f" with password: {admin_password}" if generated else '.'))
+    else:
+        click.echo('Admin user already exists.')
@@ -2,7 +2,7 @@ from flask_wtf import FlaskForm
 from wtforms import (
     StringField, PasswordField, BooleanField, SubmitField,
     SelectField, DecimalField, TextAreaField, IntegerField,
-    RadioField
+    RadioField, HiddenField
 )
 from wtforms.fields import DateField
 from wtforms.validators import (
@@ -15,19 +15,24 @@ from app.models import (
     PermitApplicationStatus, MarketplaceListingStatus, VehicleRegion, InsuranceClaimStatus, InsuranceRate
 )
 from app.custom_validators import must_be_positive
-from flask_wtf.file import FileField, FileAllowed
+from flask_wtf.file import FileField, FileAllowed, FileRequired
 
 class AccountForm(FlaskForm):
-    user_id = SelectField('User', coerce=int, validators=[DataRequired()])
+    # Filled in by the user lookup typeahead rather than a select of every user.
+    user_id = HiddenField('User', validators=[DataRequired(message='Choose a user from the search results.')])
+    user_lookup = StringField('User', render_kw={'placeholder': 'Start typing a username', 'autocomplete': 'off'})
     name = StringField('Account Name (Optional)', validators=[Optional(), Length(max=100)])
     balance = DecimalField('Initial Balance', places=2, validators=[DataRequired()])
     is_company = BooleanField('Is Company Account?', default=False)
     currency = StringField('Currency', default='GDC', validators=[DataRequired(), Length(min=3, max=10)])
     submit = SubmitField('Create Account')
 
-    def __init__(self, *args, **kwargs):
-        super(AccountForm, self).__init__(*args, **kwargs)
-        self.user_id.choices = [(u.id, u.username) for u in User.query.order_by(User.username).all()]
+    def validate_user_id(self, field):
+        from app import db
+        user = db.session.get(User, int(field.data)) if str(field.data).isdigit() else None
+        if not user:
+            raise ValidationError('User not found.')
+        field.data = user.id
 
 
 class ApplyPermitForm(FlaskForm):
@@ -96,6 +101,26 @@ class CompanyVehicleForm(FlaskForm):
     submit = SubmitField('Register Vehicle')
 
 
+class FleetImportForm(FlaskForm):
+    xml_file = FileField('Savegame vehicles.xml', validators=[
+        FileRequired(), FileAllowed(['xml'], 'XML files only!')
+    ])
+    region_format = SelectField('License Plate Region',
+                                choices=[(region.name, region.value) for region in VehicleRegion],
+                                validators=[DataRequired()])
+    farm_id = IntegerField('Only vehicles of farm ID (Optional)', validators=[Optional(), NumberRange(min=1)])
+    submit = SubmitField('Import Fleet')
+
+
+class AdminFleetImportForm(FleetImportForm):
+    company_id = SelectField('Company', coerce=int, validators=[DataRequired()])
+
+    def __init__(self, *args, **kwargs):
+        super(AdminFleetImportForm, self).__init__(*args, **kwargs)
+        from app.models import Company
+        self.company_id.choices = [(c.id, c.name) for c in Company.query.order_by(Company.name).all()]
+
+
 class ContestTicketForm(FlaskForm):
     user_contest_reason = TextAreaField('Reason for Contesting (Please be specific)', validators=[DataRequired(), Length(min=20, max=2000)])
     submit = SubmitField('Submit Contestation')
@@ -140,6 +165,7 @@ class EditUserForm(FlaskForm):
     role = SelectField('Role', choices=[(role.value, role.value) for role in UserRole], validators=[DataRequired()])
     discord_user_id = StringField('Discord User ID', validators=[Optional(), Length(max=100)])
     region = SelectField('Region', choices=[(region.name, region.value) for region in VehicleRegion], validators=[DataRequired()])
+    game_farm_id = IntegerField('Savegame Farm ID', validators=[Optional(), NumberRange(min=1)])
     submit = SubmitField('Update User')
 
     def __init__(self, original_username, original_email, *args, **kwargs):
@@ -247,7 +273,9 @@ class NewConversationForm(FlaskForm): # Admin to User
 
 
 class ParcelForm(FlaskForm):
-    farmer_id = SelectField('Farmer', coerce=int, validators=[DataRequired()])
+    # Filled in by the user lookup typeahead rather than a select of every farmer.
+    farmer_id = HiddenField('Farmer', validators=[DataRequired(message='Choose a farmer from the search results.')])
+    farmer_lookup = StringField('Farmer', render_kw={'placeholder': 'Start typing the farmer\'s username', 'autocomplete': 'off'})
     location = StringField('Parcel Location', validators=[Optional(), Length(min=1, max=256)])
     size = DecimalField('Parcel Size (in acres)', validators=[Optional()])
     xml_file = FileField('Upload farmland.xml (Optional)', validators=[
@@ -255,10 +283,13 @@ class ParcelForm(FlaskForm):
     ])
     submit = SubmitField('Add Parcel')
 
-    def __init__(self, *args, **kwargs):
-        super(ParcelForm, self).__init__(*args, **kwargs)
+    def validate_farmer_id(self, field):
+        from app import db
         from app.models import Farmer
-        self.farmer_id.choices = [(f.id, f.user.username) for f in Farmer.query.join(User).order_by(User.username).all()]
+        farmer = db.session.get(Farmer, int(field.data)) if str(field.data).isdigit() else None
+        if not farmer:
+            raise ValidationError('Farmer not found.')
+        field.data = farmer.id
 
 
 class InsuranceClaimForm(FlaskForm):
@@ -526,3 +557,21 @@ class AnnouncementForm(FlaskForm):
     content = TextAreaField('Content', validators=[DataRequired()])
     is_active = BooleanField('Is Active', default=True)
     submit = SubmitField('Save Announcement')
+
+
+class ReportRequestForm(FlaskForm):
+    report_type = SelectField('Report', validators=[DataRequired()])
+    format = SelectField('Format', validators=[DataRequired()])
+    start_date = DateField('From', validators=[Optional()])
+    end_date = DateField('To', validators=[Optional()])
+    submit = SubmitField('Generate Report')
+
+    def __init__(self, *args, **kwargs):
+        super(ReportRequestForm, self).__init__(*args, **kwargs)
+        from app.services import report_service
+        self.report_type.choices = [(key, spec['label']) for key, spec in report_service.REPORT_TYPES.items()]
+        self.format.choices = report_service.available_formats()
+
+    def validate_end_date(self, field):
+        if field.data and self.start_date.data and field.data < self.start_date.data:
+            raise ValidationError('End date must be on or after the start date.')
@@ -0,0 +1,171 @@
+from app import db
+from app.models import IdempotencyKey
+from app.rate_limiter import client_identity
+from datetime import datetime, timedelta
+from flask import request, jsonify, current_app, make_response
+from functools import wraps
+from sqlalchemy.exc import IntegrityError
+import hashlib
+
+MAX_KEY_LENGTH = 255
+
+
+def _dedup_id(key):
+    raw = f"{client_identity()}:{request.endpoint}:{key}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _replay(record, request_hash):
+    if record.request_hash != request_hash:
+        return jsonify({"error": "Idempotency-Key was already used with a different request body"}), 422
+    if record.response_status is None:
+        return jsonify({"error": "A request with this Idempotency-Key is still being processed"}), 409
+    response = current_app.response_class(record.response_body, status=record.response_status,
+                                          mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _take_over(record, request_hash, now):
+    """
+    Takes over a pending claim whose lease has run out. A key is only pending while nothing
+    of its request has been committed (the view's writes and the stored response commit
+    together), so re-running the view cannot apply anything twice. The update only matches
+    the claim that was read, so of several retries racing for the same stale key exactly one
+    wins. Returns True when this request now holds the key.
+    """
+    lease = current_app.config.get('IDEMPOTENCY_CLAIM_LEASE_SECONDS', 120)
+    if record.response_status is not None or record.request_hash != request_hash \
+            or record.claimed_at > now - timedelta(seconds=lease):
+        return False
+    taken = db.session.execute(
+        db.update(IdempotencyKey)
+          .where(IdempotencyKey.id == record.id, IdempotencyKey.response_status.is_(None),
+                 IdempotencyKey.claimed_at == record.claimed_at)
+          .values(claimed_at=now)
+          .execution_options(synchronize_session=False)
+    ).rowcount == 1
+    db.session.commit()
+    return taken
+
+
+def _claim(dedup_id, request_hash):
+    """
+    Inserts a pending row for this key in its own transaction, or takes over a pending row
+    whose lease has expired. Returns (claimed_at, None) when the claim succeeded, otherwise
+    (None, response to send): the replayed result, a conflict or a mismatch.
+    """
+    record = db.session.get(IdempotencyKey, dedup_id)
+    now = datetime.utcnow()
+    if record and record.expires_at > now:
+        if _take_over(record, request_hash, now):
+            return now, None
+        return None, _replay(record, request_hash)
+    if record:
+        db.session.delete(record)
+        db.session.flush()
+
+    ttl = current_app.config.get('IDEMPOTENCY_KEY_TTL_SECONDS', 86400)
+    db.session.add(IdempotencyKey(id=dedup_id, endpoint=request.endpoint, request_hash=request_hash,
+                                  created_at=now, claimed_at=now, expires_at=now + timedelta(seconds=ttl)))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent retry claimed the key first.
+        db.session.rollback()
+        return None, _replay(db.session.get(IdempotencyKey, dedup_id), request_hash)
+    return now, None
+
+
+def _release(dedup_id, claimed_at):
+    """Drops this request's claim after its writes were rolled back, so the request can be retried."""
+    db.session.execute(
+        db.delete(IdempotencyKey)
+          .where(IdempotencyKey.id == dedup_id, IdempotencyKey.claimed_at == claimed_at,
+                 IdempotencyKey.response_status.is_(None))
+          .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def _run_view(f, args, kwargs):
+    """Runs the view; its writes are rolled back on an exception or a server error."""
+    try:
+        response = make_response(f(*args, **kwargs))
+    except Exception:
+        db.session.rollback()
+        raise
+    if response.status_code >= 500:
+        db.session.rollback()
+    return response
+
+
+def idempotent(f):
+    """
+    Makes a JSON endpoint safe to retry. When the caller sends an Idempotency-Key header, the
+    first request's response is stored and returned verbatim for repeats until the key expires,
+    without running the view again.
+
+    The decorator owns the transaction: the view only flushes (call services with
+    commit=False), and its writes are committed here together with the stored response, so a
+    key is never left pending once money has moved. Server errors roll the writes back and
+    release the key, and a key left pending by a crashed worker can be retried once its claim
+    lease has expired.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            if current_app.config.get('IDEMPOTENCY_KEY_REQUIRED', False):
+                return jsonify({"error": "Missing Idempotency-Key header"}), 400
+            response = _run_view(f, args, kwargs)
+            if response.status_code < 500:
+                db.session.commit()
+            return response
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": "Idempotency-Key is too long"}), 400
+
+        dedup_id = _dedup_id(key)
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+        claimed_at, early_response = _claim(dedup_id, request_hash)
+        if early_response is not None:
+            return early_response
+
+        try:
+            response = _run_view(f, args, kwargs)
+        except Exception:
+            _release(dedup_id, claimed_at)
+            raise
+        if response.status_code >= 500:
+            _release(dedup_id, claimed_at)
+            return response
+
+        # Storing the response only succeeds while this request still holds the claim; it
+        # commits in the same transaction as the view's writes. On PostgreSQL the update also
+        # locks the key row, so a retry that took the claim over waits for this commit.
+        stored = db.session.execute(
+            db.update(IdempotencyKey)
+              .where(IdempotencyKey.id == dedup_id, IdempotencyKey.claimed_at == claimed_at,
+                     IdempotencyKey.response_status.is_(None))
+              .values(response_status=response.status_code, response_body=response.get_data(as_text=True))
+              .execution_options(synchronize_session=False)
+        ).rowcount == 1
+        if not stored:
+            # The lease ran out and another request took the key over; it applies the writes.
+            db.session.rollback()
+            return jsonify({"error": "A request with this Idempotency-Key is still being processed"}), 409
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            _release(dedup_id, claimed_at)
+            raise
+        return response
+    return decorated_function
+
+
+def purge_expired_keys():
+    """Deletes idempotency records past their TTL. Returns the number of rows removed."""
+    removed = IdempotencyKey.query.filter(IdempotencyKey.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
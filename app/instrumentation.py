@@ -0,0 +1,128 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+perf_logger = logging.getLogger('app.performance')
+
+# Per-worker rolling samples per endpoint, used by the admin performance page.
+SAMPLES_PER_ENDPOINT = 500
+_endpoint_samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_ENDPOINT))
+_samples_lock = threading.Lock()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_stats' in g:
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and 'query_stats' in g):
+        return
+    start_times = conn.info.get('query_start_time')
+    if not start_times:
+        return
+    elapsed_ms = (time.perf_counter() - start_times.pop()) * 1000.0
+    stats = g.query_stats
+    stats['count'] += 1
+    stats['db_time_ms'] += elapsed_ms
+    slowest = stats['slowest']
+    slowest.append((elapsed_ms, statement))
+    slowest.sort(key=lambda item: item[0], reverse=True)
+    del slowest[stats['keep_slowest']:]
+
+
+def _start_request():
+    g.request_start_time = time.perf_counter()
+    g.query_stats = {'count': 0, 'db_time_ms': 0.0, 'slowest': [], 'keep_slowest': 3}
+
+
+def _finish_request(app, response):
+    if 'query_stats' not in g:
+        return response
+
+    duration_ms = (time.perf_counter() - g.request_start_time) * 1000.0
+    stats = g.query_stats
+    endpoint = request.endpoint or 'unmatched'
+
+    with _samples_lock:
+        _endpoint_samples[endpoint].append((duration_ms, stats['count'], stats['db_time_ms']))
+
+    slow_request = duration_ms >= app.config.get('SLOW_REQUEST_THRESHOLD_MS', 500)
+    chatty_request = stats['count'] >= app.config.get('REQUEST_QUERY_COUNT_THRESHOLD', 25)
+    slow_query = stats['slowest'] and stats['slowest'][0][0] >= app.config.get('SLOW_QUERY_THRESHOLD_MS', 100)
+    if slow_request or chatty_request or slow_query:
+        perf_logger.warning(json.dumps({
+            'event': 'slow_request',
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'query_count': stats['count'],
+            'db_time_ms': round(stats['db_time_ms'], 2),
+            'slowest_queries': [
+                {'duration_ms': round(ms, 2), 'statement': ' '.join(statement.split())[:500]}
+                for ms, statement in stats['slowest']
+            ],
+        }))
+    return response
+
+
+def get_endpoint_report(limit=25):
+    """
+    Summarises the recorded samples per endpoint for this worker, worst p95 latency first.
+    """
+    with _samples_lock:
+        snapshot = {endpoint: list(samples) for endpoint, samples in _endpoint_samples.items()}
+
+    report = []
+    for endpoint, samples in snapshot.items():
+        durations = sorted(s[0] for s in samples)
+        query_counts = sorted(s[1] for s in samples)
+        report.append({
+            'endpoint': endpoint,
+            'requests': len(samples),
+            'p50_ms': round(_percentile(durations, 50), 2),
+            'p95_ms': round(_percentile(durations, 95), 2),
+            'max_ms': round(durations[-1], 2),
+            'avg_queries': round(sum(query_counts) / len(query_counts), 1),
+            'p95_queries': _percentile(query_counts, 95),
+            'avg_db_ms': round(sum(s[2] for s in samples) / len(samples), 2),
+        })
+    report.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return report[:limit]
+
+
+def reset_endpoint_report():
+    with _samples_lock:
+        _endpoint_samples.clear()
+
+
+def init_instrumentation(app, db):
+    """
+    Hooks SQLAlchemy engine events and the Flask request lifecycle to record, per request,
+    the query count, total DB time, the slowest statements and the endpoint.
+    Requests over the configured thresholds are written to the 'app.performance' logger.
+    """
+    if not app.config.get('REQUEST_PROFILING_ENABLED', True):
+        return
+
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(lambda response: _finish_request(app, response))
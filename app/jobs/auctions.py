@@ -3,6 +3,8 @@ from app import db # Assuming scheduler is initialized in create_app and db is a
 # from flask import current_app
 from app.models import AuctionItem, AuctionBid, AuctionStatus
 from datetime import datetime, timedelta
+from app.metrics import track_job
+from app.services import health_service
 
 def close_completed_auctions_job():
     """
@@ -10,6 +12,12 @@ def close_completed_auctions_job():
     Payment processing will be handled in Phase 2 of Auction House development.
     This job primarily updates statuses to SOLD_AWAITING_PAYMENT or EXPIRED_NO_BIDS.
     """
+    with track_job('close_auctions') as job:
+        job.rows = _close_completed_auctions()
+    health_service.record_job_heartbeat('close_auctions', job.rows)
+
+
+def _close_completed_auctions():
     # If run by an external script (like run_auction_job.py), that script should create an app_context.
     # If run by APScheduler integrated with Flask, scheduler.app.app_context() is used.
     # For simplicity here, assuming context is handled by caller or by Flask's @scheduler.task decorator if used.
@@ -29,7 +37,7 @@ def close_completed_auctions_job():
 
     if not auctions_to_close:
         print("No active auctions have reached their end time.")
-        return
+        return 0
 
     for auction in auctions_to_close:
         print(f"Processing auction ID: {auction.id} ('{auction.item_name}') which ended at {auction.current_end_time}")
@@ -59,6 +67,7 @@ def close_completed_auctions_job():
 
 
     print(f"Auction closing job finished. Auctions marked for payment: {closed_count}. Auctions expired: {expired_count}.")
+    return closed_count + expired_count
 
 
 # Example of how this might be called from a Render Cron Job script (run_auction_job.py)
@@ -0,0 +1,15 @@
+from app.idempotency import purge_expired_keys
+from app.metrics import track_job
+from app.services import health_service
+from datetime import datetime
+
+def purge_idempotency_keys_job():
+    """
+    Removes stored FS25 idempotency responses past IDEMPOTENCY_KEY_TTL_SECONDS.
+    Expired keys are already ignored on lookup; this only keeps the table small.
+    """
+    print(f"[{datetime.utcnow()}] Purging expired idempotency keys...")
+    with track_job('purge_idempotency_keys') as job:
+        job.rows = purge_expired_keys()
+    health_service.record_job_heartbeat('purge_idempotency_keys', job.rows)
+    print(f"Removed {job.rows} expired idempotency keys.")
@@ -0,0 +1,14 @@
+from app.metrics import track_job
+from app.services import health_service, report_service
+from datetime import datetime
+
+def run_report_worker_job():
+    """
+    Generates queued admin reports, then removes artifacts past REPORT_RETENTION_DAYS.
+    """
+    print(f"[{datetime.utcnow()}] Running job: Admin Reports...")
+    with track_job('admin_reports') as job:
+        job.rows = report_service.run_pending_reports()
+        removed = report_service.purge_expired_reports()
+    health_service.record_job_heartbeat('admin_reports', job.rows)
+    print(f"Admin report job finished. Reports generated: {job.rows}. Expired reports removed: {removed}.")
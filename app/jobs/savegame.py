@@ -0,0 +1,18 @@
+from app.metrics import track_job
+from app.services import health_service, savegame_service
+from datetime import datetime
+
+def ingest_savegame_job(force=False):
+    """
+    Syncs farms, balances, parcels, silos and vehicles from the game server's savegame in one
+    pass, replacing the per-farmer update calls. Files unchanged since the last run are skipped
+    unless force=True.
+    """
+    print(f"[{datetime.utcnow()}] Running job: Savegame Ingestion (force={force})...")
+    with track_job('savegame_ingest') as job:
+        result = savegame_service.ingest_savegame(force=force)
+        job.rows = sum(result.counts.values())
+    health_service.record_job_heartbeat('savegame_ingest', job.rows)
+    files = ', '.join(f"{name} {status}" for name, status in result.files.items())
+    changes = ', '.join(f"{key} {value}" for key, value in sorted(result.counts.items())) or 'no changes'
+    print(f"Savegame ingestion finished. Files: {files}. Changes: {changes}.")
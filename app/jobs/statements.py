@@ -0,0 +1,16 @@
+from app.metrics import track_job
+from app.services import health_service, statement_service
+from datetime import datetime
+
+def generate_monthly_statements_job(year=None, month=None):
+    """
+    Archives the statements of a closed month (default: last month) for every account, so that
+    opening an old statement serves a stored file instead of querying the ledger.
+    """
+    if year is None or month is None:
+        year, month = statement_service.previous_month()
+    print(f"[{datetime.utcnow()}] Running job: Monthly Statements for {year}-{month:02d}...")
+    with track_job('monthly_statements') as job:
+        job.rows = statement_service.generate_month_statements(year, month)
+    health_service.record_job_heartbeat('monthly_statements', job.rows)
+    print(f"Monthly statements finished. Statements generated: {job.rows}.")
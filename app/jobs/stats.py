@@ -0,0 +1,16 @@
+from app.services.stats_service import refresh_site_stats
+from app.metrics import track_job
+from app.services import health_service
+from datetime import datetime
+
+def refresh_site_stats_job(full=False):
+    """
+    Refreshes the cached site counters served on the home page and admin dashboards.
+    Run with full=True periodically (e.g. nightly) to rebuild revenue from the whole ledger.
+    """
+    print(f"[{datetime.utcnow()}] Refreshing site statistics (full={full})...")
+    with track_job('site_stats'):
+        stats = refresh_site_stats(full=full)
+    health_service.record_job_heartbeat('site_stats')
+    print(f"Site statistics refreshed: {stats.total_users} users, {stats.open_tickets} open tickets, "
+          f"{stats.pending_permits} pending permits, revenue {stats.revenue}.")
@@ -1,18 +1,26 @@
 from app import db
-from app.models import Account, Transaction, TransactionType, TaxBracket, AutomatedTaxDeductionLog, User
+from app.models import Account, TransactionType, TaxBracket, AutomatedTaxDeductionLog, User
 from datetime import datetime
 from decimal import Decimal
+from app.metrics import track_job
+from app.services import health_service, posting_service
 
 def apply_weekly_taxes():
+    with track_job('weekly_taxes') as job:
+        job.rows = _apply_weekly_taxes()
+    health_service.record_job_heartbeat('weekly_taxes', job.rows)
+
+
+def _apply_weekly_taxes():
     print(f"[{datetime.utcnow()}] Starting weekly tax collection job...")
 
     active_brackets = TaxBracket.query.filter_by(is_active=True).order_by(TaxBracket.min_balance.desc()).all()
     if not active_brackets:
         print("No active tax brackets found. Exiting tax collection job.")
-        return  # <-- This was indented incorrectly in your snippet
+        return 0
 
     users_with_positive_balance = User.query.join(Account).filter(Account.balance > 0).all()
-    processed_users_count = 0
+    postings = []
     total_tax_collected = Decimal('0.0')
 
     for user in users_with_positive_balance:
@@ -29,49 +37,43 @@ def apply_weekly_taxes():
                     break
 
         if applicable_bracket:
-            balance_before_deduction = account.balance
             tax_rate_to_apply = applicable_bracket.tax_rate
 
             # Calculate tax amount (round to 2 decimal places)
-            tax_amount = round(balance_before_deduction * (tax_rate_to_apply / Decimal('100.0')), 2)
+            tax_amount = round(account.balance * (tax_rate_to_apply / Decimal('100.0')), 2)
 
             if tax_amount > Decimal('0.00'):
-                try:
-                    bank_transaction = Transaction(
-                        account_id=account.id,
-                        type=TransactionType.AUTOMATED_TAX_DEDUCTION,  # ensure this exists
-                        amount=-tax_amount,
-                        description=f"Weekly tax ({applicable_bracket.name} @ {tax_rate_to_apply}%)"
-                    )
-                    db.session.add(bank_transaction)
-
-                    # Update account balance
-                    account.balance -= tax_amount
-                    db.session.add(account)
-
-                    db.session.flush()  # to get transaction ID
-
-                    tax_log = AutomatedTaxDeductionLog(
-                        user_id=user.id,
-                        tax_bracket_id=applicable_bracket.id,
-                        balance_before_deduction=balance_before_deduction,
-                        tax_rate_applied=tax_rate_to_apply,
-                        amount_deducted=tax_amount,
-                        deduction_date=datetime.utcnow(),
-                        banking_transaction_id=bank_transaction.id
-                    )
-                    db.session.add(tax_log)
-
-                    db.session.commit()
-                    processed_users_count += 1
-                    total_tax_collected += tax_amount
-                    print(f"Successfully taxed user {user.username}: {tax_amount}")
-                except Exception as e:
-                    db.session.rollback()
-                    print(f"Error processing tax for user {user.username}: {e}")
+                entry = posting_service.Entry(
+                    account.id, -tax_amount, TransactionType.AUTOMATED_TAX_DEDUCTION,
+                    f"Weekly tax ({applicable_bracket.name} @ {tax_rate_to_apply}%)"
+                )
+                postings.append(((user, account.id, applicable_bracket, tax_amount), [entry]))
             else:
                 print(f"Calculated tax for user {user.username} is zero or less. Skipping.")
         else:
             print(f"No applicable tax bracket for user {user.username} with balance {account.balance}.")
 
+    def log_deduction(key, result):
+        nonlocal total_tax_collected
+        user, account_id, bracket, tax_amount = key
+        tax_log = AutomatedTaxDeductionLog(
+            user_id=user.id,
+            tax_bracket_id=bracket.id,
+            # The balance the deduction was actually applied to, which may have moved since the bracket lookup
+            balance_before_deduction=result.balances[account_id] + tax_amount,
+            tax_rate_applied=bracket.tax_rate,
+            amount_deducted=tax_amount,
+            deduction_date=datetime.utcnow(),
+            banking_transaction_id=result.transactions[0].id
+        )
+        db.session.add(tax_log)
+        total_tax_collected += tax_amount
+        print(f"Successfully taxed user {user.username}: {tax_amount}")
+
+    outcome = posting_service.post_batch(postings, on_posted=log_deduction)
+    for (user, _, _, _), error in outcome['failed']:
+        print(f"Error processing tax for user {user.username}: {error}")
+
+    processed_users_count = outcome['posted']
     print(f"Weekly tax collection job finished. Processed {processed_users_count} users. Total tax collected: {total_tax_collected}.")
+    return processed_users_count
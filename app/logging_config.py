@@ -36,3 +36,21 @@ def setup_logging(app):
         
         app.logger.setLevel(logging.INFO)
         app.logger.info('Application startup')
+
+def setup_performance_logging(app):
+    """Send slow-request records from the 'app.performance' logger to a JSON-lines file"""
+    perf_logger = logging.getLogger('app.performance')
+    perf_logger.setLevel(logging.INFO)
+    if not app.debug and not app.testing and not perf_logger.handlers:
+        if not os.path.exists('logs'):
+            os.mkdir('logs')
+
+        # One JSON object per line, so the file can be fed straight into jq or a log shipper
+        perf_handler = RotatingFileHandler(
+            'logs/performance.log',
+            maxBytes=10240000,
+            backupCount=5
+        )
+        perf_handler.setFormatter(logging.Formatter('%(message)s'))
+        perf_handler.setLevel(logging.INFO)
+        perf_logger.addHandler(perf_handler)
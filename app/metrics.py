@@ -0,0 +1,189 @@
+import os
+import time
+from contextlib import contextmanager
+from datetime import timezone
+from flask import current_app, g, request
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from app import db
+from app.models import JobHeartbeat
+
+# When PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py) every worker writes its samples to
+# memory-mapped files in that directory and /metrics aggregates them, so the numbers cover all workers.
+# The job_* metrics below only cover runs inside a web process (the in-app scheduler): cron jobs
+# started by scripts/run_*_job.py keep theirs in memory and exit. Every job run also records a
+# JobHeartbeat row, which /metrics exports as job_heartbeat_* gauges for all processes.
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency',
+    ['blueprint', 'endpoint', 'method'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+REQUEST_COUNT = Counter(
+    'http_requests_total', 'HTTP requests served',
+    ['blueprint', 'endpoint', 'method', 'status']
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out_connections', 'Connections currently checked out of the pool',
+    multiprocess_mode='livesum'
+)
+DB_POOL_OVERFLOW = Gauge(
+    'db_pool_overflow_connections', 'Connections opened beyond the pool size',
+    multiprocess_mode='livesum'
+)
+DB_POOL_CHECKOUTS = Counter('db_pool_checkouts_total', 'Pool connection checkouts')
+DB_POOL_CONNECTS = Counter('db_pool_connections_opened_total', 'New DBAPI connections opened by the pool')
+
+LIVEMAP_FETCH_LATENCY = Histogram(
+    'livemap_fetch_duration_seconds', 'Time spent fetching livemap XML', ['method'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+LIVEMAP_FETCH_TOTAL = Counter('livemap_fetch_total', 'Livemap XML fetch attempts', ['method', 'outcome'])
+
+DISCORD_DISPATCH_TOTAL = Counter('discord_webhook_dispatch_total', 'Discord webhook posts', ['outcome'])
+
+JOB_DURATION = Histogram(
+    'job_duration_seconds', 'Background job run time', ['job'],
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+)
+JOB_ROWS = Counter('job_rows_processed_total', 'Rows processed by background jobs', ['job'])
+JOB_RUNS = Counter('job_runs_total', 'Background job runs', ['job', 'outcome'])
+JOB_LAST_SUCCESS = Gauge(
+    'job_last_success_timestamp_seconds', 'Unix time of the last successful job run', ['job'],
+    multiprocess_mode='max'
+)
+
+
+class JobRun:
+    def __init__(self):
+        self.rows = 0
+
+
+class FetchAttempt:
+    def __init__(self):
+        self.ok = True
+
+
+@contextmanager
+def track_job(job_name):
+    """Times a job run; set `.rows` on the yielded object to record how many rows it processed."""
+    run = JobRun()
+    start = time.perf_counter()
+    try:
+        yield run
+    except Exception:
+        JOB_RUNS.labels(job=job_name, outcome='error').inc()
+        raise
+    else:
+        JOB_RUNS.labels(job=job_name, outcome='success').inc()
+        JOB_LAST_SUCCESS.labels(job=job_name).set(time.time())
+    finally:
+        JOB_DURATION.labels(job=job_name).observe(time.perf_counter() - start)
+        if run.rows:
+            JOB_ROWS.labels(job=job_name).inc(run.rows)
+
+
+@contextmanager
+def track_livemap_fetch(method):
+    """Times a livemap fetch; the fetch counts as failed if it raises or sets `.ok = False`."""
+    run = FetchAttempt()
+    start = time.perf_counter()
+    try:
+        yield run
+    except Exception:
+        run.ok = False
+        raise
+    finally:
+        LIVEMAP_FETCH_LATENCY.labels(method=method).observe(time.perf_counter() - start)
+        LIVEMAP_FETCH_TOTAL.labels(method=method, outcome='success' if run.ok else 'failure').inc()
+
+
+def record_discord_dispatch(outcome):
+    DISCORD_DISPATCH_TOTAL.labels(outcome=outcome).inc()
+
+
+class JobHeartbeatCollector:
+    """Last successful run of every job, read from the job_heartbeats table at scrape time."""
+
+    def collect(self):
+        last_success = GaugeMetricFamily('job_heartbeat_last_success_timestamp_seconds',
+                                         'Unix time of the last successful job run, in any process', labels=['job'])
+        last_rows = GaugeMetricFamily('job_heartbeat_last_rows',
+                                      'Rows processed by the last successful job run, in any process', labels=['job'])
+        try:
+            heartbeats = db.session.execute(
+                db.select(JobHeartbeat.job_name, JobHeartbeat.last_success_at, JobHeartbeat.last_rows)).all()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Job heartbeat metrics failed: {e}")
+            heartbeats = []
+        for job_name, last_success_at, rows in heartbeats:
+            last_success.add_metric([job_name], last_success_at.replace(tzinfo=timezone.utc).timestamp())
+            last_rows.add_metric([job_name], rows)
+        yield last_success
+        yield last_rows
+
+
+def generate_metrics():
+    """Renders all metrics in the Prometheus text format, merged across workers if multiprocess."""
+    heartbeats = CollectorRegistry()
+    heartbeats.register(JobHeartbeatCollector())
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry) + generate_latest(heartbeats)
+    return generate_latest(REGISTRY) + generate_latest(heartbeats)
+
+
+def _start_timer():
+    g.metrics_start_time = time.perf_counter()
+
+
+def _observe_request(response):
+    start = g.pop('metrics_start_time', None)
+    if start is None:
+        return response
+    labels = {
+        'blueprint': request.blueprint or 'none',
+        'endpoint': request.endpoint or 'unmatched',
+        'method': request.method,
+    }
+    REQUEST_LATENCY.labels(**labels).observe(time.perf_counter() - start)
+    REQUEST_COUNT.labels(status=str(response.status_code), **labels).inc()
+    return response
+
+
+def _pool_checkout_listener(pool):
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKED_OUT.inc()
+        if hasattr(pool, 'overflow'):
+            DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+    return _on_checkout
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.dec()
+
+
+def _on_connect(dbapi_connection, connection_record):
+    DB_POOL_CONNECTS.inc()
+
+
+def init_metrics(app, db):
+    """Registers request timing hooks and DB pool listeners for the /metrics endpoint."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    with app.app_context():
+        pool = db.engine.pool
+    if not event.contains(pool, 'checkin', _on_checkin):
+        event.listen(pool, 'checkout', _pool_checkout_listener(pool))
+        event.listen(pool, 'checkin', _on_checkin)
+        event.listen(pool, 'connect', _on_connect)
+
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
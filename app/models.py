@@ -3,7 +3,7 @@ from datetime import datetime
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
-from sqlalchemy import Enum as SqlEnum
+from sqlalchemy import DDL, Enum as SqlEnum, event
 
 class UserRole(enum.Enum):
     USER = "user"
@@ -27,6 +27,15 @@ class User(UserMixin, db.Model):
     company = db.relationship('Company', uselist=False, back_populates='user', cascade="all, delete-orphan")
     farmer = db.relationship('Farmer', uselist=False, back_populates='user', cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Username typeahead: prefix lookups on the lower-cased name, and substring matches through
+        # pg_trgm on PostgreSQL (see services/user_search_service.py).
+        db.Index('ix_users_username_lower', db.func.lower(username).label('username_lower'),
+                 postgresql_ops={'username_lower': 'text_pattern_ops'}),
+        db.Index('ix_users_username_lower_trgm', db.func.lower(username).label('username_lower'),
+                 postgresql_using='gin', postgresql_ops={'username_lower': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
 
@@ -51,6 +60,10 @@ class Account(db.Model):
     user = db.relationship('User', back_populates='accounts')
     transactions = db.relationship('Transaction', backref='account', lazy='dynamic', cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index('ix_accounts_user_id_is_company', 'user_id', 'is_company'),
+    )
+
     def __repr__(self):
         return f'<Account {self.id} for User {self.user_id} - {self.balance} {self.currency}>'
 
@@ -77,11 +90,19 @@ class Transaction(db.Model):
     __tablename__ = 'transactions'
     id = db.Column(db.Integer, primary_key=True)
     account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Never NULL: the ledger's keyset cursor and the balance snapshots are keyed on it.
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     type = db.Column(db.Enum(TransactionType), nullable=False)
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     description = db.Column(db.String(255))
 
+    # Composite indexes matching the admin ledger's keyset order (timestamp, id) and its filters.
+    __table_args__ = (
+        db.Index('ix_transactions_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_transactions_account_id_timestamp_id', 'account_id', 'timestamp', 'id'),
+        db.Index('ix_transactions_type_timestamp_id', 'type', 'timestamp', 'id'),
+    )
+
     def __repr__(self):
         return f'<Transaction {self.id} ({self.type.value}) of {self.amount} for Account {self.account_id}>'
 
@@ -143,6 +164,12 @@ class Ticket(db.Model):
     resolved_by_admin = db.relationship('User', foreign_keys=[resolved_by_admin_id], backref=db.backref('tickets_resolved', lazy='dynamic', cascade="all, delete-orphan"))
     payment_transaction = db.relationship('Transaction', backref=db.backref('ticket_payment_entry', uselist=False))
 
+    __table_args__ = (
+        db.Index('ix_tickets_issued_to_user_id_status_issue_date', 'issued_to_user_id', 'status', 'issue_date'),
+        db.Index('ix_tickets_issued_by_officer_id_issue_date', 'issued_by_officer_id', 'issue_date'),
+        db.Index('ix_tickets_issue_date', 'issue_date'),
+    )
+
     def __repr__(self):
         return f'<Ticket {self.id} for User {self.issued_to_user_id} - Status: {self.status.value}>'
 
@@ -179,6 +206,11 @@ class PermitApplication(db.Model):
     issuer_officer = db.relationship('User', foreign_keys=[issued_by_officer_id], backref=db.backref('permits_issued', lazy='dynamic', cascade="all, delete-orphan"))
     payment_transaction = db.relationship('Transaction', backref=db.backref('permit_fee_payment_entry', uselist=False))
 
+    __table_args__ = (
+        db.Index('ix_permit_applications_user_id_application_date', 'user_id', 'application_date'),
+        db.Index('ix_permit_applications_status_application_date', 'status', 'application_date'),
+    )
+
     def __repr__(self):
         return f'<PermitApplication {self.id} for User {self.user_id} - Status: {self.status.value}>'
 
@@ -203,9 +235,46 @@ class MarketplaceListing(db.Model):
     discord_message_id = db.Column(db.String(100), nullable=True)
     seller = db.relationship('User', backref=db.backref('marketplace_listings', lazy='dynamic', cascade="all, delete-orphan"))
 
+    __table_args__ = (
+        db.Index('ix_marketplace_listings_status_creation_date', 'status', 'creation_date'),
+    )
+
     def __repr__(self):
         return f'<MarketplaceListing {self.id}: {self.quantity} {self.unit} of {self.item_name} by User {self.seller_user_id} for {self.price}>'
 
+
+# Full-text search over listings (services/marketplace_search_service.py). Neither structure is
+# mapped: on PostgreSQL a generated tsvector column, on SQLite an FTS5 table kept in sync by
+# triggers. Both follow every write, including bulk inserts that bypass the ORM. The migration
+# that adds them must use the same definitions.
+LISTING_SEARCH_VECTOR = ("setweight(to_tsvector('english', coalesce(item_name, '')), 'A') || "
+                         "setweight(to_tsvector('english', coalesce(description, '')), 'B')")
+LISTING_FTS_TABLE = 'marketplace_listings_fts'
+LISTING_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {LISTING_FTS_TABLE} USING fts5("
+    "item_name, description, content='marketplace_listings', content_rowid='id', tokenize='porter unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS marketplace_listings_fts_insert AFTER INSERT ON marketplace_listings BEGIN "
+    f"INSERT INTO {LISTING_FTS_TABLE}(rowid, item_name, description) VALUES (new.id, new.item_name, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS marketplace_listings_fts_delete AFTER DELETE ON marketplace_listings BEGIN "
+    f"INSERT INTO {LISTING_FTS_TABLE}({LISTING_FTS_TABLE}, rowid, item_name, description) "
+    "VALUES ('delete', old.id, old.item_name, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS marketplace_listings_fts_update AFTER UPDATE OF item_name, description ON marketplace_listings BEGIN "
+    f"INSERT INTO {LISTING_FTS_TABLE}({LISTING_FTS_TABLE}, rowid, item_name, description) "
+    "VALUES ('delete', old.id, old.item_name, old.description); "
+    f"INSERT INTO {LISTING_FTS_TABLE}(rowid, item_name, description) VALUES (new.id, new.item_name, new.description); END",
+]
+
+event.listen(MarketplaceListing.__table__, 'after_create',
+             DDL(f'ALTER TABLE marketplace_listings ADD COLUMN search_vector tsvector '
+                 f'GENERATED ALWAYS AS ({LISTING_SEARCH_VECTOR}) STORED').execute_if(dialect='postgresql'))
+event.listen(MarketplaceListing.__table__, 'after_create',
+             DDL('CREATE INDEX ix_marketplace_listings_search_vector ON marketplace_listings '
+                 'USING gin (search_vector)').execute_if(dialect='postgresql'))
+for statement in LISTING_FTS_DDL:
+    event.listen(MarketplaceListing.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(MarketplaceListing.__table__, 'before_drop',
+             DDL(f'DROP TABLE IF EXISTS {LISTING_FTS_TABLE}').execute_if(dialect='sqlite'))
+
 class Inspection(db.Model):
     __tablename__ = 'inspections'
     id = db.Column(db.Integer, primary_key=True)
@@ -218,6 +287,10 @@ class Inspection(db.Model):
     officer = db.relationship('User', foreign_keys=[officer_user_id], backref=db.backref('inspections_conducted', lazy='dynamic', cascade="all, delete-orphan"))
     inspected_user = db.relationship('User', foreign_keys=[inspected_user_id], backref=db.backref('inspections_received', lazy='dynamic', cascade="all, delete-orphan"))
 
+    __table_args__ = (
+        db.Index('ix_inspections_officer_user_id_timestamp', 'officer_user_id', 'timestamp'),
+    )
+
     def __repr__(self):
         status_str = "Pass" if self.pass_status else "Fail"
         return f'<Inspection {self.id} on Vehicle {self.vehicle_id} by Officer {self.officer_user_id} - Result: {status_str}>'
@@ -226,6 +299,30 @@ class VehicleRegion(enum.Enum):
     US = "United States"
     EURO = "Europe"
 
+def plate_search_key(plate):
+    """
+    A plate normalised for officer lookups: upper case without dashes or spaces, so "abc 123",
+    "ABC-123" and "Abc123" share one key. The separators are inlined rather than bound so the
+    expression in a query is the same one the plate key indexes are built on.
+    """
+    dash, space, empty = db.literal_column("'-'"), db.literal_column("' '"), db.literal_column("''")
+    return db.func.upper(db.func.replace(db.func.replace(plate, dash, empty), space, empty))
+
+
+def plate_key_indexes(table_name, plate):
+    return (
+        # text_pattern_ops lets PostgreSQL serve LIKE 'ABC%' prefix searches from the btree.
+        db.Index(f'ix_{table_name}_plate_key', plate_search_key(plate).label('plate_key'),
+                 postgresql_ops={'plate_key': 'text_pattern_ops'}),
+        # Trigram index for fuzzy matches; pg_trgm is PostgreSQL-only.
+        db.Index(f'ix_{table_name}_plate_key_trgm', plate_search_key(plate).label('plate_key'),
+                 postgresql_using='gin', postgresql_ops={'plate_key': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
+
+event.listen(db.metadata, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
 class UserVehicle(db.Model):
     __tablename__ = 'user_vehicles'
     id = db.Column(db.Integer, primary_key=True)
@@ -240,6 +337,8 @@ class UserVehicle(db.Model):
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     owner = db.relationship('User', backref=db.backref('vehicles', lazy='dynamic', cascade="all, delete-orphan"))
 
+    __table_args__ = plate_key_indexes('user_vehicles', license_plate)
+
     def __repr__(self):
         return (
             f'<UserVehicle {self.id}: {self.license_plate} '
@@ -275,6 +374,15 @@ class Conversation(db.Model):
             for m in self.messages
         )
 
+    __table_args__ = (
+        db.Index('ix_conversations_user_id_last_message_time', 'user_id', 'last_message_time'),
+        # Partial indexes: only the few conversations with unread messages, counted on every page view.
+        db.Index('ix_conversations_user_id_unread', 'user_id',
+                 postgresql_where=db.text('user_has_unread'), sqlite_where=db.text('user_has_unread')),
+        db.Index('ix_conversations_admin_id_unread', 'admin_id',
+                 postgresql_where=db.text('admin_has_unread'), sqlite_where=db.text('admin_has_unread')),
+    )
+
     def __repr__(self):
         return f'<Conversation {self.id}: "{self.subject}" between User {self.user_id} and Admin {self.admin_id}>'
 
@@ -288,6 +396,10 @@ class Message(db.Model):
     is_read_by_recipient = db.Column(db.Boolean, default=False)
     sender = db.relationship('User', foreign_keys=[sender_id], backref=db.backref('sent_messages', lazy='dynamic', cascade="all, delete-orphan"))
 
+    __table_args__ = (
+        db.Index('ix_messages_conversation_id_timestamp', 'conversation_id', 'timestamp'),
+    )
+
     def __repr__(self):
         return f'<Message {self.id} in Conv {self.conversation_id} by User {self.sender_id}>'
 
@@ -309,6 +421,11 @@ class Notification(db.Model):
     notification_type = db.Column(db.Enum(NotificationType), default=NotificationType.GENERAL_INFO, nullable=False)
     user = db.relationship('User', backref=db.backref('notifications', lazy='dynamic', order_by="desc(Notification.created_at)", cascade="all, delete-orphan"))
 
+    __table_args__ = (
+        # Matches the notifications page order (unread first, newest first) so no sort is needed.
+        db.Index('ix_notifications_user_id_is_read_created_at', user_id, is_read, created_at.desc()),
+    )
+
     def __repr__(self):
         return f'<Notification {self.id} for User {self.user_id} - Read: {self.is_read}>'
 
@@ -349,6 +466,10 @@ class AuctionItem(db.Model):
     winner_payment_tx = db.relationship('Transaction', foreign_keys=[winner_payment_transaction_id], backref=db.backref('auction_winner_payment_tx', uselist=False))
     seller_payout_tx = db.relationship('Transaction', foreign_keys=[seller_payout_transaction_id], backref=db.backref('auction_seller_payout_tx', uselist=False))
 
+    __table_args__ = (
+        db.Index('ix_auction_items_status_current_end_time', 'status', 'current_end_time'),
+    )
+
     def __repr__(self):
         return f'<AuctionItem {self.id}: {self.item_name} - Status: {self.status.value}>'
 
@@ -362,6 +483,10 @@ class AuctionBid(db.Model):
     auction_item = db.relationship('AuctionItem', back_populates='bids', foreign_keys=[auction_item_id])
     bidder = db.relationship('User', foreign_keys=[bidder_user_id], backref=db.backref('auction_bids_placed', lazy='dynamic', cascade="all, delete-orphan"))
 
+    __table_args__ = (
+        db.Index('ix_auction_bids_auction_item_id_bid_amount', 'auction_item_id', 'bid_amount'),
+    )
+
     def __repr__(self):
         return f'<AuctionBid {self.id} for Item {self.auction_item_id} by User {self.bidder_user_id} for {self.bid_amount}>'
 
@@ -400,6 +525,13 @@ class CompanyVehicle(db.Model):
     region_format = db.Column(db.Enum(VehicleRegion), nullable=False)
     registration_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    # The savegame's uniqueId for vehicles imported from vehicles.xml, so re-imports skip them.
+    game_vehicle_id = db.Column(db.String(64), nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('company_id', 'game_vehicle_id', name='uq_company_vehicles_company_game_vehicle'),
+        *plate_key_indexes('company_vehicles', license_plate),
+    )
 
     def __repr__(self):
         return (
@@ -407,15 +539,45 @@ class CompanyVehicle(db.Model):
             f'({self.vehicle_make} {self.vehicle_model}) for Company {self.company_id}>'
         )
 
+class LicensePlate(db.Model):
+    """Registry of every plate issued to a user or company vehicle; its primary key keeps plates unique across both tables."""
+    __tablename__ = 'license_plates'
+    plate = db.Column(db.String(20), primary_key=True)
+    # Set for plates handed out by the allocator; NULL for plates registered before it existed.
+    region_format = db.Column(db.Enum(VehicleRegion), nullable=True)
+    serial = db.Column(db.BigInteger, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_license_plates_region_format_serial', 'region_format', 'serial'),
+    )
+
+    def __repr__(self):
+        return f'<LicensePlate {self.plate}>'
+
+# Serial sources for the plate allocator on PostgreSQL (one per region). Declared on the
+# metadata so db.create_all() creates them as well as migration b1c7e9d2a6f3; other
+# dialects skip them and fall back to max(serial) + 1.
+LICENSE_PLATE_SEQUENCES = {
+    VehicleRegion.US: db.Sequence('license_plate_us_seq', start=1, metadata=db.metadata),
+    VehicleRegion.EURO: db.Sequence('license_plate_euro_seq', start=1, metadata=db.metadata),
+}
+
 class Farmer(db.Model):
     __tablename__ = 'farmers'
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
+    # farmId of the player's farm in the FS25 savegame; set by an admin or the FS25 API (savegame_service.link_farm).
+    game_farm_id = db.Column(db.Integer, nullable=True)
 
     user = db.relationship('User', back_populates='farmer')
     parcels = db.relationship('Parcel', backref='farmer', lazy='dynamic', cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.UniqueConstraint('game_farm_id', name='uq_farmers_game_farm_id'),
+    )
+
 class FarmerStats(db.Model):
     __tablename__ = 'farmer_stats'
     id = db.Column(db.Integer, primary_key=True)
@@ -441,6 +603,11 @@ class Parcel(db.Model):
     farmer_id = db.Column(db.Integer, db.ForeignKey('farmers.id'), nullable=False)
     validated = db.Column(db.Boolean, default=False, nullable=False)
 
+    __table_args__ = (
+        # A farmer holds each farmland once; farmland imports upsert on this key.
+        db.UniqueConstraint('farmer_id', 'location', name='uq_parcels_farmer_location'),
+    )
+
     def __repr__(self):
         return f'<Parcel {self.id}>'
 
@@ -456,10 +623,27 @@ class SiloStorage(db.Model):
 
     farmer = db.relationship('Farmer', backref=db.backref('silo_contents', lazy='dynamic'))
 
+    __table_args__ = (
+        db.Index('ix_silo_storage_farmer_id_crop_type', 'farmer_id', 'crop_type'),
+    )
+
     def __repr__(self):
         return f'<SiloStorage for Farmer {self.farmer_id}: {self.quantity}/{self.capacity} of {self.crop_type}>'
 
 
+INSURANCE_CLAIM_REASONS = {
+    'crop_damage_weather': 'Crop Damage - Weather Related',
+    'crop_damage_pest': 'Crop Damage - Pest/Disease',
+    'equipment_breakdown': 'Equipment Breakdown',
+    'livestock_injury': 'Livestock Injury/Death',
+    'fire_damage': 'Fire Damage to Property',
+    'theft_vandalism': 'Theft or Vandalism',
+    'vehicle_accident': 'Farm Vehicle Accident',
+    'building_damage': 'Building/Structure Damage',
+    'contamination': 'Crop/Feed Contamination',
+    'other_farm_related': 'Other Farm-Related Incident'
+}
+
 class InsuranceClaimStatus(enum.Enum):
     PENDING = "Pending"
     APPROVED = "Approved"
@@ -480,19 +664,7 @@ class InsuranceClaim(db.Model):
     farmer = db.relationship('Farmer', backref=db.backref('insurance_claims', lazy='dynamic'))
 
     def get_readable_reason(self):
-        reason_map = {
-            'crop_damage_weather': 'Crop Damage - Weather Related',
-            'crop_damage_pest': 'Crop Damage - Pest/Disease',
-            'equipment_breakdown': 'Equipment Breakdown',
-            'livestock_injury': 'Livestock Injury/Death',
-            'fire_damage': 'Fire Damage to Property',
-            'theft_vandalism': 'Theft or Vandalism',
-            'vehicle_accident': 'Farm Vehicle Accident',
-            'building_damage': 'Building/Structure Damage',
-            'contamination': 'Crop/Feed Contamination',
-            'other_farm_related': 'Other Farm-Related Incident'
-        }
-        return reason_map.get(self.reason, self.reason)
+        return INSURANCE_CLAIM_REASONS.get(self.reason, self.reason)
 
     def __repr__(self):
         return f'<InsuranceClaim {self.id}: {self.get_readable_reason()}>'
@@ -508,6 +680,7 @@ class InsuranceRateType(enum.Enum):
 
 class InsuranceRate(db.Model):
     __tablename__ = 'insurance_rates'
+    __table_args__ = (db.UniqueConstraint('rate_type', 'name', name='uq_insurance_rates_type_name'),)
     id = db.Column(db.Integer, primary_key=True)
     rate_type = db.Column(db.Enum(InsuranceRateType), default=InsuranceRateType.VEHICLE, nullable=False)
     name = db.Column(db.String(100), nullable=False)
@@ -589,10 +762,29 @@ class StoreItem(db.Model):
     category = db.Column(db.String(100), nullable=True)
     xml_filename = db.Column(db.String(255), nullable=False, unique=True, index=True)
 
+    __table_args__ = (
+        # Store browser: the default brand/name ordering, and the category and price filters.
+        db.Index('ix_store_items_brand_name', 'brand', 'name'),
+        db.Index('ix_store_items_category_price', 'category', 'price'),
+        db.Index('ix_store_items_price', 'price'),
+    )
+
     def __repr__(self):
         return f'<StoreItem {self.id}: {self.name}>'
 
 
+class StoreFacet(db.Model):
+    """Item count per brand and per category, rebuilt with every FS25 inventory push."""
+    __tablename__ = 'store_facets'
+    kind = db.Column(db.String(20), primary_key=True)   # 'brand' or 'category'
+    value = db.Column(db.String(100), primary_key=True)
+    item_count = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<StoreFacet {self.kind}={self.value}: {self.item_count}>'
+
+
 class Announcement(db.Model):
     __tablename__ = 'announcements'
     id = db.Column(db.Integer, primary_key=True)
@@ -604,3 +796,187 @@ class Announcement(db.Model):
 
     def __repr__(self):
         return f'<Announcement {self.id}: {self.title}>'
+
+
+class SiteStats(db.Model):
+    __tablename__ = 'site_stats'
+    id = db.Column(db.Integer, primary_key=True)
+    total_users = db.Column(db.Integer, default=0, nullable=False)
+    open_tickets = db.Column(db.Integer, default=0, nullable=False)
+    pending_permits = db.Column(db.Integer, default=0, nullable=False)
+    insurance_claims = db.Column(db.Integer, default=0, nullable=False)
+    # revenue_settled plus the revenue of every transaction above the watermark.
+    revenue = db.Column(db.Numeric(14, 2), default=0.00, nullable=False)
+    revenue_settled = db.Column(db.Numeric(14, 2), default=0.00, nullable=False)
+    # Highest Transaction.id folded into `revenue_settled`; it trails the newest id so that
+    # transactions committing late are still summed by a later refresh.
+    revenue_last_transaction_id = db.Column(db.Integer, default=0, nullable=False)
+    refreshed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<SiteStats refreshed at {self.refreshed_at}>'
+
+
+class SavegameFile(db.Model):
+    """Hash of each savegame file as last ingested, so unchanged files are skipped."""
+    __tablename__ = 'savegame_files'
+    name = db.Column(db.String(64), primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    ingested_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<SavegameFile {self.name} {self.sha256[:12]}>'
+
+
+class JobHeartbeat(db.Model):
+    __tablename__ = 'job_heartbeats'
+    job_name = db.Column(db.String(64), primary_key=True)
+    last_success_at = db.Column(db.DateTime, nullable=False)
+    last_rows = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<JobHeartbeat {self.job_name} at {self.last_success_at}>'
+
+
+class ApiKey(db.Model):
+    __tablename__ = 'api_keys'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    # Public part of the key ("fs25_<prefix>_<secret>"); used to find the row without scanning hashes.
+    prefix = db.Column(db.String(16), unique=True, index=True, nullable=False)
+    key_hash = db.Column(db.String(256), nullable=False)
+    scopes = db.Column(db.String(255), nullable=False, default='')
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def scope_list(self):
+        return [scope for scope in self.scopes.split(',') if scope]
+
+    def __repr__(self):
+        return f'<ApiKey {self.name} ({self.prefix})>'
+
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+    # sha256(caller + endpoint + Idempotency-Key header), truncated; keeps the primary key compact.
+    id = db.Column(db.String(32), primary_key=True)
+    endpoint = db.Column(db.String(64), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    # NULL while the first request is still being processed.
+    response_status = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # When the request now processing the key took it; a pending key whose claim is older than
+    # IDEMPOTENCY_CLAIM_LEASE_SECONDS is left over from a crashed worker and may be taken over.
+    claimed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, index=True, nullable=False)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.id} {self.endpoint} ({self.response_status})>'
+
+
+class ReportJobStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ReportJob(db.Model):
+    __tablename__ = 'report_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    requested_by_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    report_type = db.Column(db.String(50), nullable=False)
+    format = db.Column(db.String(10), nullable=False)
+    filters = db.Column(db.Text, nullable=True)  # JSON-encoded
+    status = db.Column(db.Enum(ReportJobStatus), default=ReportJobStatus.PENDING, nullable=False, index=True)
+    total_rows = db.Column(db.Integer, nullable=True)
+    rows_written = db.Column(db.Integer, default=0, nullable=False)
+    artifact_path = db.Column(db.String(512), nullable=True)
+    artifact_size = db.Column(db.BigInteger, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    requested_by = db.relationship('User', backref=db.backref('report_jobs', lazy='dynamic', cascade="all, delete-orphan"))
+
+    @property
+    def progress_percent(self):
+        if self.status == ReportJobStatus.COMPLETED:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.rows_written * 100 / self.total_rows))
+
+    def __repr__(self):
+        return f'<ReportJob {self.id} {self.report_type}.{self.format} ({self.status.value})>'
+
+
+class BalanceSnapshot(db.Model):
+    __tablename__ = 'balance_snapshots'
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
+    # Ledger balance covers every transaction with timestamp < as_of.
+    as_of = db.Column(db.DateTime, nullable=False)
+    ledger_balance = db.Column(db.Numeric(14, 2), nullable=False)
+    # Account.balance when the snapshot was taken, kept for drift investigations.
+    account_balance = db.Column(db.Numeric(14, 2), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    account = db.relationship('Account', backref=db.backref('balance_snapshots', lazy='dynamic', cascade="all, delete-orphan"))
+
+    __table_args__ = (
+        db.UniqueConstraint('account_id', 'as_of', name='uq_balance_snapshots_account_id_as_of'),
+    )
+
+    def __repr__(self):
+        return f'<BalanceSnapshot Account {self.account_id} as of {self.as_of}: {self.ledger_balance}>'
+
+
+class ReconciliationRun(db.Model):
+    """Outcome of one reconciliation pass, shown on the admin page without rescanning the ledger."""
+    __tablename__ = 'reconciliation_runs'
+    id = db.Column(db.Integer, primary_key=True)
+    checked_at = db.Column(db.DateTime, nullable=False, index=True)
+    drifted_count = db.Column(db.Integer, nullable=False)
+    total_drift = db.Column(db.Numeric(14, 2), nullable=False)
+    # The largest drifts only (reconciliation_service.STORED_DRIFT_ROWS), JSON-encoded.
+    drifted_accounts = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f'<ReconciliationRun {self.checked_at}: {self.drifted_count} drifted>'
+
+
+class AccountStatement(db.Model):
+    __tablename__ = 'account_statements'
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
+    # Closed period covered by the statement: period_start <= timestamp < period_end.
+    period_start = db.Column(db.DateTime, nullable=False)
+    period_end = db.Column(db.DateTime, nullable=False)
+    opening_balance = db.Column(db.Numeric(14, 2), nullable=False)
+    closing_balance = db.Column(db.Numeric(14, 2), nullable=False)
+    total_credits = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    total_debits = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    # Comma-separated artifact extensions written for this statement (e.g. "html,csv,pdf").
+    formats = db.Column(db.String(50), nullable=False)
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    account = db.relationship('Account', backref=db.backref('statements', lazy='dynamic', cascade="all, delete-orphan"))
+
+    __table_args__ = (
+        db.UniqueConstraint('account_id', 'period_start', name='uq_account_statements_account_id_period_start'),
+    )
+
+    @property
+    def period_label(self):
+        return self.period_start.strftime('%Y-%m')
+
+    @property
+    def format_list(self):
+        return [fmt for fmt in self.formats.split(',') if fmt]
+
+    def __repr__(self):
+        return f'<AccountStatement Account {self.account_id} {self.period_label}>'
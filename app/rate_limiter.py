@@ -1,33 +1,172 @@
-
-from flask import request, jsonify
+from flask import g, request, jsonify, current_app
 from functools import wraps
-from collections import defaultdict
+import math
+import threading
 import time
 
-# Simple in-memory rate limiter (use Redis in production)
-request_counts = defaultdict(list)
+# Sliding-window counter: each key keeps only the request count of the current and previous
+# fixed windows, and the previous window is weighted by how much of it still overlaps the
+# sliding window. That makes every check O(1) in time and memory per key.
+#
+# The backend is chosen by RATE_LIMIT_STORAGE_URL: "memory://" (per worker, for tests and
+# single-process runs) or "redis://..." so every gunicorn worker shares the same counters.
+
+
+class MemoryBackend:
+    """Per-process counters. Idle keys are swept periodically so unique clients can't grow it forever."""
+
+    SWEEP_EVERY = 1000
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._counters = {}  # key -> [window_index, previous_count, current_count, window_seconds]
+        self._lock = threading.Lock()
+        self._hits_since_sweep = 0
+
+    def hit(self, key, window, now):
+        index = int(now // window)
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None or entry[0] < index - 1:
+                entry = self._counters[key] = [index, 0, 0, window]
+            elif entry[0] == index - 1:
+                entry[0], entry[1], entry[2] = index, entry[2], 0
+            entry[2] += 1
+            previous, current = entry[1], entry[2]
+
+            self._hits_since_sweep += 1
+            if self._hits_since_sweep >= self.SWEEP_EVERY or len(self._counters) > self.max_keys:
+                self._sweep(now)
+        return previous, current
+
+    def peek(self, key, window, now):
+        index = int(now // window)
+        with self._lock:
+            entry = self._counters.get(key)
+        if entry is None or entry[0] < index - 1:
+            return 0, 0
+        if entry[0] == index - 1:
+            return entry[2], 0
+        return entry[1], entry[2]
+
+    def _sweep(self, now):
+        self._hits_since_sweep = 0
+        for key in [k for k, e in self._counters.items() if e[0] < int(now // e[3]) - 1]:
+            del self._counters[key]
+        if len(self._counters) > self.max_keys:
+            # Still over the cap with only active keys: drop the least recently used windows.
+            for key, _ in sorted(self._counters.items(), key=lambda item: item[1][0] * item[1][3])[:len(self._counters) - self.max_keys]:
+                del self._counters[key]
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class RedisBackend:
+    """Shared counters in Redis. Window keys expire on their own, so idle clients cost nothing."""
+
+    def __init__(self, url, prefix='ratelimit'):
+        import redis  # Only needed when a redis:// storage URL is configured.
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def hit(self, key, window, now):
+        index = int(now // window)
+        current_key = f"{self.prefix}:{key}:{index}"
+        pipe = self.client.pipeline(transaction=False)
+        pipe.incr(current_key)
+        pipe.expire(current_key, int(window * 2))
+        pipe.get(f"{self.prefix}:{key}:{index - 1}")
+        current, _, previous = pipe.execute()
+        return int(previous or 0), int(current)
+
+    def peek(self, key, window, now):
+        index = int(now // window)
+        previous, current = self.client.mget(f"{self.prefix}:{key}:{index - 1}", f"{self.prefix}:{key}:{index}")
+        return int(previous or 0), int(current or 0)
+
+    def reset(self):
+        for key in self.client.scan_iter(f"{self.prefix}:*"):
+            self.client.delete(key)
+
+
+def create_backend(storage_url):
+    if storage_url.startswith(('redis://', 'rediss://')):
+        return RedisBackend(storage_url)
+    if storage_url.startswith('memory://'):
+        return MemoryBackend(max_keys=current_app.config.get('RATE_LIMIT_MAX_MEMORY_KEYS', 10000))
+    raise ValueError(f"Unsupported RATE_LIMIT_STORAGE_URL: {storage_url}")
+
+
+def get_backend():
+    backend = current_app.extensions.get('rate_limiter')
+    if backend is None:
+        backend = create_backend(current_app.config.get('RATE_LIMIT_STORAGE_URL', 'memory://'))
+        current_app.extensions['rate_limiter'] = backend
+    return backend
+
+
+def client_ip():
+    """
+    The peer address. Behind a proxy, create_app's ProxyFix (TRUSTED_PROXY_COUNT hops) has
+    already replaced it with the address the trusted proxy saw, so forwarded headers the
+    client sets itself are never believed.
+    """
+    return 'ip:' + (request.remote_addr or 'unknown')
+
+
+def client_identity():
+    """The verified API key's id once the request has been authenticated, otherwise the client IP."""
+    api_key_id = g.get('api_key_id')
+    if api_key_id is not None:
+        return f'key:{api_key_id}'
+    return client_ip()
+
+
+def check_rate_limit(max_requests, window, scope=None, identity=None, count=True):
+    """
+    Counts the current request against `scope` (defaults to the endpoint) for `identity`
+    (defaults to the calling client). With count=False nothing is counted; the check only
+    reports whether one more request would exceed the limit.
+    Returns a 429 response when the limit is exceeded, otherwise None.
+    """
+    if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return None
+
+    key = f"{scope or request.endpoint}:{identity or client_identity()}"
+    now = time.time()
+    try:
+        backend = get_backend()
+        if count:
+            previous, current = backend.hit(key, window, now)
+        else:
+            previous, current = backend.peek(key, window, now)
+            current += 1
+    except Exception as e:
+        # Fail open: an unreachable limiter backend must not take the API down with it.
+        current_app.logger.error(f"Rate limiter backend error: {e}")
+        return None
+
+    elapsed_fraction = (now % window) / window
+    estimated = previous * (1 - elapsed_fraction) + current
+    if estimated > max_requests:
+        response = jsonify({'error': 'Rate limit exceeded'})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(window - now % window)))
+        response.headers['X-RateLimit-Limit'] = str(max_requests)
+        return response
+    return None
+
 
-def rate_limit(max_requests=60, window=60):
-    """Rate limit decorator: max_requests per window seconds"""
+def rate_limit(max_requests=60, window=60, scope=None):
+    """Rate limit decorator: max_requests per sliding window of `window` seconds"""
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.remote_addr)
-            now = time.time()
-            
-            # Clean old requests
-            request_counts[client_ip] = [
-                timestamp for timestamp in request_counts[client_ip]
-                if now - timestamp < window
-            ]
-            
-            # Check if limit exceeded
-            if len(request_counts[client_ip]) >= max_requests:
-                return jsonify({'error': 'Rate limit exceeded'}), 429
-            
-            # Add current request
-            request_counts[client_ip].append(now)
-            
+            limited = check_rate_limit(max_requests, window, scope)
+            if limited is not None:
+                return limited
             return f(*args, **kwargs)
         return decorated_function
     return decorator
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, flash, redirect, url_for, request
+from flask import Blueprint, render_template, flash, redirect, url_for, request, jsonify, send_file, abort
 from datetime import datetime
 from flask_login import login_required, current_user
 from sqlalchemy.orm import joinedload
@@ -8,14 +8,16 @@ from app.models import (
     User, Account, Ticket, PermitApplication, Inspection, TaxBracket, Transaction,
     TransactionType, VehicleRegion, RulesContent, UserRole, InsuranceClaim,
     InsuranceClaimStatus, PermitApplicationStatus, TicketStatus, Contract,
-    Conversation, Message, Fine, Farmer, Announcement, Parcel
+    Conversation, Message, Fine, Farmer, Announcement, Parcel, ReportJob, ReportJobStatus,
+    BalanceSnapshot, Company
 )
 from app.forms import (
     EditRulesForm, EditUserForm, AccountForm, EditAccountForm, EditTicketForm, EditPermitForm,
     EditInspectionForm, EditTaxBracketForm, EditBalanceForm, EditInsuranceClaimForm,
-    EditBankForm, DeleteUserForm, FineForm, ResolveTicketForm, AnnouncementForm, ParcelForm
+    EditBankForm, DeleteUserForm, FineForm, ResolveTicketForm, AnnouncementForm, ParcelForm,
+    ReportRequestForm, AdminFleetImportForm
 )
-from app.utils import parse_farmland_xml
+from app.services import posting_service, stats_service, report_service, ledger_service, export_service, reconciliation_service, fleet_import_service, user_search_service, parcel_import_service, savegame_service
 import logging
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -26,23 +28,7 @@ admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 @admin_required
 def index():
     # --- Stats ---
-    revenue_query = db.session.query(db.func.sum(Transaction.amount)).filter(
-        Transaction.type.in_([
-            TransactionType.TICKET_PAYMENT,
-            TransactionType.PERMIT_FEE_PAYMENT,
-            TransactionType.PERMIT_FEE
-        ])
-    ).scalar()
-    stats = {
-        'total_users': User.query.count(),
-        'pending_permits': PermitApplication.query.filter_by(
-            status=PermitApplicationStatus.PENDING_REVIEW
-        ).count(),
-        'open_tickets': Ticket.query.filter_by(
-            status=TicketStatus.OUTSTANDING
-        ).count(),
-        'revenue': revenue_query or 0.0
-    }
+    stats = stats_service.get_site_stats()
 
     # --- Recent Activity Feed ---
     recent_permits = PermitApplication.query.order_by(PermitApplication.application_date.desc()).limit(5).all()
@@ -75,6 +61,69 @@ def index():
                            stats=stats,
                            recent_activity=recent_activity)
 
+@admin_bp.route('/performance')
+@admin_required
+def performance():
+    from app.instrumentation import get_endpoint_report
+    endpoints = get_endpoint_report(limit=request.args.get('limit', 25, type=int))
+    return render_template('admin/performance.html', title='Endpoint Performance', endpoints=endpoints)
+
+# ---------------- Reports ---------------- #
+
+@admin_bp.route('/reports', methods=['GET', 'POST'])
+@admin_required
+def reports():
+    form = ReportRequestForm()
+    if form.validate_on_submit():
+        job = report_service.request_report(current_user.id, form.report_type.data, form.format.data,
+                                            form.start_date.data, form.end_date.data)
+        flash(f'Report #{job.id} queued. It will be ready to download here once generated.', 'success')
+        return redirect(url_for('admin.reports'))
+
+    jobs = ReportJob.query.options(joinedload(ReportJob.requested_by)) \
+                          .order_by(ReportJob.created_at.desc()).limit(50).all()
+    in_progress = any(job.status in (ReportJobStatus.PENDING, ReportJobStatus.RUNNING) for job in jobs)
+    return render_template('admin/reports.html', title='Reports', form=form, jobs=jobs,
+                           report_types=report_service.REPORT_TYPES, in_progress=in_progress)
+
+@admin_bp.route('/reports/<int:job_id>/status')
+@admin_required
+def report_status(job_id):
+    job = ReportJob.query.get_or_404(job_id)
+    return jsonify({
+        'id': job.id,
+        'status': job.status.value,
+        'rows_written': job.rows_written,
+        'total_rows': job.total_rows,
+        'progress_percent': job.progress_percent,
+        'error': job.error,
+        'download_url': url_for('admin.download_report', job_id=job.id) if job.status == ReportJobStatus.COMPLETED else None,
+    })
+
+@admin_bp.route('/reports/<int:job_id>/download')
+@admin_required
+def download_report(job_id):
+    job = ReportJob.query.get_or_404(job_id)
+    path = report_service.artifact_file(job)
+    if not path:
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=job.artifact_path)
+
+@admin_bp.route('/reconciliation', methods=['GET', 'POST'])
+@admin_required
+def reconciliation():
+    # Viewing shows the last saved run (the nightly job's, usually); a full pass over the
+    # ledger only happens when an admin asks for one.
+    if request.method == 'POST':
+        report = reconciliation_service.reconcile_accounts()
+        reconciliation_service.save_reconciliation(report)
+        flash(f"Reconciliation finished: {report['drifted_count']} account(s) out of balance.", 'info')
+        return redirect(url_for('admin.reconciliation'))
+    report = reconciliation_service.latest_reconciliation()
+    last_snapshot_at = db.session.query(db.func.max(BalanceSnapshot.as_of)).scalar()
+    return render_template('admin/reconciliation.html', title='Ledger Reconciliation', report=report,
+                           last_snapshot_at=last_snapshot_at)
+
 # ---------------- Routes in Alphabetical Order ---------------- #
 
 @admin_bp.route('/manage/accounts', methods=['GET'])
@@ -88,7 +137,7 @@ def manage_accounts():
     # Search functionality
     search_query = request.args.get('search')
     if search_query:
-        query = query.join(User).filter(User.username.ilike(f'%{search_query}%'))
+        query = query.join(User).filter(user_search_service.username_contains(search_query))
 
     accounts = query.options(
         db.joinedload(Account.user)
@@ -106,11 +155,17 @@ def create_account():
         account = Account(
             user_id=form.user_id.data,
             name=form.name.data,
-            balance=form.balance.data,
+            balance=0,
             is_company=form.is_company.data,
             currency=form.currency.data
         )
         db.session.add(account)
+        db.session.flush()
+        # The opening balance goes through the ledger, so reconciliation sees where it came from.
+        if form.balance.data:
+            posting_service.post_entries([posting_service.Entry(
+                account.id, form.balance.data, TransactionType.INITIAL_SETUP, 'Opening balance set by an admin'
+            )], allow_overdraft=True, commit=False)
         db.session.commit()
         flash('Account created successfully.', 'success')
         return redirect(url_for('admin.manage_accounts'))
@@ -124,8 +179,11 @@ def edit_account(account_id):
     account = Account.query.get_or_404(account_id)
     form = EditAccountForm(obj=account)
     if form.validate_on_submit():
-        account.balance = form.balance.data
         account.is_company = form.is_company.data
+        if form.balance.data != account.balance:
+            # Recorded as a transaction for the difference, under a row lock, like any other balance change.
+            tx_type = TransactionType.ADMIN_DEPOSIT if form.balance.data > account.balance else TransactionType.ADMIN_WITHDRAWAL
+            posting_service.set_balance(account.id, form.balance.data, tx_type, 'Balance adjusted by an admin', commit=False)
         db.session.commit()
         flash('Account updated successfully.', 'success')
         return redirect(url_for('admin.manage_accounts'))
@@ -271,8 +329,26 @@ def edit_tax_bracket(tax_bracket_id):
 @login_required
 @admin_required
 def manage_transactions():
-    transactions = Transaction.query.order_by(Transaction.date.desc()).all()
-    return render_template('admin/manage_transactions.html', transactions=transactions)
+    filters = {
+        'account_id': request.args.get('account_id', type=int),
+        'transaction_id': request.args.get('transaction_id', type=int),
+        'tx_type': None,
+        'start_at': None,
+        'end_before': None,
+    }
+    if request.args.get('type') in TransactionType.__members__:
+        filters['tx_type'] = TransactionType[request.args['type']]
+    try:
+        filters['start_at'], filters['end_before'] = export_service.parse_date_range(
+            request.args.get('start'), request.args.get('end'))
+    except ValueError:
+        flash('Dates must be in YYYY-MM-DD format.', 'warning')
+
+    page = ledger_service.get_ledger_page(before=request.args.get('before'), after=request.args.get('after'), **filters)
+    # Filter arguments to carry over into the pagination links.
+    filter_args = {key: value for key, value in request.args.items() if key not in ('before', 'after') and value}
+    return render_template('admin/manage_transactions.html', title='Transaction Ledger', page=page,
+                           filter_args=filter_args, transaction_types=TransactionType)
 
 @admin_bp.route('/manage/transactions/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -284,6 +360,8 @@ def edit_transaction(id):
         transaction.amount = form.amount.data
         transaction.type = form.type.data
         db.session.commit()
+        # Edited rows sit below the revenue watermark, so rebuild the cached total.
+        stats_service.refresh_site_stats(full=True)
         flash('Transaction updated.', 'success')
         return redirect(url_for('admin.manage_transactions'))
     return render_template('admin/edit_transaction.html', form=form, transaction=transaction)
@@ -395,9 +473,19 @@ def edit_user(user_id):
         user.email = form.email.data
         user.role = UserRole(form.role.data)
         # user.pay_rate = form.pay_rate.data
-        db.session.commit()
-        flash('User updated successfully.', 'success')
-        return redirect(url_for('admin.manage_users'))
+        try:
+            if user.farmer:
+                # An admin-confirmed link is one of the two ways a savegame farm gets a farmer.
+                savegame_service.link_farm(user.farmer, form.game_farm_id.data)
+            db.session.commit()
+        except savegame_service.SavegameIngestError as e:
+            db.session.rollback()
+            form.game_farm_id.errors.append(str(e))
+        else:
+            flash('User updated successfully.', 'success')
+            return redirect(url_for('admin.manage_users'))
+    elif request.method == 'GET' and user.farmer:
+        form.game_farm_id.data = user.farmer.game_farm_id
     form.role.data = user.role.value
     return render_template('admin/edit_user.html', title='Edit User', form=form, user=user)
 
@@ -462,43 +550,68 @@ def add_parcel():
     # Handle pre-selected farmer from URL
     farmer_id = request.args.get('farmer_id', type=int)
     if request.method == 'GET' and farmer_id:
-        form.farmer_id.data = farmer_id
+        farmer = db.session.get(Farmer, farmer_id)
+        if farmer:
+            form.farmer_id.data = farmer.id
+            form.farmer_lookup.data = farmer.user.username
 
     if form.validate_on_submit():
         farmer = Farmer.query.get_or_404(form.farmer_id.data)
 
         # Check if XML file was uploaded
         if form.xml_file.data:
-            xml_content = form.xml_file.data.read().decode('utf-8')
-            parcel_data = parse_farmland_xml(xml_content)
-
-            if not parcel_data:
-                flash('No valid parcel data found in XML.', 'warning')
+            try:
+                result = parcel_import_service.import_farmland(farmer.id, form.xml_file.data.stream)
+            except parcel_import_service.ParcelImportError as e:
+                db.session.rollback()
+                flash(str(e), 'danger')
             else:
-                for data in parcel_data:
-                    parcel = Parcel(
-                        location=data['id'],
-                        size=data['area'],
-                        farmer_id=farmer.id
-                    )
-                    db.session.add(parcel)
-                db.session.commit()
-                flash(f'Successfully imported {len(parcel_data)} parcels from XML.', 'success')
-                return redirect(url_for('admin.manage_users'))
+                if not (result.inserted or result.updated or result.skipped):
+                    flash('No farmland entries found in XML.', 'warning')
+                else:
+                    flash(f'Imported farmland.xml: {result.inserted} parcels added, {result.updated} resized, '
+                          f'{result.skipped} skipped.', 'success')
+                    if result.errors:
+                        flash('Some entries were invalid: ' + '; '.join(result.errors[:5]) +
+                              (' (and more)' if len(result.errors) > 5 else ''), 'warning')
+                    return redirect(url_for('admin.manage_users'))
 
         # Manual entry
         elif form.location.data and form.size.data:
-            parcel = Parcel(
-                location=form.location.data,
-                size=form.size.data,
-                farmer_id=farmer.id
-            )
-            db.session.add(parcel)
-            db.session.commit()
-            flash('Parcel added successfully.', 'success')
-            return redirect(url_for('admin.manage_users'))
+            if Parcel.query.filter_by(farmer_id=farmer.id, location=form.location.data).first():
+                flash(f'{farmer.user.username} already has a parcel at {form.location.data}.', 'warning')
+            else:
+                parcel = Parcel(
+                    location=form.location.data,
+                    size=form.size.data,
+                    farmer_id=farmer.id
+                )
+                db.session.add(parcel)
+                db.session.commit()
+                flash('Parcel added successfully.', 'success')
+                return redirect(url_for('admin.manage_users'))
 
         else:
             flash('Please provide either manual details or an XML file.', 'danger')
 
     return render_template('admin/add_parcel.html', title='Add Parcel', form=form)
+
+@admin_bp.route('/fleet_import', methods=['GET', 'POST'])
+@admin_required
+def import_fleet():
+    form = AdminFleetImportForm()
+    result = None
+    if form.validate_on_submit():
+        company = Company.query.get_or_404(form.company_id.data)
+        try:
+            result = fleet_import_service.import_fleet(
+                company.id, form.xml_file.data.stream, VehicleRegion[form.region_format.data], form.farm_id.data
+            )
+            flash(f'Imported {result.created} vehicles into {company.name}.', 'success' if result.created else 'info')
+        except fleet_import_service.FleetImportError as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
+
+    return render_template('vehicles/fleet_import.html', title='Import Fleet', form=form, result=result,
+                           status_counts=fleet_import_service.status_counts(result.rows) if result else {},
+                           action=url_for('admin.import_fleet'))
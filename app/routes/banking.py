@@ -1,9 +1,11 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, send_file, Response
 from flask_login import current_user, login_required
 from app import db
-from app.models import User, Account, Transaction, TaxBracket
+from app.models import User, UserRole, Account, AccountStatement, Transaction, TaxBracket
 from app.decorators import admin_required # If any admin-specific banking views were here
-from datetime import datetime # Added import
+from app.services import export_service, statement_service
+from datetime import datetime, time # Added import
+import os
 
 bp = Blueprint('banking', __name__)
 
@@ -57,42 +59,79 @@ def view_account(account_id):
     return render_template('banking/view_account.html', title=f'Account {account.id} Statement', account=account, transactions=transactions)
 
 
+def _statement_account(account_id):
+    account = Account.query.get_or_404(account_id)
+    if account.user_id != current_user.id and current_user.role != UserRole.ADMIN:
+        return None
+    return account
+
+
 @bp.route('/account/<int:account_id>/statement')
 @login_required
 def download_statement(account_id):
-    account = Account.query.get_or_404(account_id)
-    if account.user_id != current_user.id and current_user.role != UserRole.ADMIN:
+    """Statement for ?start=YYYY-MM-DD&end=YYYY-MM-DD (default: this month so far); ?format=csv downloads it."""
+    account = _statement_account(account_id)
+    if not account:
         flash('You are not authorized to generate a statement for this account.', 'danger')
         return redirect(url_for('banking.dashboard'))
 
-    # For now, just display it as a page. PDF generation would be more complex.
-    all_transactions = Transaction.query.filter_by(account_id=account.id)\
-                                     .order_by(Transaction.timestamp.asc()).all() # Asc for statement chronological order
+    try:
+        start_at, end_before = export_service.parse_date_range(request.args.get('start'), request.args.get('end'))
+    except ValueError:
+        flash('Dates must be in YYYY-MM-DD format.', 'danger')
+        start_at = end_before = None
+    now = datetime.utcnow()
+    start_at = start_at or datetime(now.year, now.month, 1)
+    end_before = min(end_before or now, now)
+    fmt = request.args.get('format', 'html')
+
+    # A closed calendar month is served from its archived artifact instead of being rebuilt.
+    if start_at.day == 1 and start_at.time() == time.min and \
+            statement_service.month_bounds(start_at.year, start_at.month)[1] == end_before:
+        return redirect(url_for('banking.archived_statement', account_id=account.id,
+                                period=start_at.strftime('%Y-%m'), fmt=fmt))
 
+    statement = statement_service.build_statement(account, start_at, end_before)
+    if fmt == 'csv':
+        response = Response(export_service.iter_csv(statement_service.CSV_HEADER,
+                                                    statement_service.statement_csv_rows(statement)),
+                            mimetype='text/csv')
+        response.headers['Content-Disposition'] = f'attachment; filename=statement_account_{account.id}.csv'
+        return response
+
+    archived = account.statements.order_by(AccountStatement.period_start.desc()).limit(24).all()
     return render_template('banking/statement_page.html',
                            title=f'Statement for Account {account.id}',
                            account=account,
-                           transactions=all_transactions,
-                           generation_time=datetime.utcnow())
-
-# Note: Actual "download" would involve generating a file (CSV, PDF).
-# This is a simplified "view statement" page.
-# from flask import Response
-# import io
-# import csv
-# @bp.route('/account/<int:account_id>/statement/download_csv')
-# @login_required
-# def download_statement_csv(account_id):
-#     account = Account.query.get_or_404(account_id)
-#     if account.user_id != current_user.id:
-#         abort(403)
-#     transactions = Transaction.query.filter_by(account_id=account.id).order_by(Transaction.timestamp.asc()).all()
-#
-#     output = io.StringIO()
-#     writer = csv.writer(output)
-#     writer.writerow(['Timestamp', 'Type', 'Amount', 'Currency', 'Description'])
-#     for t in transactions:
-#         writer.writerow([t.timestamp.strftime("%Y-%m-%d %H:%M:%S"), t.type.value, t.amount, account.currency, t.description])
-#
-#     output.seek(0)
-#     return Response(output, mimetype="text/csv", headers={"Content-Disposition":f"attachment;filename=statement_account_{account.id}.csv"})
+                           statement=statement,
+                           archived_statements=archived,
+                           generation_time=now)
+
+
+@bp.route('/account/<int:account_id>/statement/<period>.<fmt>')
+@login_required
+def archived_statement(account_id, period, fmt):
+    """A closed month's statement (period is YYYY-MM), generated once and then served as a file."""
+    account = _statement_account(account_id)
+    if not account:
+        flash('You are not authorized to view statements for this account.', 'danger')
+        return redirect(url_for('banking.dashboard'))
+    try:
+        year, month = statement_service.parse_period(period)
+    except ValueError:
+        abort(404)
+
+    statement_row = statement_service.get_month_statement(account, year, month)
+    if not statement_row or fmt not in statement_row.format_list:
+        abort(404)
+    path = statement_service.artifact_path(statement_row, fmt)
+    if not os.path.exists(path):
+        abort(404)
+
+    response = send_file(path, as_attachment=fmt != 'html',
+                         download_name=f'statement_account_{account.id}_{period}.{fmt}', max_age=31536000)
+    # Archived statements never change once written.
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
@@ -1,9 +1,10 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import current_user, login_required
 from app import db
 from app.models import User, UserRole, Ticket, TicketStatus, Account, Transaction, TransactionType
 from app.forms import IssueTicketForm, ContestTicketForm # ResolveTicketForm will be on admin side
 from app.decorators import officer_required, admin_required # officer_required for issuing
+from app.services import posting_service, plate_search_service, user_search_service
 from datetime import datetime, timedelta
 from decimal import Decimal
 
@@ -17,7 +18,7 @@ def issue_ticket():
     form = IssueTicketForm()
     if form.validate_on_submit():
         # Find the user to ticket
-        user_to_ticket = User.query.filter(User.username.ilike(form.user_search.data)).first()
+        user_to_ticket = user_search_service.find_by_username(form.user_search.data)
         if not user_to_ticket:
             flash(f"User '{form.user_search.data}' not found.", 'danger')
             return render_template('dot/issue_ticket.html', title='Issue New Ticket', form=form)
@@ -109,7 +110,8 @@ def my_tickets():
 @bp.route('/ticket/<int:ticket_id>/pay', methods=['POST'])
 @login_required
 def pay_ticket(ticket_id):
-    ticket = Ticket.query.get_or_404(ticket_id)
+    # Locked until the payment commits, so a double submit can't pass the status check twice.
+    ticket = Ticket.query.filter_by(id=ticket_id).with_for_update().populate_existing().first_or_404()
     if ticket.issued_to_user_id != current_user.id:
         flash('You are not authorized to pay this ticket.', 'danger')
         return redirect(url_for('dot.my_tickets'))
@@ -128,27 +130,17 @@ def pay_ticket(ticket_id):
         return redirect(url_for('dot.view_ticket_detail', ticket_id=ticket.id))
 
     try:
-        payment_transaction = Transaction(
-            account_id=user_account.id,
-            type=TransactionType.TICKET_PAYMENT,
-            amount=-ticket.fine_amount, # Negative for deduction
-            description=f"Payment for Ticket #{ticket.id}"
-        )
-        db.session.add(payment_transaction)
-
-        user_account.balance -= ticket.fine_amount
-        db.session.add(user_account)
+        posting = posting_service.post_entries([posting_service.Entry(
+            user_account.id, -ticket.fine_amount, TransactionType.TICKET_PAYMENT, f"Payment for Ticket #{ticket.id}"
+        )], commit=False)
 
         ticket.status = TicketStatus.PAID
-        ticket.banking_transaction_id = payment_transaction.id # Link after flush/commit
-        db.session.add(ticket)
-
-        # Need to flush to get payment_transaction.id before assigning to ticket if not deferred
-        db.session.flush()
-        ticket.banking_transaction_id = payment_transaction.id
-
+        ticket.banking_transaction_id = posting.transactions[0].id
         db.session.commit()
         flash(f'Ticket #{ticket.id} paid successfully. {ticket.fine_amount} {user_account.currency} deducted from your account.', 'success')
+    except posting_service.InsufficientFunds:
+        db.session.rollback()
+        flash(f'Insufficient funds. You need {ticket.fine_amount} {user_account.currency}.', 'danger')
     except Exception as e:
         db.session.rollback()
         flash(f'Error processing payment for ticket #{ticket.id}: {str(e)}', 'danger')
@@ -271,7 +263,8 @@ def view_permit_application_detail(application_id):
 @bp.route('/permits/application/<int:application_id>/pay', methods=['POST'])
 @login_required
 def pay_for_permit(application_id):
-    application = PermitApplication.query.get_or_404(application_id)
+    # Locked until the payment commits, so a double submit can't pass the status check twice.
+    application = PermitApplication.query.filter_by(id=application_id).with_for_update().populate_existing().first_or_404()
 
     # Authorization check
     if application.user_id != current_user.id:
@@ -308,31 +301,24 @@ def pay_for_permit(application_id):
         return redirect(url_for('dot.view_permit_application_detail', application_id=application.id))
 
     try:
-        # Create transaction record
-        payment_transaction = Transaction(
-            account_id=user_account.id,
-            type=TransactionType.PERMIT_FEE_PAYMENT,
-            amount=-application.permit_fee,  # negative to deduct
-            description=f"Payment for Permit Application #{application.id}"
-        )
-        db.session.add(payment_transaction)
-
-        # Deduct fee from account balance
-        user_account.balance -= application.permit_fee
-        db.session.add(user_account)
+        # Deduct the fee and record the transaction atomically
+        posting = posting_service.post_entries([posting_service.Entry(
+            user_account.id, -application.permit_fee, TransactionType.PERMIT_FEE_PAYMENT,
+            f"Payment for Permit Application #{application.id}"
+        )], commit=False)
 
         # Update application status & link transaction
         application.status = PermitApplicationStatus.PAID_AWAITING_ISSUANCE
-        db.session.flush()  # assign ID to payment_transaction
-        application.banking_transaction_id = payment_transaction.id
-        db.session.add(application)
-
+        application.banking_transaction_id = posting.transactions[0].id
         db.session.commit()
         flash(
             f'Permit fee of {application.permit_fee} {user_account.currency} paid successfully '
             f'for Application #{application.id}. Awaiting final issuance.',
             'success'
         )
+    except posting_service.InsufficientFunds:
+        db.session.rollback()
+        flash(f'Insufficient funds. You need {application.permit_fee} {user_account.currency}.', 'danger')
     except Exception as e:
         db.session.rollback()
         flash(f'Error processing payment: {str(e)}', 'danger')
@@ -517,7 +503,7 @@ def record_inspection():
     if form.validate_on_submit():
         inspected_user = None
         if form.inspected_user_search.data:
-            inspected_user = User.query.filter(User.username.ilike(form.inspected_user_search.data)).first()
+            inspected_user = user_search_service.find_by_username(form.inspected_user_search.data)
             if not inspected_user:
                 flash(f"Inspected user '{form.inspected_user_search.data}' not found. Proceeding without linking user.", 'warning')
             # Consider if officer should be blocked if user not found, or if non-registered users can be inspected.
@@ -617,6 +603,17 @@ def list_permit_applications_for_review():
                            PermitApplicationStatus=PermitApplicationStatus)
 
 
+@bp.route('/plates/search')
+@login_required
+@officer_required
+def plate_search():
+    query = request.args.get('q', '').strip()
+    results = plate_search_service.search_plates(query) if query else []
+    if request.args.get('format') == 'json':
+        return jsonify([dict(row, region_format=row['region_format'].name) for row in results])
+    return render_template('dot/plate_search.html', title='Plate Lookup', query=query, results=results)
+
+
 @bp.route('/dashboard')
 @login_required
 @officer_required
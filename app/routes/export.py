@@ -1,62 +1,42 @@
-
-from flask import Blueprint, make_response
+from flask import Blueprint, Response, request, stream_with_context
 from flask_login import login_required, current_user
 from app.decorators import admin_required
-from app.models import User, Transaction
-import csv
-from io import StringIO
+from app.services import export_service
 
 export_bp = Blueprint('export', __name__)
 
+
+def _csv_response(header, rows, filename):
+    """Streams the CSV, gzip-compressed when the request has ?gzip=1."""
+    chunks = export_service.iter_csv(header, rows)
+    if request.args.get('gzip') in ('1', 'true'):
+        chunks = export_service.gzip_chunks(chunks)
+        mimetype, filename = 'application/gzip', filename + '.gz'
+    else:
+        mimetype = 'text/csv'
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
 @export_bp.route('/transactions/csv')
 @login_required
 def export_transactions_csv():
-    """Export user's transactions to CSV"""
+    """Export user's transactions to CSV, optionally limited with ?start=YYYY-MM-DD&end=YYYY-MM-DD"""
     account = current_user.accounts.first()
     if not account:
         return "No account found", 404
-    
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Date', 'Type', 'Amount', 'Description'])
-    
-    # Write transactions
-    for transaction in account.transactions.order_by(Transaction.timestamp.desc()):
-        writer.writerow([
-            transaction.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            transaction.type.value,
-            float(transaction.amount),
-            transaction.description or ''
-        ])
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = 'attachment; filename=transactions.csv'
-    
-    return response
+
+    try:
+        start_at, end_before = export_service.parse_date_range(request.args.get('start'), request.args.get('end'))
+    except ValueError:
+        return "Dates must be in YYYY-MM-DD format", 400
+
+    rows = export_service.transaction_rows(account.id, start_at, end_before)
+    return _csv_response(['Date', 'Type', 'Amount', 'Description'], rows, 'transactions.csv')
 
 @export_bp.route('/admin/users/csv')
 @admin_required
 def export_users_csv():
     """Export all users to CSV (admin only)"""
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    writer.writerow(['ID', 'Username', 'Email', 'Role', 'Region'])
-    
-    for user in User.query.all():
-        writer.writerow([
-            user.id,
-            user.username,
-            user.email,
-            user.role.value,
-            user.region or 'OTHER_DEFAULT'
-        ])
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = 'attachment; filename=users.csv'
-    
-    return response
+    return _csv_response(['ID', 'Username', 'Email', 'Role', 'Region'], export_service.user_rows(), 'users.csv')
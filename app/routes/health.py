@@ -1,26 +1,20 @@
-
 from flask import Blueprint, jsonify
-from app import db
-from app.models import User
+from app.services import health_service
+from datetime import datetime
 
 health_bp = Blueprint('health', __name__)
 
+@health_bp.route('/health/live')
+def liveness():
+    """Liveness probe: the worker is up and serving requests. Never touches the database."""
+    return jsonify({
+        'status': 'alive',
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
+@health_bp.route('/health/ready')
 @health_bp.route('/health')
-def health_check():
-    """System health check endpoint"""
-    try:
-        # Test database connection
-        user_count = User.query.count()
-        
-        return jsonify({
-            'status': 'healthy',
-            'database': 'connected',
-            'user_count': user_count,
-            'timestamp': datetime.utcnow().isoformat()
-        })
-    except Exception as e:
-        return jsonify({
-            'status': 'unhealthy',
-            'error': str(e),
-            'timestamp': datetime.utcnow().isoformat()
-        }), 500
+def readiness():
+    """Readiness probe: database reachable, scheduler heartbeat and livemap freshness."""
+    payload, http_status = health_service.get_readiness()
+    return jsonify(payload), http_status
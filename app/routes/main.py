@@ -1,7 +1,7 @@
-from flask import Blueprint, render_template, url_for, redirect, flash, request
+from flask import Blueprint, render_template, url_for, redirect, flash, request, jsonify
 from flask_login import current_user, login_required
 from datetime import datetime
-import mistune
+from functools import lru_cache
 
 from app import db
 from app.decorators import admin_required, officer_required
@@ -14,9 +14,10 @@ from app.models import (
 )
 from app.forms import (
     ParcelForm, InsuranceClaimForm, ContractForm, CompanyNameForm, CompanyVehicleForm, CompanyContractForm, CompanyInsuranceClaimForm,
+    FleetImportForm,
     # ClockInForm, ClockOutForm
 )
-from app.services import vehicle_service
+from app.services import vehicle_service, stats_service, dashboard_service, posting_service, fleet_import_service, user_search_service
 
 main_bp = Blueprint('main', __name__)
 
@@ -55,16 +56,17 @@ def site_home():
                 'content': 'Check out the new items available in the marketplace. There are some great deals to be had!'
             },
         ]
+    site_stats = stats_service.get_site_stats()
     stats = {
-        'active_players': User.query.count(),
-        'open_tickets': Ticket.query.filter_by(status='OUTSTANDING').count(),
-        'pending_permits': PermitApplication.query.filter_by(status='PENDING_REVIEW').count(),
+        'active_players': site_stats['total_users'],
+        'open_tickets': site_stats['open_tickets'],
+        'pending_permits': site_stats['pending_permits'],
     }
     insurance_rates = InsuranceRate.query.filter(InsuranceRate.rate_type == InsuranceRateType.FARM).order_by(InsuranceRate.rate_type).all()
     dynamic_rates = []
     
+    claims_count = site_stats['insurance_claims']
     for rate in insurance_rates:
-        claims_count = InsuranceClaim.query.count()
         base_rate = float(rate.rate)
         rate_multiplier = 1 + (claims_count / 20.0) * 0.1
         new_rate = base_rate * rate_multiplier
@@ -97,15 +99,8 @@ def site_home():
                 flash('Insurance claim submitted successfully!', 'success')
                 return redirect(url_for('main.site_home'))
 
-            farmer_data = {
-                'parcels': Parcel.query.filter_by(farmer_id=farmer.id).all(),
-                'silo_contents': SiloStorage.query.filter_by(farmer_id=farmer.id).order_by(SiloStorage.crop_type).all(),
-                'insurance_claims': InsuranceClaim.query.filter_by(farmer_id=farmer.id).order_by(InsuranceClaim.claim_date.desc()).all(),
-                'insurance_form': insurance_form,
-                'bank_accounts': Account.query.filter_by(user_id=current_user.id, is_company=False).all(),
-                'vehicles': current_user.vehicles.all(),
-                'tickets': current_user.tickets_received.all()
-            }
+            farmer_data = dict(dashboard_service.get_farmer_dashboard(current_user.id, farmer.id),
+                               insurance_form=insurance_form)
         elif hasattr(current_user, 'company') and current_user.company:
             company = current_user.company
             vehicle_form = CompanyVehicleForm()
@@ -152,17 +147,10 @@ def site_home():
                 flash('Company insurance claim submitted successfully!', 'success')
                 return redirect(url_for('main.site_home'))
 
-            company_data = {
-                'company': company,
-                'vehicles': CompanyVehicle.query.filter_by(company_id=company.id).all(),
-                'contracts': CompanyContract.query.filter_by(company_id=company.id).all(),
-                'insurance_claims': CompanyInsuranceClaim.query.filter_by(company_id=company.id).all(),
-                'vehicle_form': vehicle_form,
-                'contract_form': contract_form,
-                'insurance_form': insurance_form,
-                'bank_accounts': Account.query.filter_by(user_id=current_user.id, is_company=True).all(),
-                'tickets': current_user.tickets_received.all()
-            }
+            company_data = dict(dashboard_service.get_company_dashboard(current_user.id, company.id),
+                                vehicle_form=vehicle_form,
+                                contract_form=contract_form,
+                                insurance_form=insurance_form)
 
     return render_template('main/index.html', title='Home',
                            recent_listings=recent_listings,
@@ -175,8 +163,11 @@ def site_home():
                            company_data=company_data)
 
 
-# Create markdown parser once (reuse)
-markdown_parser = mistune.create_markdown(escape=False)
+# Create markdown parser once (reuse); mistune is only imported when the rules are first shown
+@lru_cache(maxsize=None)
+def markdown_parser():
+    import mistune
+    return mistune.create_markdown(escape=False)
 
 # ------------------------ RULES ------------------------
 
@@ -186,7 +177,7 @@ def view_rules():
     fines = Fine.query.order_by(Fine.name.asc()).all()
 
     if rules_entry and rules_entry.content_markdown:
-        rules_content_html = markdown_parser(rules_entry.content_markdown)
+        rules_content_html = markdown_parser()(rules_entry.content_markdown)
     else:
         rules_content_html = "<p>The rules have not been set yet. Please check back later.</p>"
         if current_user.is_authenticated and current_user.role == UserRole.ADMIN:
@@ -220,19 +211,7 @@ def mods():
 @main_bp.route('/admin-dashboard')
 @admin_required
 def admin_dashboard():
-    revenue_query = db.session.query(db.func.sum(Transaction.amount)).filter(
-        Transaction.type.in_([
-            TransactionType.TICKET_PAYMENT,
-            TransactionType.PERMIT_FEE_PAYMENT,
-            TransactionType.PERMIT_FEE
-        ])
-    ).scalar()
-    stats = {
-        'total_users': User.query.count(),
-        'pending_permits': PermitApplication.query.filter_by(status='PENDING_REVIEW').count(),
-        'open_tickets': Ticket.query.filter_by(status='OUTSTANDING').count(),
-        'revenue': revenue_query or 0.0
-          }
+    stats = stats_service.get_site_stats()
     return render_template('admin/dashboard.html', title='Admin Dashboard', stats=stats)
 
 
@@ -266,6 +245,31 @@ def company():
     return render_template('main/company.html', title='Company', form=form, vehicles=vehicles)
 
 
+@main_bp.route('/company/fleet/import', methods=['GET', 'POST'])
+@login_required
+def import_fleet():
+    company = Company.query.filter_by(user_id=current_user.id).first()
+    if not company:
+        flash('You need a company before importing a fleet.', 'warning')
+        return redirect(url_for('main.company'))
+
+    form = FleetImportForm()
+    result = None
+    if form.validate_on_submit():
+        try:
+            result = fleet_import_service.import_fleet(
+                company.id, form.xml_file.data.stream, VehicleRegion[form.region_format.data], form.farm_id.data
+            )
+            flash(f'Imported {result.created} vehicles into {company.name}.', 'success' if result.created else 'info')
+        except fleet_import_service.FleetImportError as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
+
+    return render_template('vehicles/fleet_import.html', title='Import Fleet', form=form, result=result,
+                           status_counts=fleet_import_service.status_counts(result.rows) if result else {},
+                           action=url_for('main.import_fleet'))
+
+
 # ------------------------ CONTRACTS ------------------------
 
 @main_bp.route('/contracts')
@@ -326,7 +330,8 @@ def create_contract():
 @main_bp.route('/contract/<int:contract_id>/complete', methods=['POST'])
 @login_required
 def complete_contract(contract_id):
-    contract = Contract.query.get_or_404(contract_id)
+    # Locked until the reward commits, so a double submit can't pass the status check twice.
+    contract = Contract.query.filter_by(id=contract_id).with_for_update().populate_existing().first_or_404()
     if contract.claimant_id != current_user.id:
         flash('You are not authorized to complete this contract.', 'danger')
         return redirect(url_for('main.contracts'))
@@ -340,14 +345,10 @@ def complete_contract(contract_id):
         flash('You do not have a bank account to receive the reward.', 'danger')
         return redirect(url_for('main.contracts'))
 
-    claimant_account.balance += contract.reward
-    transaction = Transaction(
-        account_id=claimant_account.id,
-        type=TransactionType.OTHER,
-        amount=contract.reward,
-        description=f"Reward for completing contract #{contract.id}: {contract.title}"
-    )
-    db.session.add(transaction)
+    posting_service.post_entries([posting_service.Entry(
+        claimant_account.id, contract.reward, TransactionType.OTHER,
+        f"Reward for completing contract #{contract.id}: {contract.title}"
+    )], commit=False)
 
     contract.status = ContractStatus.COMPLETED
     db.session.commit()
@@ -363,3 +364,16 @@ def complete_contract(contract_id):
 def users():
     all_users = User.query.all()
     return render_template('main/users.html', title='Users', users=all_users)
+
+
+@main_bp.route('/users/search')
+@login_required
+@officer_required
+def search_users():
+    # Typeahead for the user pickers on officer and admin forms (static/js/user_lookup.js).
+    results = user_search_service.search_users(
+        request.args.get('q', ''),
+        limit=request.args.get('limit', user_search_service.DEFAULT_LIMIT, type=int),
+        farmers_only=request.args.get('farmers') == '1'
+    )
+    return jsonify({'results': results})
@@ -6,6 +6,7 @@ from app.models import (
     MarketplaceListingStatus, Account
 )
 from app.forms import CreateListingForm, EditListingForm
+from app.services import marketplace_search_service, user_search_service
 from app.services.discord_webhook_service import (
     post_store_sale_to_discord, post_product_update_to_discord
 )
@@ -26,20 +27,32 @@ def can_update_listing_status(user, listing):
 
 @bp.route('/')
 def index():
-    """Public view of available marketplace listings."""
-    page = request.args.get('page', 1, type=int)
-
-    listings_pagination = MarketplaceListing.query \
-        .filter(MarketplaceListing.status.in_([
-            MarketplaceListingStatus.AVAILABLE,
-        ])) \
-        .order_by(MarketplaceListing.creation_date.desc()) \
-        .paginate(page=page, per_page=12)
+    """Public view of available marketplace listings, with full-text search and filters."""
+    filters = {
+        'text': request.args.get('q', '').strip(),
+        'min_price': request.args.get('min_price', type=float),
+        'max_price': request.args.get('max_price', type=float),
+        'unit': request.args.get('unit', '').strip(),
+    }
+    seller = request.args.get('seller', '').strip()
+
+    page = {'listings': [], 'next_cursor': None}
+    seller_user = user_search_service.find_by_username(seller) if seller else None
+    if not seller or seller_user:
+        page = marketplace_search_service.search_listings(
+            seller_user_id=seller_user.id if seller_user else None,
+            after=request.args.get('after'),
+            **filters
+        )
 
+    # Query string for the next-page link and for reading the active filters in the template.
+    search_args = {key: value for key, value in request.args.items() if key != 'after' and value}
     return render_template(
         'marketplace/index.html',
         title='Marketplace',
-        listings_pagination=listings_pagination,
+        listings=page['listings'],
+        next_cursor=page['next_cursor'],
+        search_args=search_args,
         MarketplaceListingStatus=MarketplaceListingStatus
     )
 
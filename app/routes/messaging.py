@@ -3,7 +3,7 @@ from flask_login import current_user, login_required
 from app import db
 from app.models import User, UserRole, Conversation, Message, ConversationStatus, NotificationType
 from app.forms import StartConversationForm, SendMessageForm
-from app.services import messaging_service, notification_service
+from app.services import messaging_service, notification_service, user_search_service
 from flask_login import login_required
 from app.decorators import admin_required
 
@@ -105,7 +105,7 @@ def admin_start_conversation(target_user_id=None):
         # If target_user was pre-filled by URL, use that. Otherwise, search.
         if not target_user:
             searched_username = form.user_search.data
-            target_user = User.query.filter(User.username.ilike(searched_username)).first()
+            target_user = user_search_service.find_by_username(searched_username)
 
         if not target_user:
             flash(f"User '{form.user_search.data if not target_user_id else searched_username}' not found.", 'danger')
@@ -0,0 +1,18 @@
+import hmac
+from flask import Blueprint, Response, abort, current_app, request
+from prometheus_client import CONTENT_TYPE_LATEST
+from app import csrf
+from app.metrics import generate_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics')
+@csrf.exempt
+def metrics():
+    """Prometheus scrape endpoint"""
+    token = current_app.config.get('METRICS_AUTH_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(supplied, token):
+            abort(403)
+    return Response(generate_metrics(), mimetype=CONTENT_TYPE_LATEST)
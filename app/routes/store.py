@@ -1,12 +1,25 @@
-from flask import Blueprint, render_template, redirect, url_for, flash
-from app.models import StoreItem
+from flask import Blueprint, render_template, redirect, url_for, flash, request
+from app.services import store_service
 
 store_bp = Blueprint('store', __name__)
 
 @store_bp.route('/store')
 def view_store():
-    items = StoreItem.query.order_by(StoreItem.brand, StoreItem.name).all()
-    return render_template('store/index.html', title='Store', items=items)
+    sort = request.args.get('sort', store_service.DEFAULT_SORT)
+    items_pagination = store_service.browse_store(
+        text=request.args.get('q', ''),
+        brand=request.args.get('brand') or None,
+        category=request.args.get('category') or None,
+        min_price=request.args.get('min_price', type=float),
+        max_price=request.args.get('max_price', type=float),
+        sort=sort,
+        page=request.args.get('page', 1, type=int)
+    )
+    # Active filters, carried over by the facet, sort and page links.
+    search_args = {key: value for key, value in request.args.items() if key != 'page' and value}
+    return render_template('store/index.html', title='Store', items_pagination=items_pagination,
+                           facets=store_service.get_facets(), search_args=search_args,
+                           sort=sort if sort in store_service.SORT_ORDERS else store_service.DEFAULT_SORT)
 
 @store_bp.route('/store/purchase/<int:item_id>', methods=['POST'])
 def purchase_item(item_id):
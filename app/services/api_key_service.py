@@ -0,0 +1,110 @@
+from app import db
+from app.models import ApiKey
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+
+KEY_PREFIX = 'fs25'
+
+# Scopes a key can carry; each FS25 endpoint requires exactly one of them.
+SCOPE_SYNC = 'sync'
+SCOPE_STORE_INVENTORY = 'store:inventory'
+SCOPE_STORE_PURCHASE = 'store:purchase'
+ALL_SCOPES = (SCOPE_SYNC, SCOPE_STORE_INVENTORY, SCOPE_STORE_PURCHASE)
+
+# Per-worker LRU of verified keys: prefix -> (expires_at, sha256 of the full key, key id, scopes).
+# A hit costs one fast digest compare instead of a DB lookup plus a deliberately slow password hash.
+# Entries expire after API_KEY_CACHE_SECONDS so revocations reach every worker.
+_verified_keys = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _digest(raw_key):
+    return hashlib.sha256(raw_key.encode()).hexdigest()
+
+
+def _split_key(raw_key):
+    parts = (raw_key or '').split('_')
+    if len(parts) != 3 or parts[0] != KEY_PREFIX or not parts[1] or not parts[2]:
+        return None
+    return parts[1]
+
+
+def generate_api_key(name, scopes):
+    """
+    Creates a new key and returns (api_key, raw_key). The raw key is only available here;
+    the database stores its prefix and a salted hash.
+    """
+    unknown = set(scopes) - set(ALL_SCOPES)
+    if unknown:
+        raise ValueError(f"Unknown API key scopes: {', '.join(sorted(unknown))}")
+
+    prefix = secrets.token_hex(4)
+    raw_key = f"{KEY_PREFIX}_{prefix}_{secrets.token_urlsafe(32).replace('_', '-')}"
+    api_key = ApiKey(
+        name=name,
+        prefix=prefix,
+        key_hash=generate_password_hash(raw_key),
+        scopes=','.join(scopes)
+    )
+    db.session.add(api_key)
+    db.session.commit()
+    return api_key, raw_key
+
+
+def revoke_api_key(prefix):
+    api_key = ApiKey.query.filter_by(prefix=prefix).first()
+    if not api_key:
+        return None
+    api_key.is_active = False
+    api_key.revoked_at = datetime.utcnow()
+    db.session.commit()
+    forget_cached_key(prefix)
+    return api_key
+
+
+def forget_cached_key(prefix):
+    with _cache_lock:
+        _verified_keys.pop(prefix, None)
+
+
+def clear_key_cache():
+    with _cache_lock:
+        _verified_keys.clear()
+
+
+def verify_api_key(raw_key):
+    """Returns (key_id, scopes) for a valid, active key, otherwise None."""
+    prefix = _split_key(raw_key)
+    if not prefix:
+        return None
+
+    digest = _digest(raw_key)
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _verified_keys.get(prefix)
+        if entry and entry[0] > now:
+            _verified_keys.move_to_end(prefix)
+            if hmac.compare_digest(entry[1], digest):
+                return entry[2], entry[3]
+            return None
+
+    api_key = ApiKey.query.filter_by(prefix=prefix, is_active=True).first()
+    if not api_key or not check_password_hash(api_key.key_hash, raw_key):
+        return None
+
+    scopes = frozenset(api_key.scope_list)
+    ttl = current_app.config.get('API_KEY_CACHE_SECONDS', 300)
+    max_entries = current_app.config.get('API_KEY_CACHE_SIZE', 256)
+    with _cache_lock:
+        _verified_keys[prefix] = (now + ttl, digest, api_key.id, scopes)
+        _verified_keys.move_to_end(prefix)
+        while len(_verified_keys) > max_entries:
+            _verified_keys.popitem(last=False)
+    return api_key.id, scopes
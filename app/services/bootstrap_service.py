@@ -0,0 +1,97 @@
+from app import db
+from app.models import Fine, InsuranceRate, InsuranceRateType, User, UserRole
+from collections import namedtuple
+from decimal import Decimal
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from werkzeug.security import generate_password_hash
+
+# Schema produced by the old boot-time db.create_all() before this database was migrated.
+BASELINE_REVISION = '402f6320fd0c'
+
+DEFAULT_ADMIN_USERNAME = 'admin'
+DEFAULT_ADMIN_EMAIL = 'admin@example.com'
+
+DEFAULT_FINES = [
+    {'name': 'Speeding (1-15 mph over)', 'description': 'Exceeding the speed limit by 1-15 mph.', 'amount': Decimal('75.00')},
+    {'name': 'Speeding (16-30 mph over)', 'description': 'Exceeding the speed limit by 16-30 mph.', 'amount': Decimal('150.00')},
+    {'name': 'Speeding (31+ mph over)', 'description': 'Exceeding the speed limit by 31 or more mph.', 'amount': Decimal('300.00')},
+    {'name': 'Illegal Parking', 'description': 'Parking in a restricted area.', 'amount': Decimal('50.00')},
+    {'name': 'Running a Red Light', 'description': 'Failing to stop at a red light.', 'amount': Decimal('100.00')},
+    {'name': 'Reckless Driving', 'description': 'Driving with willful or wanton disregard for the safety of persons or property.', 'amount': Decimal('500.00')},
+    {'name': 'Expired Vehicle Registration', 'description': 'Operating a vehicle with an expired registration.', 'amount': Decimal('60.00')},
+    {'name': 'No Proof of Insurance', 'description': 'Operating a vehicle without proof of insurance.', 'amount': Decimal('200.00')},
+]
+
+DEFAULT_INSURANCE_RATES = [
+    {'rate_type': InsuranceRateType.FARM, 'name': 'Farm Liability', 'rate': Decimal('500.00'), 'description': 'General liability coverage for farm operations.'},
+    {'rate_type': InsuranceRateType.CROP, 'name': 'Crop Hail', 'rate': Decimal('100.00'), 'description': 'Coverage for hail damage to crops.'},
+    {'rate_type': InsuranceRateType.ANIMAL, 'name': 'Livestock', 'rate': Decimal('50.00'), 'description': 'Coverage for livestock mortality.'},
+]
+
+# How many default rows each run added; rows that already existed are not counted.
+SeedResult = namedtuple('SeedResult', ['fines', 'insurance_rates', 'admin_created'])
+
+
+def prepare_schema():
+    """
+    Brings the schema up to date and returns how:
+    - 'upgraded': the database is under alembic, and pending migrations are applied.
+    - 'baselined': the app's tables were built by the old boot-time db.create_all() and never
+      migrated. They are stamped at BASELINE_REVISION, then every later migration is applied.
+    - 'created': the database is empty. Every table, index and sequence comes from the models
+      (the migrations only alter tables, they never create the base ones), and it is stamped
+      at the latest revision.
+    Tables that only exist as models are created last in the first two cases.
+    """
+    from flask_migrate import stamp, upgrade
+
+    inspector = inspect(db.engine)
+    if inspector.has_table('alembic_version'):
+        how = 'upgraded'
+    elif set(inspector.get_table_names()) & set(db.metadata.tables):
+        stamp(revision=BASELINE_REVISION)
+        how = 'baselined'
+    else:
+        db.create_all()
+        stamp()
+        return 'created'
+    upgrade()
+    db.create_all()
+    return how
+
+
+def _insert_missing(model, rows):
+    """Bulk insert that skips rows clashing with an existing unique key; returns how many were inserted."""
+    table = model.__table__
+    dialect = db.engine.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = (postgresql if dialect == 'postgresql' else sqlite).insert(table) \
+            .on_conflict_do_nothing() \
+            .returning(table.c.id)
+        # Only rows actually inserted come back, so this counts them exactly.
+        return len(db.session.execute(insert, rows).all())
+    db.session.execute(db.insert(table), rows)
+    return len(rows)
+
+
+def seed_defaults(admin_password):
+    """
+    Adds the default fines, insurance rates and admin user in one transaction. Every insert
+    is ON CONFLICT DO NOTHING, so existing rows are left untouched and running it again, or
+    from two deploys at once, adds nothing. Returns a SeedResult.
+    """
+    try:
+        fines = _insert_missing(Fine, DEFAULT_FINES)
+        insurance_rates = _insert_missing(InsuranceRate, DEFAULT_INSURANCE_RATES)
+        admin_created = _insert_missing(User, [{
+            'username': DEFAULT_ADMIN_USERNAME,
+            'email': DEFAULT_ADMIN_EMAIL,
+            'password_hash': generate_password_hash(admin_password),
+            'role': UserRole.ADMIN,
+        }]) == 1
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return SeedResult(fines, insurance_rates, admin_created)
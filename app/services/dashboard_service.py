@@ -0,0 +1,286 @@
+from app import db
+from app.cache_versions import get_version_store
+from app.models import (
+    Account, Parcel, SiloStorage, InsuranceClaim, UserVehicle, Ticket, Company, CompanyVehicle,
+    CompanyContract, CompanyInsuranceClaim, Farmer, TicketStatus, InsuranceClaimStatus, ContractStatus,
+    INSURANCE_CLAIM_REASONS
+)
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from collections import namedtuple
+import threading
+import time
+
+# Per-worker cache of dashboard snapshots: user_id -> (expires_at, owner_keys, versions, data).
+# Snapshots hold plain column rows rather than ORM instances so they can outlive the request session.
+# `versions` are the shared version tokens of the owner keys when the snapshot was taken; a
+# write in any worker replaces the tokens, so every other worker's copy stops matching.
+_dashboard_cache = {}
+_cache_lock = threading.Lock()
+MAX_CACHED_DASHBOARDS = 1000
+
+# Which owner column ties a changed row back to a cached dashboard.
+_OWNER_COLUMNS = {
+    Parcel: ('farmer', 'farmer_id'),
+    SiloStorage: ('farmer', 'farmer_id'),
+    InsuranceClaim: ('farmer', 'farmer_id'),
+    Account: ('user', 'user_id'),
+    UserVehicle: ('user', 'user_id'),
+    Ticket: ('user', 'issued_to_user_id'),
+    Farmer: ('user', 'user_id'),
+    Company: ('user', 'user_id'),
+    CompanyVehicle: ('company', 'company_id'),
+    CompanyContract: ('company', 'company_id'),
+    CompanyInsuranceClaim: ('company', 'company_id'),
+}
+
+
+# Typed column slots of the single UNION ALL query a dashboard snapshot is read with. Every
+# section selects into these slots (a typed NULL where it has nothing) and is rebuilt from them
+# in Python. Enum columns are selected as their names, since each enum is its own type on PostgreSQL.
+_SNAPSHOT_SLOTS = {
+    'id': db.Integer, 'text1': db.Text, 'text2': db.Text, 'text3': db.Text, 'text4': db.Text,
+    'amount': db.Numeric(10, 2), 'real1': db.Float, 'real2': db.Float, 'moment': db.DateTime,
+}
+
+# name: the data key; fields: (row attribute, expression, slot[, converter]);
+# order_by/descending: the row attribute the section is sorted on.
+_Section = namedtuple('_Section', ['name', 'fields', 'conditions', 'order_by', 'descending'])
+
+
+def _section(name, fields, *conditions, order_by='id', descending=False):
+    return _Section(name, fields, conditions, order_by, descending)
+
+
+def _load_snapshot(sections, single=()):
+    """Reads every section in one query and returns {name: [rows]} (or a row/None for `single`)."""
+    selects = []
+    for section in sections:
+        by_slot = {field[2]: field[1] for field in section.fields}
+        selects.append(
+            db.select(db.literal(section.name, db.String).label('section'),
+                      *[(db.type_coerce(by_slot[slot], type_) if slot in by_slot else db.cast(db.null(), type_)).label(slot)
+                        for slot, type_ in _SNAPSHOT_SLOTS.items()])
+              .where(*section.conditions)
+        )
+    grouped = {}
+    for row in db.session.execute(db.union_all(*selects)):
+        grouped.setdefault(row.section, []).append(row)
+
+    data = {}
+    for section in sections:
+        row_type = namedtuple(f'{section.name}_row', [field[0] for field in section.fields])
+        rows = [
+            row_type(*[field[3](getattr(row, field[2])) if len(field) > 3 else getattr(row, field[2])
+                       for field in section.fields])
+            for row in grouped.get(section.name, [])
+        ]
+        # Unset values (a claim or ticket without a date) sort below every set one.
+        rows.sort(key=lambda r: (getattr(r, section.order_by) is not None, getattr(r, section.order_by) or 0),
+                  reverse=section.descending)
+        data[section.name] = (rows[0] if rows else None) if section.name in single else rows
+    return data
+
+
+def _ticket_section(user_id):
+    return _section('tickets', [
+        ('id', Ticket.id, 'id'),
+        ('violation_details', Ticket.violation_details, 'text1'),
+        ('fine_amount', Ticket.fine_amount, 'amount'),
+        ('status', db.cast(Ticket.status, db.String), 'text2', TicketStatus.__getitem__),
+        ('issue_date', Ticket.issue_date, 'moment'),
+    ], Ticket.issued_to_user_id == user_id, order_by='issue_date', descending=True)
+
+
+def _account_section(user_id, is_company):
+    return _section('bank_accounts', [
+        ('id', Account.id, 'id'),
+        ('name', Account.name, 'text1'),
+        ('balance', Account.balance, 'amount'),
+        ('currency', Account.currency, 'text2'),
+    ], Account.user_id == user_id, Account.is_company == is_company)
+
+
+def _farmer_snapshot(user_id, farmer_id):
+    claim_reason = db.case(INSURANCE_CLAIM_REASONS, value=InsuranceClaim.reason, else_=InsuranceClaim.reason)
+    return _load_snapshot([
+        _section('parcels', [
+            ('id', Parcel.id, 'id'),
+            ('location', Parcel.location, 'text1'),
+            ('size', Parcel.size, 'real1'),
+        ], Parcel.farmer_id == farmer_id),
+        _section('silo_contents', [
+            ('id', SiloStorage.id, 'id'),
+            ('crop_type', SiloStorage.crop_type, 'text1'),
+            ('quantity', SiloStorage.quantity, 'real1'),
+            ('capacity', SiloStorage.capacity, 'real2'),
+        ], SiloStorage.farmer_id == farmer_id, order_by='crop_type'),
+        _section('insurance_claims', [
+            ('id', InsuranceClaim.id, 'id'),
+            ('reason', InsuranceClaim.reason, 'text1'),
+            ('readable_reason', claim_reason, 'text2'),
+            ('claim_date', InsuranceClaim.claim_date, 'moment'),
+            ('estimated_loss', InsuranceClaim.estimated_loss, 'amount'),
+            ('status', db.cast(InsuranceClaim.status, db.String), 'text3', InsuranceClaimStatus.__getitem__),
+        ], InsuranceClaim.farmer_id == farmer_id, order_by='claim_date', descending=True),
+        _account_section(user_id, False),
+        _section('vehicles', [
+            ('id', UserVehicle.id, 'id'),
+            ('vehicle_make', UserVehicle.vehicle_make, 'text1'),
+            ('vehicle_model', UserVehicle.vehicle_model, 'text2'),
+            ('license_plate', UserVehicle.license_plate, 'text3'),
+        ], UserVehicle.user_id == user_id),
+        _ticket_section(user_id),
+    ])
+
+
+def _company_snapshot(user_id, company_id):
+    return _load_snapshot([
+        _section('company', [
+            ('id', Company.id, 'id'),
+            ('name', Company.name, 'text1'),
+            ('details', Company.details, 'text2'),
+        ], Company.id == company_id),
+        _section('vehicles', [
+            ('id', CompanyVehicle.id, 'id'),
+            ('vehicle_make', CompanyVehicle.vehicle_make, 'text1'),
+            ('vehicle_model', CompanyVehicle.vehicle_model, 'text2'),
+            ('vehicle_type', CompanyVehicle.vehicle_type, 'text3'),
+            ('license_plate', CompanyVehicle.license_plate, 'text4'),
+        ], CompanyVehicle.company_id == company_id),
+        _section('contracts', [
+            ('id', CompanyContract.id, 'id'),
+            ('title', CompanyContract.title, 'text1'),
+            ('reward', CompanyContract.reward, 'amount'),
+            ('status', db.cast(CompanyContract.status, db.String), 'text2', ContractStatus.__getitem__),
+        ], CompanyContract.company_id == company_id),
+        _section('insurance_claims', [
+            ('id', CompanyInsuranceClaim.id, 'id'),
+            ('reason', CompanyInsuranceClaim.reason, 'text1'),
+            ('status', db.cast(CompanyInsuranceClaim.status, db.String), 'text2', InsuranceClaimStatus.__getitem__),
+        ], CompanyInsuranceClaim.company_id == company_id),
+        _account_section(user_id, True),
+        _ticket_section(user_id),
+    ], single=('company',))
+
+
+def _version_names(owner_keys):
+    return [f"dashboard:{kind}:{owner_id}" for kind, owner_id in sorted(owner_keys)]
+
+
+def _shared_versions(owner_keys):
+    """Current version tokens of the owner keys, or None when the shared store can't be read."""
+    try:
+        return get_version_store().versions(_version_names(owner_keys))
+    except Exception as e:
+        current_app.logger.error(f"Dashboard cache version lookup failed: {e}")
+        return None
+
+
+def _cached(user_id, owner_keys, loader):
+    now = time.monotonic()
+    # Read before loading, so a write that lands while the snapshot is built makes it stale.
+    versions = _shared_versions(owner_keys)
+    with _cache_lock:
+        entry = _dashboard_cache.get(user_id)
+        if entry and entry[0] > now and entry[1] == owner_keys and versions is not None and entry[2] == versions:
+            return entry[3]
+
+    data = loader()
+    if versions is None:
+        return data
+    ttl = current_app.config.get('DASHBOARD_CACHE_SECONDS', 30)
+    with _cache_lock:
+        if len(_dashboard_cache) >= MAX_CACHED_DASHBOARDS:
+            for key in [k for k, v in _dashboard_cache.items() if v[0] <= now] or list(_dashboard_cache)[:1]:
+                _dashboard_cache.pop(key, None)
+        _dashboard_cache[user_id] = (now + ttl, owner_keys, versions, data)
+    return data
+
+
+def get_farmer_dashboard(user_id, farmer_id):
+    """
+    Returns the farmer section of the home page (parcels, silo contents, insurance claims,
+    personal accounts, vehicles and tickets), cached briefly per user.
+    """
+    owner_keys = frozenset({('user', user_id), ('farmer', farmer_id)})
+    return _cached(user_id, owner_keys, lambda: _farmer_snapshot(user_id, farmer_id))
+
+
+def get_company_dashboard(user_id, company_id):
+    """
+    Returns the company section of the home page (company details, fleet, contracts,
+    insurance claims, company accounts and tickets), cached briefly per user.
+    """
+    owner_keys = frozenset({('user', user_id), ('company', company_id)})
+    return _cached(user_id, owner_keys, lambda: _company_snapshot(user_id, company_id))
+
+
+def invalidate_dashboards(owner_keys):
+    """
+    Drops every cached dashboard that depends on any of the given (kind, id) owner keys, in
+    this worker directly and in the others through their shared version tokens.
+    """
+    owner_keys = set(owner_keys)
+    if not owner_keys:
+        return
+    with _cache_lock:
+        for user_id in [uid for uid, entry in _dashboard_cache.items() if entry[1] & owner_keys]:
+            del _dashboard_cache[user_id]
+    try:
+        # Tokens outlive any snapshot taken before them, so an expired token can't be mistaken for a current one.
+        ttl = max(current_app.config.get('DASHBOARD_CACHE_SECONDS', 30), 1) * 2
+        get_version_store().bump_versions(_version_names(owner_keys), ttl)
+    except Exception as e:
+        # Other workers serve their copies until DASHBOARD_CACHE_SECONDS runs out.
+        current_app.logger.error(f"Dashboard cache invalidation failed: {e}")
+
+
+def clear_dashboard_cache():
+    with _cache_lock:
+        _dashboard_cache.clear()
+
+
+# --- Invalidation on write ---
+# Any committed change to a row that feeds a dashboard evicts the owning user's snapshot,
+# so API syncs, admin edits, form posts and cron jobs are all covered without touching each
+# writer. create_app registers the listeners for both app variants.
+
+def note_changed_owners(session, owner_keys):
+    """For writes that bypass the ORM (bulk/core UPDATEs): evict these owners' dashboards on commit."""
+    session.info.setdefault('dashboard_owner_keys', set()).update(owner_keys)
+
+
+def _collect_dashboard_changes(session, flush_context):
+    touched = session.info.setdefault('dashboard_owner_keys', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        owner = _OWNER_COLUMNS.get(type(obj))
+        if owner:
+            kind, column = owner
+            owner_id = getattr(obj, column, None)
+            if owner_id is not None:
+                touched.add((kind, owner_id))
+
+
+def _invalidate_after_commit(session):
+    touched = session.info.pop('dashboard_owner_keys', None)
+    if touched:
+        invalidate_dashboards(touched)
+
+
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop('dashboard_owner_keys', None)
+
+
+_SESSION_LISTENERS = (
+    ('after_flush', _collect_dashboard_changes),
+    ('after_commit', _invalidate_after_commit),
+    ('after_soft_rollback', _discard_after_rollback),
+)
+
+
+def register_session_listeners():
+    for name, listener in _SESSION_LISTENERS:
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
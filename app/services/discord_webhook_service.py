@@ -1,19 +1,23 @@
-import requests
 import json
 from flask import current_app
+from app.metrics import record_discord_dispatch
 
 def _post_to_discord(webhook_url, payload):
     """Helper function to post a payload to a given Discord webhook URL."""
     if not webhook_url:
         current_app.logger.warning("Discord webhook URL not provided. Cannot post to Discord.")
+        record_discord_dispatch('not_configured')
         return None
+    import requests # Only requests that actually post to Discord pay for loading it
     try:
         response = requests.post(webhook_url, data=json.dumps(payload), headers={'Content-Type': 'application/json'})
         response.raise_for_status()
         current_app.logger.info(f"Successfully posted to Discord. Status: {response.status_code}")
+        record_discord_dispatch('success')
         return True
     except requests.exceptions.RequestException as e:
         current_app.logger.error(f"Error posting to Discord: {e}")
+        record_discord_dispatch('failure')
         if e.response is not None:
             current_app.logger.error(f"Discord response content: {e.response.text}")
         return None
@@ -0,0 +1,70 @@
+from app import db
+from app.models import User, Transaction
+from datetime import datetime, timedelta
+import csv
+import io
+import zlib
+
+# Rows fetched per round trip. With psycopg2, yield_per uses a server-side cursor, so only
+# this many rows are ever held in memory no matter how large the export is.
+FETCH_BATCH_SIZE = 1000
+# Rows buffered into each chunk sent down the response.
+ROWS_PER_CHUNK = 500
+
+
+def parse_date_range(start, end):
+    """
+    Parses optional YYYY-MM-DD bounds. `end` is inclusive, so it is returned as the start of the
+    following day. Raises ValueError for malformed dates.
+    """
+    start_at = datetime.strptime(start, '%Y-%m-%d') if start else None
+    end_before = datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1) if end else None
+    return start_at, end_before
+
+
+def iter_csv(header, rows):
+    """Yields the CSV as encoded chunks of ROWS_PER_CHUNK rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for index, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if index % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def transaction_rows(account_id, start_at=None, end_before=None):
+    query = db.select(Transaction.timestamp, Transaction.type, Transaction.amount, Transaction.description) \
+              .where(Transaction.account_id == account_id)
+    if start_at:
+        query = query.where(Transaction.timestamp >= start_at)
+    if end_before:
+        query = query.where(Transaction.timestamp < end_before)
+    query = query.order_by(Transaction.timestamp.desc()).execution_options(yield_per=FETCH_BATCH_SIZE)
+
+    for timestamp, type_, amount, description in db.session.execute(query):
+        yield (
+            timestamp.strftime('%Y-%m-%d %H:%M:%S') if timestamp else '',
+            type_.value,
+            float(amount),
+            description or ''
+        )
+
+
+def user_rows():
+    query = db.select(User.id, User.username, User.email, User.role, User.region) \
+              .order_by(User.id).execution_options(yield_per=FETCH_BATCH_SIZE)
+    for user_id, username, email, role, region in db.session.execute(query):
+        yield (user_id, username, email, role.value, region or 'OTHER_DEFAULT')
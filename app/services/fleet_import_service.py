@@ -0,0 +1,221 @@
+from app import db
+from app.models import CompanyVehicle, LicensePlate, StoreItem
+from app.services import dashboard_service, vehicle_service
+from collections import Counter, namedtuple
+from sqlalchemy.dialects import postgresql, sqlite
+import os
+import xml.etree.ElementTree as ET
+
+# Savegame property states that are not the farm's own fleet (borrowed mission vehicles, shop displays).
+SKIPPED_PROPERTY_STATES = {'MISSION', 'NONE'}
+
+# Outcome of an import: number of vehicles created and one report dict per <vehicle> element.
+FleetImportResult = namedtuple('FleetImportResult', ['created', 'rows'])
+
+
+class FleetImportError(ValueError):
+    pass
+
+
+def iter_vehicle_elements(source):
+    """
+    Streams the top-level <vehicle> elements of a vehicles.xml file object as (row, attributes)
+    pairs. Each element is cleared once read, so memory stays flat however large the fleet is.
+    """
+    depth = 0
+    row = 0
+    root = None
+    try:
+        for event, element in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    root = element
+                continue
+            depth -= 1
+            if depth == 1 and element.tag == 'vehicle':
+                row += 1
+                yield row, dict(element.attrib)
+                root.clear()
+    except ET.ParseError as e:
+        raise FleetImportError(f"vehicles.xml is not valid XML: {e}") from e
+
+
+def describe_vehicle(filename, store_items):
+    """(make, model, type) for a vehicle config path, from the store catalogue when the item is listed there."""
+    item = store_items.get(filename)
+    if item:
+        return item.brand, item.name, item.category
+    parts = filename.replace('\\', '/').split('/')
+    if len(parts) >= 4 and parts[0] == 'data' and parts[1] == 'vehicles':
+        # data/vehicles/<brand>/<model>/<config>.xml
+        return parts[2].title(), parts[3], None
+    if parts[0].startswith('$moddir$'):
+        # $moddir$FS25_<modName>/<config>.xml
+        return None, parts[0][len('$moddir$'):].removeprefix('FS25_'), None
+    return None, os.path.splitext(parts[-1])[0], None
+
+
+def status_counts(rows):
+    return dict(Counter(row['status'] for row in rows))
+
+
+def _report(row, attributes, status, message=None, license_plate=None):
+    return {
+        'row': row,
+        'game_vehicle_id': attributes.get('uniqueId'),
+        'filename': attributes.get('filename'),
+        'status': status,
+        'license_plate': license_plate,
+        'message': message,
+    }
+
+
+def _read_fleet(source, farm_companies):
+    """
+    Streams vehicles.xml and sorts its vehicles into reports, pending (report, company id) pairs
+    and a count of vehicles per farmId. `farm_companies` maps a farmId attribute to the company
+    receiving that farm's vehicles; the key None takes vehicles of any farm.
+    """
+    reports = []
+    pending = []
+    farm_counts = Counter()
+    seen = set()
+    for row, attributes in iter_vehicle_elements(source):
+        report = _report(row, attributes, 'created')
+        reports.append(report)
+        filename = attributes.get('filename')
+        game_vehicle_id = report['game_vehicle_id']
+        farm = attributes.get('farmId')
+        company_id = farm_companies.get(farm, farm_companies.get(None))
+        if not filename:
+            report.update(status='error', message='Missing filename attribute.')
+        elif '/objects/' in filename.replace('\\', '/'):
+            report.update(status='skipped', message='Pallet or placeable object, not a vehicle.')
+        elif attributes.get('propertyState') in SKIPPED_PROPERTY_STATES:
+            report.update(status='skipped', message=f"Property state {attributes['propertyState']}.")
+        else:
+            farm_counts[farm] += 1
+            if company_id is None:
+                report.update(status='skipped', message=f"Belongs to farm {farm}.")
+            elif not game_vehicle_id:
+                # Without it a re-import could not tell the vehicle was already registered.
+                report.update(status='skipped', message='Missing uniqueId attribute.')
+            elif len(game_vehicle_id) > 64:
+                report.update(status='error', message='uniqueId is longer than 64 characters.')
+            elif game_vehicle_id in seen:
+                report.update(status='duplicate', message='Listed earlier in this file.')
+            else:
+                seen.add(game_vehicle_id)
+                pending.append((report, company_id))
+    return reports, pending, farm_counts
+
+
+def _insert_ignoring_conflicts(rows):
+    """
+    Bulk insert that leaves alone vehicles a concurrent import registered to the same company
+    since this one checked (uq_company_vehicles_company_game_vehicle). Returns the
+    (company id, game vehicle id) pairs actually inserted.
+    """
+    table = CompanyVehicle.__table__
+    dialect = db.engine.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = (postgresql if dialect == 'postgresql' else sqlite).insert(table) \
+            .on_conflict_do_nothing(index_elements=['company_id', 'game_vehicle_id']) \
+            .returning(table.c.company_id, table.c.game_vehicle_id)
+        return {tuple(row) for row in db.session.execute(insert, rows)}
+    db.session.execute(db.insert(table), rows)
+    return {(row['company_id'], row['game_vehicle_id']) for row in rows}
+
+
+def _register_fleet(pending, region_enum):
+    """Bulk-registers pending (report, company id) pairs not already registered to their company; returns the count."""
+    ids_by_company = {}
+    for report, company_id in pending:
+        ids_by_company.setdefault(company_id, []).append(report['game_vehicle_id'])
+    existing = set()
+    for company_id, ids in ids_by_company.items():
+        for start in range(0, len(ids), 1000):
+            existing.update((company_id, game_vehicle_id) for game_vehicle_id in db.session.execute(
+                db.select(CompanyVehicle.game_vehicle_id).where(
+                    CompanyVehicle.company_id == company_id,
+                    CompanyVehicle.game_vehicle_id.in_(ids[start:start + 1000]))
+            ).scalars())
+    for report, company_id in pending:
+        if (company_id, report['game_vehicle_id']) in existing:
+            report.update(status='duplicate', message='Already registered to this company.')
+    pending = [(report, company_id) for report, company_id in pending if report['status'] == 'created']
+
+    if not pending:
+        return 0
+
+    plates = vehicle_service.allocate_license_plates(region_enum, len(pending))
+    if plates is None:
+        raise FleetImportError(f"Not enough {region_enum.value} license plates left for {len(pending)} vehicles.")
+
+    filenames = list({report['filename'] for report, _ in pending})
+    store_items = {}
+    for start in range(0, len(filenames), 1000):
+        store_items.update((item.xml_filename, item) for item in
+                           StoreItem.query.filter(StoreItem.xml_filename.in_(filenames[start:start + 1000])))
+
+    vehicles = []
+    for (report, company_id), plate in zip(pending, plates):
+        make, model, vehicle_type = describe_vehicle(report['filename'], store_items)
+        report['license_plate'] = plate
+        vehicles.append({
+            'company_id': company_id,
+            'vehicle_make': make and make[:100],
+            'vehicle_model': model and model[:100],
+            'vehicle_type': vehicle_type and vehicle_type[:100],
+            'vehicle_description': f"Imported from vehicles.xml ({report['filename']})"[:255],
+            'license_plate': plate,
+            'region_format': region_enum,
+            'game_vehicle_id': report['game_vehicle_id'],
+        })
+    inserted = _insert_ignoring_conflicts(vehicles)
+    unused_plates = []
+    for report, company_id in pending:
+        if (company_id, report['game_vehicle_id']) not in inserted:
+            unused_plates.append(report['license_plate'])
+            report.update(status='duplicate', message='Registered by another import running at the same time.',
+                          license_plate=None)
+    # Give back the registry rows reserved for vehicles the insert skipped, or they'd hold those plates forever.
+    for start in range(0, len(unused_plates), 1000):
+        db.session.execute(db.delete(LicensePlate).where(LicensePlate.plate.in_(unused_plates[start:start + 1000])))
+    # The bulk insert bypasses the ORM flush that normally evicts the companies' dashboards.
+    dashboard_service.note_changed_owners(db.session, {('company', company_id) for _, company_id in pending})
+    return len(inserted)
+
+
+def import_fleet(company_id, source, region_enum, farm_id=None, commit=True):
+    """
+    Registers every vehicle of a savegame's vehicles.xml to a company in one pass: the file is
+    streamed, plates for all new vehicles are allocated as one batch and the CompanyVehicle rows
+    are written with a single bulk insert. Vehicles already imported for this company (matched on
+    the savegame's uniqueId, also when a concurrent import registers them first) and repeats
+    within the file are reported as duplicates, and vehicles without a uniqueId are skipped; with
+    farm_id only that farm's vehicles are taken. Nothing is written if the file cannot be parsed.
+    Returns a FleetImportResult.
+    """
+    farm_companies = {str(farm_id) if farm_id is not None else None: company_id}
+    reports, pending, _ = _read_fleet(source, farm_companies)
+    created = _register_fleet(pending, region_enum)
+    if created and commit:
+        db.session.commit()
+    return FleetImportResult(created, reports)
+
+
+def import_farm_fleets(source, region_enum, farm_companies, commit=True):
+    """
+    import_fleet for a whole server: one pass over vehicles.xml registers each farm's vehicles
+    to the company mapped to its farmId in `farm_companies` ({farm id: company id}). Returns the
+    FleetImportResult and the number of vehicles each farm has in the savegame ({farm id: count}),
+    whether or not it has a company.
+    """
+    reports, pending, farm_counts = _read_fleet(source, {str(farm): company for farm, company in farm_companies.items()})
+    created = _register_fleet(pending, region_enum)
+    if created and commit:
+        db.session.commit()
+    return FleetImportResult(created, reports), {int(farm): count for farm, count in farm_counts.items()
+                                                  if farm and farm.isdigit()}
@@ -0,0 +1,106 @@
+from app import db
+from app.models import JobHeartbeat
+from app.services import livemap_service
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, text
+import threading
+import time
+
+# Per-worker cache of the last readiness result: (expires_at, payload, http_status).
+# Probe storms within READINESS_CACHE_SECONDS are answered from here without touching the database.
+_readiness_cache = None
+_readiness_lock = threading.Lock()
+
+
+def record_job_heartbeat(job_name, rows=0):
+    """Marks a scheduled job as having just completed successfully."""
+    heartbeat = JobHeartbeat.query.get(job_name)
+    if not heartbeat:
+        heartbeat = JobHeartbeat(job_name=job_name)
+        db.session.add(heartbeat)
+    heartbeat.last_success_at = datetime.utcnow()
+    heartbeat.last_rows = rows or 0
+    db.session.commit()
+
+
+def _check_database(conn, timeout_ms):
+    start = time.perf_counter()
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+    conn.execute(text('SELECT 1'))
+    return {'status': 'ok', 'latency_ms': round((time.perf_counter() - start) * 1000.0, 2)}
+
+
+def _check_scheduler(conn, max_age_seconds):
+    rows = conn.execute(select(JobHeartbeat.job_name, JobHeartbeat.last_success_at)).all()
+    if not rows:
+        return {'status': 'unknown', 'jobs': {}}
+    now = datetime.utcnow()
+    jobs = {name: round((now - last_success).total_seconds()) for name, last_success in rows}
+    newest_age = min(jobs.values())
+    return {
+        'status': 'ok' if newest_age <= max_age_seconds else 'stale',
+        'last_success_age_seconds': newest_age,
+        'jobs': jobs,
+    }
+
+
+def _check_livemap(max_age_seconds):
+    age = livemap_service.get_status_cache_age()
+    if age is None:
+        return {'status': 'unknown'}
+    return {'status': 'ok' if age <= max_age_seconds else 'stale', 'age_seconds': round(age)}
+
+
+def _run_readiness_checks():
+    config = current_app.config
+    checks = {}
+    try:
+        with db.engine.connect() as conn:
+            checks['database'] = _check_database(conn, config.get('READINESS_DB_TIMEOUT_MS', 1000))
+    except Exception as e:
+        current_app.logger.error(f"Readiness database check failed: {e}")
+        checks['database'] = {'status': 'error', 'error': str(e)}
+    # Checked on its own connection: a failing heartbeat query says nothing about whether
+    # the database can serve requests.
+    if checks['database']['status'] == 'ok':
+        try:
+            with db.engine.connect() as conn:
+                checks['scheduler'] = _check_scheduler(conn, config.get('SCHEDULER_HEARTBEAT_MAX_AGE_SECONDS', 900))
+        except Exception as e:
+            current_app.logger.error(f"Readiness scheduler check failed: {e}")
+            checks['scheduler'] = {'status': 'error', 'error': str(e)}
+    else:
+        checks['scheduler'] = {'status': 'unknown'}
+    checks['livemap'] = _check_livemap(config.get('LIVEMAP_MAX_STALENESS_SECONDS', 300))
+
+    # Only the database takes the instance out of rotation; a stale or failing cron job check
+    # or a stale game server is reported as degraded so it shows up in monitoring without
+    # failing every web worker.
+    if checks['database']['status'] != 'ok':
+        status, http_status = 'unhealthy', 503
+    elif any(check['status'] in ('stale', 'error') for check in checks.values()):
+        status, http_status = 'degraded', 200
+    else:
+        status, http_status = 'healthy', 200
+
+    payload = {'status': status, 'checks': checks, 'timestamp': datetime.utcnow().isoformat()}
+    return payload, http_status
+
+
+def get_readiness():
+    """
+    Returns (payload, http_status) for the readiness probe: a pooled SELECT 1 with a
+    statement timeout, the scheduler heartbeat and livemap freshness. Cached briefly per worker.
+    """
+    global _readiness_cache
+    now = time.monotonic()
+    with _readiness_lock:
+        if _readiness_cache and _readiness_cache[0] > now:
+            return _readiness_cache[1], _readiness_cache[2]
+
+    payload, http_status = _run_readiness_checks()
+    with _readiness_lock:
+        _readiness_cache = (now + current_app.config.get('READINESS_CACHE_SECONDS', 2), payload, http_status)
+    return payload, http_status
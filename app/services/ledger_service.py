@@ -0,0 +1,111 @@
+from app import db
+from app.models import Account, Transaction
+from app.services import reconciliation_service
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+PAGE_SIZE = 50
+
+
+def encode_cursor(transaction):
+    return f"{transaction.timestamp.isoformat()}_{transaction.id}"
+
+
+def decode_cursor(value):
+    """Parses a "<iso timestamp>_<id>" cursor; returns None if it is missing or malformed."""
+    if not value:
+        return None
+    timestamp, _, transaction_id = value.rpartition('_')
+    try:
+        return datetime.fromisoformat(timestamp), int(transaction_id)
+    except ValueError:
+        return None
+
+
+def _filter_conditions(account_id=None, tx_type=None, start_at=None, end_before=None, transaction_id=None):
+    conditions = []
+    if transaction_id:
+        conditions.append(Transaction.id == transaction_id)
+    if account_id:
+        conditions.append(Transaction.account_id == account_id)
+    if tx_type:
+        conditions.append(Transaction.type == tx_type)
+    if start_at:
+        conditions.append(Transaction.timestamp >= start_at)
+    if end_before:
+        conditions.append(Transaction.timestamp < end_before)
+    return conditions
+
+
+def _running_balances(account_id, transactions):
+    """
+    {transaction id: the account's ledger balance after it} for one page of its transactions.
+    The window starts at the nearest balance snapshot before the page's oldest row, so only the
+    transactions since that snapshot are summed, not the account's whole history.
+    """
+    if not transactions:
+        return {}
+    oldest = min(transactions, key=lambda t: (t.timestamp, t.id))
+    newest = max(transactions, key=lambda t: (t.timestamp, t.id))
+    conditions = [Transaction.account_id == account_id,
+                  db.tuple_(Transaction.timestamp, Transaction.id) <= (newest.timestamp, newest.id)]
+    base = Decimal('0.00')
+    snapshot = reconciliation_service.nearest_snapshot(account_id, oldest.timestamp)
+    if snapshot:
+        conditions.append(Transaction.timestamp >= snapshot.as_of)
+        base = Decimal(snapshot.ledger_balance)
+
+    running = db.select(
+        Transaction.id.label('id'),
+        func.sum(Transaction.amount).over(order_by=(Transaction.timestamp, Transaction.id)).label('running_total')
+    ).where(*conditions).subquery()
+    rows = db.session.execute(db.select(running.c.id, running.c.running_total)
+                                .where(running.c.id.in_([t.id for t in transactions])))
+    return {transaction_id: base + Decimal(total) for transaction_id, total in rows}
+
+
+def get_ledger_page(account_id=None, tx_type=None, start_at=None, end_before=None, transaction_id=None,
+                    before=None, after=None, limit=PAGE_SIZE):
+    """
+    Returns one page of the ledger, newest first, using keyset pagination on (timestamp, id) so
+    every page costs the same regardless of depth. `before` pages towards older rows and `after`
+    towards newer ones; both take cursors from encode_cursor.
+
+    When filtered to a single account, each row also carries the account's ledger balance after
+    it (over all its transactions, whatever the other filters), see _running_balances.
+    """
+    conditions = _filter_conditions(account_id, tx_type, start_at, end_before, transaction_id)
+    order_key = db.tuple_(Transaction.timestamp, Transaction.id)
+
+    query = db.select(Transaction).where(*conditions).options(joinedload(Transaction.account).joinedload(Account.user))
+
+    after_cursor = decode_cursor(after)
+    before_cursor = decode_cursor(before)
+    if after_cursor:
+        query = query.where(order_key > after_cursor).order_by(Transaction.timestamp.asc(), Transaction.id.asc())
+    else:
+        if before_cursor:
+            query = query.where(order_key < before_cursor)
+        query = query.order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+
+    rows = db.session.execute(query.limit(limit + 1)).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after_cursor:
+        rows.reverse()
+
+    balances = _running_balances(account_id, rows) if account_id else {}
+    entries = [
+        {'transaction': transaction, 'running_total': balances.get(transaction.id)}
+        for transaction in rows
+    ]
+    first, last = (rows[0], rows[-1]) if rows else (None, None)
+    return {
+        'entries': entries,
+        'show_running_total': bool(account_id),
+        # Older rows exist past this page when paging backwards found more, or when we came from an older page.
+        'older_cursor': encode_cursor(last) if last and (has_more or after_cursor) else None,
+        'newer_cursor': encode_cursor(first) if first and (before_cursor or (after_cursor and has_more)) else None,
+    }
@@ -1,34 +1,42 @@
 import xml.etree.ElementTree as ET
 from flask import current_app
-import paramiko # For SCP
 import os
 import tempfile # For handling SSH keys from env vars if needed
+import threading
+import time
+from app.metrics import track_livemap_fetch
 
 # --- File Fetching ---
+def connect_ssh(remote_host, remote_port, remote_user, remote_password, ssh_key_path):
+    """Opens an SSH connection to the game server; the caller closes it."""
+    import paramiko # For SCP; imported here so only SCP fetches pay for loading it
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy()) # Auto-accept host key (consider security implications)
+
+    pkey = None
+    if ssh_key_path:
+        # If ssh_key_path is actually the key content (e.g., from env var)
+        if "-----BEGIN" in ssh_key_path:
+            with tempfile.NamedTemporaryFile(delete=False) as tmp_key_file:
+                tmp_key_file.write(ssh_key_path.encode())
+                ssh_key_filepath_on_disk = tmp_key_file.name
+            try:
+                pkey = paramiko.RSAKey.from_private_key_file(ssh_key_filepath_on_disk)
+            finally:
+                os.remove(ssh_key_filepath_on_disk)
+        else: # Assume it's a path to a key file
+             pkey = paramiko.RSAKey.from_private_key_file(ssh_key_path)
+
+    ssh.connect(remote_host, port=remote_port, username=remote_user, password=remote_password, pkey=pkey, timeout=10)
+    return ssh
+
 def _fetch_xml_content_scp(remote_host, remote_port, remote_user, remote_password, ssh_key_path, remote_filepath):
     """Fetches XML file content from a remote server using SCP."""
     ssh = None
     sftp = None
     try:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy()) # Auto-accept host key (consider security implications)
-
-        pkey = None
-        if ssh_key_path:
-            # If ssh_key_path is actually the key content (e.g., from env var)
-            if "-----BEGIN" in ssh_key_path:
-                with tempfile.NamedTemporaryFile(delete=False) as tmp_key_file:
-                    tmp_key_file.write(ssh_key_path.encode())
-                    ssh_key_filepath_on_disk = tmp_key_file.name
-                try:
-                    pkey = paramiko.RSAKey.from_private_key_file(ssh_key_filepath_on_disk)
-                finally:
-                    os.remove(ssh_key_filepath_on_disk)
-            else: # Assume it's a path to a key file
-                 pkey = paramiko.RSAKey.from_private_key_file(ssh_key_path)
-
         current_app.logger.info(f"Attempting SCP connection to {remote_user}@{remote_host}:{remote_port} for {remote_filepath}")
-        ssh.connect(remote_host, port=remote_port, username=remote_user, password=remote_password, pkey=pkey, timeout=10)
+        ssh = connect_ssh(remote_host, remote_port, remote_user, remote_password, ssh_key_path)
 
         sftp = ssh.open_sftp()
         with sftp.open(remote_filepath, 'r') as f:
@@ -100,8 +108,39 @@ def parse_server_status(xml_string):
         return {'error': f"General error parsing XML: {e}"}
 
 
-# --- Main Service Function ---
+# --- Cached Status ---
+# Per-worker cache of the last parsed status so page views don't open an SSH session each time.
+_status_cache = {'data': None, 'expires_at': 0.0, 'fetched_at': None}
+_status_lock = threading.Lock()
+
+
 def get_live_server_status():
+    """
+    Returns the current server status, re-fetching the livemap XML at most once per
+    LIVEMAP_CACHE_SECONDS. Failed fetches are not cached.
+    """
+    now = time.monotonic()
+    with _status_lock:
+        if _status_cache['data'] is not None and _status_cache['expires_at'] > now:
+            return _status_cache['data']
+
+    status = fetch_live_server_status()
+    if status and not status.get('error'):
+        with _status_lock:
+            _status_cache['data'] = status
+            _status_cache['expires_at'] = now + current_app.config.get('LIVEMAP_CACHE_SECONDS', 15)
+            _status_cache['fetched_at'] = time.time()
+    return status
+
+
+def get_status_cache_age():
+    """Seconds since this worker last fetched livemap data successfully, or None if it never has."""
+    fetched_at = _status_cache['fetched_at']
+    return None if fetched_at is None else time.time() - fetched_at
+
+
+# --- Main Service Function ---
+def fetch_live_server_status():
     """
     Fetches and parses the livemap_dynamic.xml to get current server status.
     Uses configuration to determine how to fetch the XML file.
@@ -111,21 +150,25 @@ def get_live_server_status():
 
     if access_method == 'SCP':
         dynamic_xml_path = current_app.config.get('LIVEMAP_REMOTE_PATH_DYNAMIC')
-        xml_content = _fetch_xml_content_scp(
-            remote_host=current_app.config.get('LIVEMAP_REMOTE_HOST'),
-            remote_port=current_app.config.get('LIVEMAP_REMOTE_PORT'),
-            remote_user=current_app.config.get('LIVEMAP_REMOTE_USER'),
-            remote_password=current_app.config.get('LIVEMAP_REMOTE_PASSWORD'),
-            ssh_key_path=current_app.config.get('LIVEMAP_SSH_KEY_PATH'),
-            remote_filepath=dynamic_xml_path
-        )
+        with track_livemap_fetch('scp') as fetch:
+            xml_content = _fetch_xml_content_scp(
+                remote_host=current_app.config.get('LIVEMAP_REMOTE_HOST'),
+                remote_port=current_app.config.get('LIVEMAP_REMOTE_PORT'),
+                remote_user=current_app.config.get('LIVEMAP_REMOTE_USER'),
+                remote_password=current_app.config.get('LIVEMAP_REMOTE_PASSWORD'),
+                ssh_key_path=current_app.config.get('LIVEMAP_SSH_KEY_PATH'),
+                remote_filepath=dynamic_xml_path
+            )
+            fetch.ok = bool(xml_content)
     elif access_method == 'FTP':
         # TODO: Implement _fetch_xml_content_ftp using ftplib
         current_app.logger.warning("FTP access method for Livemap not yet implemented.")
         return {'error': "FTP access for Livemap is not implemented."}
     elif access_method == 'LOCAL_PATH':
         dynamic_xml_path = current_app.config.get('LIVEMAP_LOCAL_PATH_DYNAMIC')
-        xml_content = _fetch_xml_content_local(dynamic_xml_path)
+        with track_livemap_fetch('local_path') as fetch:
+            xml_content = _fetch_xml_content_local(dynamic_xml_path)
+            fetch.ok = bool(xml_content)
     else:
         current_app.logger.error(f"Invalid LIVEMAP_XML_ACCESS_METHOD: {access_method}")
         return {'error': f"Invalid Livemap XML access method configured: {access_method}"}
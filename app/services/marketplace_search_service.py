@@ -0,0 +1,104 @@
+from app import db
+from app.models import MarketplaceListing, MarketplaceListingStatus, LISTING_FTS_TABLE
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+import re
+
+PAGE_SIZE = 12
+
+# Title words count ten times as much as description words in the SQLite ranking, in line
+# with the A/B weights of the PostgreSQL search vector.
+FTS_COLUMN_WEIGHTS = (10.0, 1.0)
+_FTS_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def encode_cursor(sort_value, listing_id):
+    value = sort_value.isoformat() if isinstance(sort_value, datetime) else repr(float(sort_value))
+    return f"{value}_{listing_id}"
+
+
+def decode_cursor(value, ranked):
+    """Parses a "<rank or iso timestamp>_<id>" cursor; returns None if it is missing or malformed."""
+    if not value:
+        return None
+    sort_value, _, listing_id = value.rpartition('_')
+    try:
+        return (float(sort_value) if ranked else datetime.fromisoformat(sort_value)), int(listing_id)
+    except ValueError:
+        return None
+
+
+def _fts_query(text):
+    # Quote every word so FTS5 operators and punctuation in the search box are taken literally;
+    # the words are ANDed, like websearch_to_tsquery does without quotes or "or".
+    return ' '.join(f'"{token}"' for token in _FTS_TOKEN.findall(text))
+
+
+def _ranked_matches(text):
+    """(listing id, rank) rows for listings matching the text; higher ranks are better matches."""
+    if db.engine.dialect.name == 'postgresql':
+        search_vector = db.column('search_vector')
+        tsquery = func.websearch_to_tsquery('english', text)
+        return db.select(MarketplaceListing.id.label('id'), func.ts_rank_cd(search_vector, tsquery).label('rank')) \
+                 .where(search_vector.op('@@')(tsquery))
+
+    fts_query = _fts_query(text)
+    if not fts_query:
+        return None
+    fts = db.table(LISTING_FTS_TABLE, db.column('rowid'))
+    fts_table = db.literal_column(LISTING_FTS_TABLE)
+    # bm25() is lower for better matches and may only be used in a query against the FTS table.
+    return db.select(fts.c.rowid.label('id'), (-func.bm25(fts_table, *FTS_COLUMN_WEIGHTS)).label('rank')) \
+             .where(fts_table.op('MATCH')(fts_query))
+
+
+def search_listings(text=None, min_price=None, max_price=None, unit=None, seller_user_id=None,
+                    after=None, limit=PAGE_SIZE):
+    """
+    One page of available listings. With search text, listings matching it are ranked by
+    relevance across item name and description (full-text, stemmed); otherwise newest first.
+    Filters narrow by price range, unit (case-insensitive) and seller. Pages are keyset
+    paginated on (rank or creation date, id), so deep pages cost the same as the first; pass
+    the returned next_cursor as `after` for the following page.
+
+    Returns a dict with the page's listings and the cursor of the next page, or None on the last.
+    """
+    text = (text or '').strip()
+    conditions = [MarketplaceListing.status == MarketplaceListingStatus.AVAILABLE]
+    if min_price is not None:
+        conditions.append(MarketplaceListing.price >= min_price)
+    if max_price is not None:
+        conditions.append(MarketplaceListing.price <= max_price)
+    if unit:
+        conditions.append(func.lower(MarketplaceListing.unit) == unit.strip().lower())
+    if seller_user_id:
+        conditions.append(MarketplaceListing.seller_user_id == seller_user_id)
+
+    cursor = decode_cursor(after, ranked=bool(text))
+    if text:
+        matches = _ranked_matches(text)
+        if matches is None:
+            return {'listings': [], 'next_cursor': None}
+        matches = matches.subquery()
+        sort_key = matches.c.rank
+        query = db.select(MarketplaceListing, matches.c.rank).join(matches, matches.c.id == MarketplaceListing.id)
+    else:
+        sort_key = MarketplaceListing.creation_date
+        query = db.select(MarketplaceListing, MarketplaceListing.creation_date)
+
+    query = query.where(*conditions)
+    if cursor:
+        query = query.where(db.tuple_(sort_key, MarketplaceListing.id) < cursor)
+    query = query.order_by(sort_key.desc(), MarketplaceListing.id.desc()) \
+                 .options(joinedload(MarketplaceListing.seller)) \
+                 .limit(limit + 1)
+
+    rows = db.session.execute(query).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'listings': [row[0] for row in rows],
+        'next_cursor': encode_cursor(rows[-1][1], rows[-1][0].id) if has_more else None,
+    }
+
@@ -0,0 +1,132 @@
+from app import db
+from app.models import Parcel
+from app.services import dashboard_service
+from collections import namedtuple
+from sqlalchemy.dialects import postgresql, sqlite
+import math
+import xml.etree.ElementTree as ET
+
+# Farmlands written per round trip; also bounds how many parsed entries are held at once.
+BATCH_SIZE = 1000
+# Problems listed back to the admin; the rest are only counted.
+MAX_REPORTED_ERRORS = 50
+MAX_LOCATION_LENGTH = 256
+
+# Outcome of an import. `skipped` counts unchanged parcels, repeats and invalid entries;
+# `errors` describes the first MAX_REPORTED_ERRORS invalid ones.
+ParcelImportResult = namedtuple('ParcelImportResult', ['inserted', 'updated', 'skipped', 'errors'])
+
+
+class ParcelImportError(ValueError):
+    pass
+
+
+def iter_farmland_elements(source):
+    """
+    Streams the <farmland> elements of a farmland.xml file object, wherever they are nested,
+    as (row, attributes) pairs. Each element is detached from its parent once read, so memory
+    stays flat however many farmlands the map has.
+    """
+    open_elements = []
+    row = 0
+    try:
+        for event, element in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                open_elements.append(element)
+                continue
+            open_elements.pop()
+            if element.tag == 'farmland':
+                row += 1
+                yield row, dict(element.attrib)
+                element.clear()
+                if open_elements:
+                    open_elements[-1].remove(element)
+    except ET.ParseError as e:
+        raise ParcelImportError(f"farmland.xml is not valid XML: {e}") from e
+
+
+def validate_farmland(attributes):
+    """(location, size) for a farmland entry, or raises ParcelImportError describing what is wrong."""
+    location = (attributes.get('id') or '').strip()
+    if not location:
+        raise ParcelImportError('Missing id attribute.')
+    if len(location) > MAX_LOCATION_LENGTH:
+        raise ParcelImportError(f'id is longer than {MAX_LOCATION_LENGTH} characters.')
+    try:
+        size = float(attributes.get('area', ''))
+    except ValueError:
+        raise ParcelImportError(f"area {attributes.get('area')!r} is not a number.") from None
+    if not math.isfinite(size) or size <= 0:
+        raise ParcelImportError(f'area {size} is not a positive size.')
+    return location, size
+
+
+def _insert_ignoring_conflicts(rows):
+    """Bulk insert that leaves alone parcels another import created since this batch was read."""
+    dialect = db.engine.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = (postgresql if dialect == 'postgresql' else sqlite).insert(Parcel.__table__) \
+            .on_conflict_do_nothing(index_elements=['farmer_id', 'location']) \
+            .returning(Parcel.__table__.c.id)
+        # Only rows actually inserted come back, so this counts them exactly.
+        return len(db.session.execute(insert, rows).all())
+    db.session.execute(db.insert(Parcel), rows)
+    return len(rows)
+
+
+def upsert_parcels(farmer_id, batch):
+    """Upserts a farmer's parcels from {location: size} (at most BATCH_SIZE); returns (inserted, updated, unchanged)."""
+    existing = {row.location: row for row in db.session.execute(
+        db.select(Parcel.location, Parcel.id, Parcel.size).where(Parcel.farmer_id == farmer_id, Parcel.location.in_(batch))
+    )}
+    new_rows = [{'farmer_id': farmer_id, 'location': location, 'size': size, 'validated': False}
+                for location, size in batch.items() if location not in existing]
+    changed = [{'id': existing[location].id, 'size': size}
+               for location, size in batch.items() if location in existing and existing[location].size != size]
+
+    inserted = _insert_ignoring_conflicts(new_rows) if new_rows else 0
+    if changed:
+        db.session.execute(db.update(Parcel), changed)
+    return inserted, len(changed), len(batch) - inserted - len(changed)
+
+
+def import_farmland(farmer_id, source, commit=True):
+    """
+    Creates or resizes a farmer's parcels from a farmland.xml file in one streaming pass. Each
+    farmland is keyed on (farmer, farmland id): new ids are bulk inserted, parcels whose area
+    changed are updated in bulk and unchanged ones are left alone, so importing the same file
+    twice changes nothing. Entries with a missing id, a non-positive area or an id repeated in
+    the file are skipped. Nothing is committed if the file cannot be parsed.
+    Returns a ParcelImportResult.
+    """
+    inserted = updated = skipped = 0
+    errors = []
+    seen = set()
+    batch = {}
+    for row, attributes in iter_farmland_elements(source):
+        try:
+            location, size = validate_farmland(attributes)
+        except ParcelImportError as e:
+            skipped += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"Farmland {row}: {e}")
+            continue
+        if location in seen:
+            skipped += 1
+            continue
+        seen.add(location)
+        batch[location] = size
+        if len(batch) >= BATCH_SIZE:
+            counts = upsert_parcels(farmer_id, batch)
+            inserted, updated, skipped = inserted + counts[0], updated + counts[1], skipped + counts[2]
+            batch = {}
+    if batch:
+        counts = upsert_parcels(farmer_id, batch)
+        inserted, updated, skipped = inserted + counts[0], updated + counts[1], skipped + counts[2]
+
+    if inserted or updated:
+        # The bulk statements bypass the ORM flush that normally evicts the farmer's dashboard.
+        dashboard_service.note_changed_owners(db.session, {('farmer', farmer_id)})
+    if commit:
+        db.session.commit()
+    return ParcelImportResult(inserted, updated, skipped, errors)
@@ -0,0 +1,89 @@
+from app import db
+from app.models import User, UserVehicle, Company, CompanyVehicle, plate_search_key
+from sqlalchemy import and_, case, literal, or_, union_all
+import re
+import string
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MIN_FUZZY_LENGTH = 3    # shorter keys match almost anything
+_KEY_ALPHABET = string.ascii_uppercase + string.digits
+
+# Rank of a hit: the typed plate exactly, a plate starting with it, or a near miss.
+EXACT, PREFIX, FUZZY = 0, 1, 2
+
+
+def normalize_plate(text):
+    """Python side of models.plate_search_key: upper case, letters and digits only."""
+    return re.sub(r'[^A-Z0-9]', '', (text or '').upper())
+
+
+def one_edit_neighbours(key):
+    """Every key one substitution, insertion, deletion or adjacent swap away from `key`."""
+    neighbours = set()
+    for i in range(len(key) + 1):
+        for c in _KEY_ALPHABET:
+            neighbours.add(key[:i] + c + key[i:])
+            if i < len(key):
+                neighbours.add(key[:i] + c + key[i + 1:])
+        if i < len(key):
+            neighbours.add(key[:i] + key[i + 1:])
+        if i < len(key) - 1:
+            neighbours.add(key[:i] + key[i + 1] + key[i] + key[i + 2:])
+    neighbours.discard(key)
+    return sorted(neighbours)
+
+
+def _match(plate_column, key):
+    """(where clause, rank, score) for one vehicle table, all built on the indexed plate key."""
+    plate_key = plate_search_key(plate_column)
+    postgres = db.engine.dialect.name == 'postgresql'
+    if postgres:
+        # LIKE 'KEY%' is served by the text_pattern_ops btree, the % operator by the trigram index.
+        prefix = plate_key.like(f"{key}%")
+        fuzzy = plate_key.op('%')(key)
+        score = db.func.similarity(plate_key, key)
+    else:
+        # Elsewhere a range scan on the btree covers prefixes, and near misses are the
+        # one-edit neighbours of the key, each an exact probe into the same index.
+        prefix = and_(plate_key >= key, plate_key < key[:-1] + chr(ord(key[-1]) + 1))
+        fuzzy = plate_key.in_(one_edit_neighbours(key))
+        score = literal(0.0)
+    where = or_(prefix, fuzzy) if len(key) >= MIN_FUZZY_LENGTH else prefix
+    rank = case((plate_key == key, EXACT), (prefix, PREFIX), else_=FUZZY)
+    return where, rank, score
+
+
+def search_plates(text, limit=DEFAULT_LIMIT):
+    """
+    Finds user and company vehicles by a full, partial or misread plate. Case, dashes and spaces
+    are ignored. Results come from one UNION ALL query that joins each vehicle to its owner,
+    exact matches first, then plates starting with the text, then near misses (trigram
+    similarity on PostgreSQL, one edit away elsewhere). Returns a list of row mappings.
+    """
+    key = normalize_plate(text)
+    if not key:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    where, rank, score = _match(UserVehicle.license_plate, key)
+    user_vehicles = db.select(
+        literal('user').label('kind'), UserVehicle.id.label('vehicle_id'), UserVehicle.license_plate,
+        UserVehicle.vehicle_make, UserVehicle.vehicle_model, UserVehicle.vehicle_type, UserVehicle.region_format,
+        UserVehicle.is_active, User.id.label('owner_user_id'), User.username.label('owner_username'),
+        literal(None, db.String).label('company_name'), rank.label('rank'), score.label('score')
+    ).join(User, User.id == UserVehicle.user_id).where(where)
+
+    where, rank, score = _match(CompanyVehicle.license_plate, key)
+    company_vehicles = db.select(
+        literal('company').label('kind'), CompanyVehicle.id.label('vehicle_id'), CompanyVehicle.license_plate,
+        CompanyVehicle.vehicle_make, CompanyVehicle.vehicle_model, CompanyVehicle.vehicle_type,
+        CompanyVehicle.region_format, CompanyVehicle.is_active, User.id.label('owner_user_id'),
+        User.username.label('owner_username'), Company.name.label('company_name'), rank.label('rank'),
+        score.label('score')
+    ).join(Company, Company.id == CompanyVehicle.company_id).join(User, User.id == Company.user_id).where(where)
+
+    hits = union_all(user_vehicles, company_vehicles).subquery()
+    query = db.select(hits).order_by(hits.c.rank, hits.c.score.desc(), hits.c.is_active.desc(), hits.c.license_plate) \
+                           .limit(limit)
+    return db.session.execute(query).mappings().all()
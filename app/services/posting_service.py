@@ -0,0 +1,143 @@
+from app import db
+from app.models import Account, Transaction
+from app.services import dashboard_service
+from collections import namedtuple
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import update
+
+# One line of a posting: a signed amount applied to an account and recorded as a Transaction.
+Entry = namedtuple('Entry', ['account_id', 'amount', 'type', 'description'])
+
+# Outcome of a posting: account_id -> balance after the posting, and the Transaction rows written.
+PostingResult = namedtuple('PostingResult', ['balances', 'transactions'])
+
+
+class PostingError(ValueError):
+    pass
+
+
+class AccountNotFound(PostingError):
+    pass
+
+
+class InsufficientFunds(PostingError):
+    def __init__(self, account_id, amount):
+        super().__init__(f"Account {account_id} has insufficient funds for {amount}")
+        self.account_id = account_id
+        self.amount = amount
+
+
+def _to_decimal(amount):
+    return amount if isinstance(amount, Decimal) else Decimal(str(amount)).quantize(Decimal('0.01'))
+
+
+def _apply_delta(account_id, delta, allow_overdraft):
+    """
+    Adds `delta` to the balance in a single UPDATE ... RETURNING. The UPDATE takes the row lock
+    itself and the overdraft check is part of its WHERE clause, so there is no read-modify-write
+    window for a concurrent posting to slip into.
+    """
+    statement = update(Account).where(Account.id == account_id).values(balance=Account.balance + delta)
+    if delta < 0 and not allow_overdraft:
+        statement = statement.where(Account.balance + delta >= 0)
+    row = db.session.execute(
+        statement.returning(Account.balance, Account.user_id).execution_options(synchronize_session='fetch')
+    ).first()
+    if row is None:
+        if db.session.get(Account, account_id) is None:
+            raise AccountNotFound(f"Account {account_id} does not exist")
+        raise InsufficientFunds(account_id, -delta)
+    return row
+
+
+def post_entries(entries, require_balanced=False, allow_overdraft=False, commit=True):
+    """
+    Applies a set of entries atomically and returns a PostingResult.
+
+    Accounts are updated in ascending id order, so two postings touching the same accounts always
+    lock them in the same order and cannot deadlock. Every entry becomes a Transaction row.
+    With require_balanced=True the entries must net to zero (a transfer between accounts); fees,
+    fines and rewards move money in or out of the game economy and are posted unbalanced.
+    Raises InsufficientFunds / AccountNotFound (after rolling back when commit=True).
+    """
+    entries = [entry._replace(amount=_to_decimal(entry.amount)) for entry in entries]
+    if not entries:
+        raise PostingError("A posting needs at least one entry")
+    if require_balanced and sum(entry.amount for entry in entries) != 0:
+        raise PostingError("Entries do not balance")
+
+    deltas = {}
+    for entry in entries:
+        deltas[entry.account_id] = deltas.get(entry.account_id, Decimal('0.00')) + entry.amount
+
+    balances, changed_users = {}, set()
+    try:
+        for account_id in sorted(deltas):
+            balance, user_id = _apply_delta(account_id, deltas[account_id], allow_overdraft)
+            balances[account_id] = balance
+            changed_users.add(user_id)
+
+        transactions = [
+            Transaction(account_id=entry.account_id, amount=entry.amount, type=entry.type, description=entry.description)
+            for entry in entries
+        ]
+        db.session.add_all(transactions)
+        db.session.flush()
+    except PostingError:
+        if commit:
+            db.session.rollback()
+        raise
+
+    # Core UPDATEs bypass the ORM flush, so tell the dashboard cache which users changed.
+    dashboard_service.note_changed_owners(db.session, [('user', user_id) for user_id in changed_users])
+    if commit:
+        db.session.commit()
+    return PostingResult(balances, transactions)
+
+
+def set_balance(account_id, new_balance, type, description, commit=True):
+    """
+    Moves an account to an absolute balance (e.g. a sync from the game server), recording the
+    difference as a transaction. The row is locked with SELECT ... FOR UPDATE while the change is
+    worked out, so concurrent syncs are applied one after another instead of overwriting each other.
+    """
+    new_balance = _to_decimal(new_balance)
+    current = db.session.execute(
+        db.select(Account.balance).where(Account.id == account_id).with_for_update()
+    ).scalar()
+    if current is None:
+        if commit:
+            db.session.rollback()
+        raise AccountNotFound(f"Account {account_id} does not exist")
+    return post_entries([Entry(account_id, new_balance - current, type, description)],
+                        allow_overdraft=True, commit=commit)
+
+
+def post_batch(postings, on_posted=None, chunk_size=500):
+    """
+    Batch API for jobs. `postings` yields (key, entries) pairs; each one is applied in its own
+    savepoint so a failure (e.g. insufficient funds, or any error raised by `on_posted` or the
+    database) skips that posting without undoing the rest; unexpected errors are also logged.
+    `on_posted(key, result)` runs inside the same savepoint, for writing related rows.
+    Commits every `chunk_size` postings to keep lock hold times short.
+    Returns {'posted': count, 'failed': [(key, error message), ...]}.
+    """
+    posted, failed = 0, []
+    for index, (key, entries) in enumerate(postings, 1):
+        try:
+            with db.session.begin_nested():
+                result = post_entries(entries, commit=False)
+                if on_posted:
+                    on_posted(key, result)
+            posted += 1
+        except PostingError as e:
+            failed.append((key, str(e)))
+        except Exception as e:
+            # The savepoint has already been rolled back; one bad posting must not stop the batch.
+            current_app.logger.error(f"Posting {key!r} failed: {e}", exc_info=True)
+            failed.append((key, str(e)))
+        if index % chunk_size == 0:
+            db.session.commit()
+    db.session.commit()
+    return {'posted': posted, 'failed': failed}
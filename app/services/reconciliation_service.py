@@ -0,0 +1,181 @@
+from app import db
+from app.models import Account, BalanceSnapshot, ReconciliationRun, Transaction
+from datetime import datetime, time
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import and_, func, or_
+import heapq
+import json
+
+STREAM_BATCH_SIZE = 1000
+INSERT_BATCH_SIZE = 1000
+# Drifted accounts kept with a saved run (the largest ones); the admin page shows these.
+STORED_DRIFT_ROWS = 200
+
+
+def _latest_snapshots(before=None):
+    """Subquery of each account's newest snapshot (optionally with as_of <= `before`)."""
+    newest = db.select(BalanceSnapshot.account_id, func.max(BalanceSnapshot.as_of).label('as_of')) \
+               .group_by(BalanceSnapshot.account_id)
+    if before is not None:
+        newest = newest.where(BalanceSnapshot.as_of <= before)
+    newest = newest.subquery()
+    return db.select(BalanceSnapshot.account_id, BalanceSnapshot.as_of, BalanceSnapshot.ledger_balance) \
+             .join(newest, and_(newest.c.account_id == BalanceSnapshot.account_id,
+                                newest.c.as_of == BalanceSnapshot.as_of)) \
+             .subquery()
+
+
+def _ledger_query(until=None):
+    """
+    One aggregate pass over all accounts: (account id, user id, Account.balance, expected ledger
+    balance). The expected balance is the newest snapshot plus only the transactions after it.
+    """
+    snapshot = _latest_snapshots(before=until)
+    tx_conditions = [or_(snapshot.c.as_of.is_(None), Transaction.timestamp >= snapshot.c.as_of)]
+    if until is not None:
+        tx_conditions.append(Transaction.timestamp < until)
+    since_snapshot = db.select(Transaction.account_id, func.sum(Transaction.amount).label('total')) \
+                       .outerjoin(snapshot, snapshot.c.account_id == Transaction.account_id) \
+                       .where(*tx_conditions) \
+                       .group_by(Transaction.account_id) \
+                       .subquery()
+    expected = func.coalesce(snapshot.c.ledger_balance, 0) + func.coalesce(since_snapshot.c.total, 0)
+    return db.select(Account.id, Account.user_id, Account.balance, expected.label('ledger_balance')) \
+             .outerjoin(snapshot, snapshot.c.account_id == Account.id) \
+             .outerjoin(since_snapshot, since_snapshot.c.account_id == Account.id) \
+             .order_by(Account.id) \
+             .execution_options(yield_per=STREAM_BATCH_SIZE)
+
+
+def take_balance_snapshots(as_of=None):
+    """
+    Records every account's ledger balance as of `as_of` (default: today 00:00 UTC), built from
+    each account's previous snapshot plus the transactions since. Accounts that already have a
+    snapshot at that instant are skipped, so the job can be re-run safely. Returns rows written.
+    """
+    as_of = as_of or datetime.combine(datetime.utcnow().date(), time.min)
+    existing = set(db.session.execute(
+        db.select(BalanceSnapshot.account_id).where(BalanceSnapshot.as_of == as_of)).scalars())
+
+    now = datetime.utcnow()
+    pending, written = [], 0
+    for account_id, _, balance, ledger_balance in db.session.execute(_ledger_query(until=as_of)):
+        if account_id in existing:
+            continue
+        pending.append({
+            'account_id': account_id,
+            'as_of': as_of,
+            'ledger_balance': ledger_balance,
+            'account_balance': balance,
+            'created_at': now,
+        })
+        if len(pending) >= INSERT_BATCH_SIZE:
+            db.session.execute(db.insert(BalanceSnapshot), pending)
+            written += len(pending)
+            pending = []
+    if pending:
+        db.session.execute(db.insert(BalanceSnapshot), pending)
+        written += len(pending)
+    db.session.commit()
+    return written
+
+
+def iter_ledger_balances(as_of):
+    """Streams (account_id, ledger balance just before `as_of`) for every account, in id order."""
+    for account_id, _, _, ledger_balance in db.session.execute(_ledger_query(until=as_of)):
+        yield account_id, Decimal(ledger_balance or 0)
+
+
+def iter_reconciliation(tolerance=None):
+    """
+    Streams accounts whose stored balance differs from their ledger by more than `tolerance`
+    (default RECONCILIATION_TOLERANCE), as dicts with the drift amount.
+    """
+    if tolerance is None:
+        tolerance = Decimal(str(current_app.config.get('RECONCILIATION_TOLERANCE', '0.00')))
+    for account_id, user_id, balance, ledger_balance in db.session.execute(_ledger_query()):
+        drift = Decimal(balance or 0) - Decimal(ledger_balance or 0)
+        if abs(drift) > tolerance:
+            yield {
+                'account_id': account_id,
+                'user_id': user_id,
+                'balance': Decimal(balance or 0),
+                'ledger_balance': Decimal(ledger_balance or 0),
+                'drift': drift,
+            }
+
+
+def reconcile_accounts(tolerance=None):
+    """
+    Returns a summary dict: how many accounts have drift, the total absolute drift, and the
+    STORED_DRIFT_ROWS largest of them (largest first). Only those are held in memory.
+    """
+    drifted_count, total_drift = 0, Decimal('0.00')
+
+    def counted(rows):
+        nonlocal drifted_count, total_drift
+        for row in rows:
+            drifted_count += 1
+            total_drift += abs(row['drift'])
+            yield row
+
+    largest = heapq.nlargest(STORED_DRIFT_ROWS, counted(iter_reconciliation(tolerance)), key=lambda row: abs(row['drift']))
+    return {
+        'checked_at': datetime.utcnow(),
+        'drifted_count': drifted_count,
+        'drifted_accounts': largest,
+        'total_drift': total_drift,
+    }
+
+
+def save_reconciliation(report):
+    """Stores a reconcile_accounts() summary as the latest ReconciliationRun."""
+    drifted = [
+        {key: str(value) if isinstance(value, Decimal) else value for key, value in row.items()}
+        for row in report['drifted_accounts']
+    ]
+    run = ReconciliationRun(checked_at=report['checked_at'], drifted_count=report['drifted_count'],
+                            total_drift=report['total_drift'], drifted_accounts=json.dumps(drifted))
+    db.session.add(run)
+    db.session.commit()
+    return run
+
+
+def latest_reconciliation():
+    """The newest saved run as a summary dict like reconcile_accounts() returns, or None."""
+    run = ReconciliationRun.query.order_by(ReconciliationRun.checked_at.desc()).first()
+    if not run:
+        return None
+    money = ('balance', 'ledger_balance', 'drift')
+    return {
+        'checked_at': run.checked_at,
+        'drifted_count': run.drifted_count,
+        'total_drift': Decimal(run.total_drift),
+        'drifted_accounts': [
+            {key: Decimal(value) if key in money else value for key, value in row.items()}
+            for row in json.loads(run.drifted_accounts)
+        ],
+    }
+
+
+def nearest_snapshot(account_id, as_of):
+    """The account's newest snapshot with as_of <= `as_of`, or None."""
+    return BalanceSnapshot.query.filter(BalanceSnapshot.account_id == account_id,
+                                        BalanceSnapshot.as_of <= as_of) \
+                                .order_by(BalanceSnapshot.as_of.desc()).first()
+
+
+def get_balance_as_of(account_id, as_of):
+    """
+    Ledger balance of an account just before `as_of`: the nearest earlier snapshot plus the
+    transactions between it and `as_of`. Both lookups use the (account_id, ...) indexes.
+    """
+    snapshot = nearest_snapshot(account_id, as_of)
+    conditions = [Transaction.account_id == account_id, Transaction.timestamp < as_of]
+    base = Decimal('0.00')
+    if snapshot:
+        conditions.append(Transaction.timestamp >= snapshot.as_of)
+        base = Decimal(snapshot.ledger_balance)
+    delta = db.session.execute(db.select(func.coalesce(func.sum(Transaction.amount), 0)).where(*conditions)).scalar()
+    return base + Decimal(delta)
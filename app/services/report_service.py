@@ -0,0 +1,314 @@
+from app import db
+from app.models import (
+    ReportJob, ReportJobStatus, Transaction, AutomatedTaxDeductionLog, Ticket, Inspection, AuctionItem
+)
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import func
+import csv
+import enum
+import importlib.util
+import json
+import os
+
+# Report type -> model, exported columns and the column the date filters apply to.
+# Rows are read in keyset batches on the primary key, so a report never holds a long-running
+# cursor or transaction open and memory stays bounded by the batch size.
+REPORT_TYPES = {
+    'transactions': {
+        'label': 'Transactions',
+        'model': Transaction,
+        'columns': ['id', 'account_id', 'timestamp', 'type', 'amount', 'description'],
+        'date_column': 'timestamp',
+    },
+    'tax_deductions': {
+        'label': 'Tax Deduction Logs',
+        'model': AutomatedTaxDeductionLog,
+        'columns': ['id', 'user_id', 'tax_bracket_id', 'balance_before_deduction', 'tax_rate_applied',
+                    'amount_deducted', 'deduction_date', 'banking_transaction_id'],
+        'date_column': 'deduction_date',
+    },
+    'tickets': {
+        'label': 'Tickets',
+        'model': Ticket,
+        'columns': ['id', 'issued_to_user_id', 'issued_by_officer_id', 'vehicle_id', 'violation_details',
+                    'fine_amount', 'issue_date', 'due_date', 'status'],
+        'date_column': 'issue_date',
+    },
+    'inspections': {
+        'label': 'Inspections',
+        'model': Inspection,
+        'columns': ['id', 'officer_user_id', 'inspected_user_id', 'vehicle_id', 'timestamp', 'pass_status', 'notes'],
+        'date_column': 'timestamp',
+    },
+    'auctions': {
+        'label': 'Auction History',
+        'model': AuctionItem,
+        'columns': ['id', 'item_name', 'submitter_user_id', 'status', 'actual_starting_bid', 'submission_time',
+                    'start_time', 'current_end_time', 'winner_user_id', 'winning_bid_id'],
+        'date_column': 'submission_time',
+    },
+}
+
+BATCH_SIZE = 5000
+
+
+def parquet_available():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def available_formats():
+    formats = [('csv', 'CSV'), ('jsonl', 'JSON Lines')]
+    if parquet_available():
+        formats.append(('parquet', 'Parquet'))
+    return formats
+
+
+def storage_dir():
+    path = current_app.config.get('REPORT_STORAGE_DIR') or os.path.join(current_app.instance_path, 'reports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def request_report(user_id, report_type, fmt, start_date=None, end_date=None):
+    """Queues a report for the background worker and returns the ReportJob."""
+    if report_type not in REPORT_TYPES:
+        raise ValueError(f"Unknown report type: {report_type}")
+    if fmt not in dict(available_formats()):
+        raise ValueError(f"Unsupported report format: {fmt}")
+
+    filters = {
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+    }
+    job = ReportJob(requested_by_user_id=user_id, report_type=report_type, format=fmt, filters=json.dumps(filters))
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+# --- Writers ---
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+class CsvWriter:
+    extension = 'csv'
+
+    def __init__(self, path, columns, column_types):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write_batch(self, rows):
+        self.writer.writerows(
+            ['' if value is None else _plain(value) for value in row] for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesWriter:
+    extension = 'jsonl'
+
+    def __init__(self, path, columns, column_types):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.columns = columns
+
+    @staticmethod
+    def _json_value(value):
+        value = _plain(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def write_batch(self, rows):
+        self.file.writelines(
+            json.dumps({column: self._json_value(value) for column, value in zip(self.columns, row)}) + '\n'
+            for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    extension = 'parquet'
+
+    def __init__(self, path, columns, column_types):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.columns = columns
+        self.schema = pa.schema([(column, self._arrow_type(column_type)) for column, column_type in zip(columns, column_types)])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def _arrow_type(self, column_type):
+        pa = self.pa
+        if isinstance(column_type, db.Boolean):
+            return pa.bool_()
+        if isinstance(column_type, db.Integer):
+            return pa.int64()
+        if isinstance(column_type, db.Numeric):
+            return pa.decimal128(column_type.precision or 18, column_type.scale or 2)
+        if isinstance(column_type, db.DateTime):
+            return pa.timestamp('us')
+        return pa.string()
+
+    def write_batch(self, rows):
+        values = list(zip(*[[_plain(value) for value in row] for row in rows]))
+        arrays = [self.pa.array(list(column_values), type=field.type) for column_values, field in zip(values, self.schema)]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {'csv': CsvWriter, 'jsonl': JsonLinesWriter, 'parquet': ParquetWriter}
+
+
+# --- Execution ---
+
+def _filtered_conditions(definition, filters):
+    date_column = getattr(definition['model'], definition['date_column'])
+    conditions = []
+    if filters.get('start_date'):
+        conditions.append(date_column >= datetime.fromisoformat(filters['start_date']))
+    if filters.get('end_date'):
+        conditions.append(date_column < datetime.fromisoformat(filters['end_date']) + timedelta(days=1))
+    return conditions
+
+
+def _iter_batches(definition, conditions):
+    model = definition['model']
+    columns = [getattr(model, name) for name in definition['columns']]
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            db.select(*columns).where(model.id > last_id, *conditions).order_by(model.id).limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+def run_report_job(job):
+    """Generates the artifact for a RUNNING job, committing progress after every batch."""
+    definition = REPORT_TYPES[job.report_type]
+    model = definition['model']
+    conditions = _filtered_conditions(definition, json.loads(job.filters or '{}'))
+    writer_class = WRITERS[job.format]
+
+    job.total_rows = db.session.execute(db.select(func.count(model.id)).where(*conditions)).scalar()
+    db.session.commit()
+
+    filename = f"{job.report_type}_{job.id}_{datetime.utcnow():%Y%m%d%H%M%S}.{writer_class.extension}"
+    final_path = os.path.join(storage_dir(), filename)
+    partial_path = final_path + '.part'
+    column_types = [getattr(model, name).type for name in definition['columns']]
+
+    writer = writer_class(partial_path, definition['columns'], column_types)
+    try:
+        for batch in _iter_batches(definition, conditions):
+            writer.write_batch(batch)
+            job.rows_written += len(batch)
+            job.started_at = datetime.utcnow()  # renews the lease
+            db.session.commit()
+    except Exception:
+        writer.close()
+        os.remove(partial_path)
+        raise
+    writer.close()
+    os.replace(partial_path, final_path)
+
+    job.artifact_path = filename
+    job.artifact_size = os.path.getsize(final_path)
+    job.status = ReportJobStatus.COMPLETED
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _fail_stale_jobs():
+    """
+    Fails RUNNING jobs whose lease ran out: `started_at` is set on claim and renewed with every
+    progress commit, so a job that hasn't moved for REPORT_JOB_LEASE_SECONDS lost its worker to
+    a crash or a kill. They are not re-queued, since a report that took one worker down would
+    take the next one down too. Returns the number of jobs failed.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=current_app.config.get('REPORT_JOB_LEASE_SECONDS', 900))
+    failed = ReportJob.query.filter(ReportJob.status == ReportJobStatus.RUNNING, ReportJob.started_at < cutoff) \
+                            .update({ReportJob.status: ReportJobStatus.FAILED,
+                                     ReportJob.error: 'The report worker stopped before it finished. Request the report again.',
+                                     ReportJob.finished_at: now}, synchronize_session=False)
+    db.session.commit()
+    if failed:
+        current_app.logger.warning(f"Failed {failed} report job(s) whose worker stopped responding.")
+    return failed
+
+
+def _claim_next_job():
+    query = ReportJob.query.filter_by(status=ReportJobStatus.PENDING).order_by(ReportJob.created_at)
+    if db.engine.dialect.name == 'postgresql':
+        # Several workers can poll at once; each one skips jobs another has already locked.
+        query = query.with_for_update(skip_locked=True)
+    job = query.first()
+    if job:
+        job.status = ReportJobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        job.rows_written = 0
+        db.session.commit()
+    return job
+
+
+def run_pending_reports(max_jobs=10):
+    """Processes queued report jobs one at a time. Returns the number of jobs handled."""
+    _fail_stale_jobs()
+    handled = 0
+    while handled < max_jobs:
+        job = _claim_next_job()
+        if not job:
+            break
+        handled += 1
+        try:
+            run_report_job(job)
+            print(f"Report {job.id} ({job.report_type}.{job.format}) finished: {job.rows_written} rows.")
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Report job {job.id} failed: {e}", exc_info=True)
+            job.status = ReportJobStatus.FAILED
+            job.error = str(e)[:2000]
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+    return handled
+
+
+def purge_expired_reports():
+    """Deletes artifacts and job rows older than REPORT_RETENTION_DAYS. Returns the number removed."""
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config.get('REPORT_RETENTION_DAYS', 7))
+    expired = ReportJob.query.filter(ReportJob.created_at < cutoff,
+                                     ReportJob.status.in_([ReportJobStatus.COMPLETED, ReportJobStatus.FAILED])).all()
+    for job in expired:
+        if job.artifact_path:
+            path = os.path.join(storage_dir(), job.artifact_path)
+            if os.path.exists(path):
+                os.remove(path)
+        db.session.delete(job)
+    db.session.commit()
+    return len(expired)
+
+
+def artifact_file(job):
+    """Absolute path of a completed job's artifact, or None if it is missing."""
+    if job.status != ReportJobStatus.COMPLETED or not job.artifact_path:
+        return None
+    path = os.path.join(storage_dir(), os.path.basename(job.artifact_path))
+    return path if os.path.exists(path) else None
@@ -0,0 +1,354 @@
+from app import db
+from app.models import Farmer, FarmerStats, Parcel, SiloStorage, Account, SavegameFile, TransactionType, User, VehicleRegion
+from app.services import dashboard_service, fleet_import_service, livemap_service, parcel_import_service, posting_service
+from collections import Counter, defaultdict, namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+import hashlib
+import math
+import os
+import posixpath
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+
+# Savegame files in ingestion order. farms.xml comes first for the balances, and every file
+# is reconciled per linked farmer. Silo contents live in placeables.xml.
+FARMS_FILE = 'farms.xml'
+FARMLAND_FILE = 'farmland.xml'
+PLACEABLES_FILE = 'placeables.xml'
+VEHICLES_FILE = 'vehicles.xml'
+SAVEGAME_FILES = (FARMS_FILE, FARMLAND_FILE, PLACEABLES_FILE, VEHICLES_FILE)
+
+HASH_CHUNK_SIZE = 1 << 16
+SILO_DEFAULT_CAPACITY = 200000
+
+# Outcome of a run: {file name: 'ingested' | 'unchanged' | 'missing'} and counts of what changed.
+SavegameIngestResult = namedtuple('SavegameIngestResult', ['files', 'counts'])
+
+
+class SavegameIngestError(ValueError):
+    pass
+
+
+# --- Fetching ---
+@contextmanager
+def savegame_files(names=SAVEGAME_FILES):
+    """
+    Yields {name: local path} for those of the named savegame files that exist. With
+    SAVEGAME_ACCESS_METHOD=SCP they are downloaded over one SSH connection (the livemap
+    connection settings) into a temporary directory that is removed afterwards.
+    """
+    config = current_app.config
+    access_method = config.get('SAVEGAME_ACCESS_METHOD', 'LOCAL_PATH')
+    if access_method == 'LOCAL_PATH':
+        directory = config.get('SAVEGAME_LOCAL_DIR')
+        yield {name: os.path.join(directory, name) for name in names if os.path.isfile(os.path.join(directory, name))}
+        return
+    if access_method != 'SCP':
+        raise SavegameIngestError(f"Invalid SAVEGAME_ACCESS_METHOD: {access_method}")
+
+    ssh = livemap_service.connect_ssh(
+        config.get('LIVEMAP_REMOTE_HOST'), config.get('LIVEMAP_REMOTE_PORT'), config.get('LIVEMAP_REMOTE_USER'),
+        config.get('LIVEMAP_REMOTE_PASSWORD'), config.get('LIVEMAP_SSH_KEY_PATH')
+    )
+    workdir = tempfile.mkdtemp(prefix='savegame-')
+    try:
+        paths = {}
+        with ssh.open_sftp() as sftp:
+            for name in names:
+                local_path = os.path.join(workdir, name)
+                try:
+                    sftp.get(posixpath.join(config.get('SAVEGAME_REMOTE_DIR'), name), local_path)
+                except FileNotFoundError:
+                    continue
+                paths[name] = local_path
+        yield paths
+    finally:
+        ssh.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- Streaming parsers ---
+def _int_attribute(value):
+    return int(value) if value and value.isdigit() else None
+
+
+def _float_attribute(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _positive_float(value):
+    number = _float_attribute(value)
+    return number if number is not None and number > 0 else None
+
+
+def iter_farms(source):
+    """Streams farms.xml as dicts with farm_id, name and money."""
+    farm = None
+    try:
+        for event, element in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                if element.tag == 'farm':
+                    farm = {'farm_id': _int_attribute(element.get('farmId')), 'name': element.get('name'),
+                            'money': element.get('money')}
+                continue
+            if element.tag == 'farm' and farm is not None:
+                if farm['farm_id'] is not None:
+                    yield farm
+                farm = None
+                element.clear()
+    except ET.ParseError as e:
+        raise SavegameIngestError(f"{FARMS_FILE} is not valid XML: {e}") from e
+
+
+def silo_levels(source):
+    """
+    Streams placeables.xml and totals the fill levels held in silo storages as
+    {(farm id, fill type): level}. Each placeable is dropped once read.
+    """
+    levels = Counter()
+    open_elements = []
+    try:
+        for event, element in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                open_elements.append(element)
+                continue
+            open_elements.pop()
+            if element.tag == 'node' and element.get('fillType'):
+                tags = [open_element.tag for open_element in open_elements]
+                if 'silo' in tags and tags[-1] == 'storage':
+                    # A storage may belong to another farm than the placeable (shared silos).
+                    farm = _int_attribute(open_elements[-1].get('farmId'))
+                    if farm is None:
+                        farm = next((_int_attribute(e.get('farmId')) for e in reversed(open_elements) if e.tag == 'placeable'), None)
+                    level = _positive_float(element.get('fillLevel'))
+                    if farm is not None and level:
+                        levels[(farm, element.get('fillType'))] += level
+            elif element.tag == 'placeable':
+                element.clear()
+                if open_elements:
+                    open_elements[-1].remove(element)
+    except ET.ParseError as e:
+        raise SavegameIngestError(f"{PLACEABLES_FILE} is not valid XML: {e}") from e
+    return levels
+
+
+# --- Farm links ---
+def link_farm(farmer, game_farm_id):
+    """
+    Links a farmer to a savegame farm, or unlinks them with None. Only an admin or an
+    authenticated FS25 API client may call this: player nicknames in farms.xml are chosen by
+    the players, so they never decide whose balance a farm syncs to. The recorded file hashes
+    are cleared when the link changes, so the next ingest reconciles every file and the
+    farmer catches up. Commits.
+    """
+    if game_farm_id is not None:
+        if game_farm_id < 1:
+            raise SavegameIngestError("A savegame farm id must be a positive number.")
+        owner = Farmer.query.filter(Farmer.game_farm_id == game_farm_id, Farmer.id != farmer.id).first()
+        if owner:
+            raise SavegameIngestError(f"Savegame farm {game_farm_id} is already linked to {owner.user.username}.")
+    if farmer.game_farm_id == game_farm_id:
+        return False
+    try:
+        farmer.game_farm_id = game_farm_id
+        db.session.execute(db.delete(SavegameFile))
+        db.session.commit()
+    except IntegrityError as e:
+        # Another request linked the same farm first (uq_farmers_game_farm_id).
+        db.session.rollback()
+        raise SavegameIngestError(f"Savegame farm {game_farm_id} is already linked to another farmer.") from e
+    return True
+
+
+# --- Reconciliation ---
+def _linked_farmers():
+    """{game farm id: Farmer} for every farmer already linked to a savegame farm."""
+    farmers = Farmer.query.filter(Farmer.game_farm_id.isnot(None)) \
+                          .options(joinedload(Farmer.user).joinedload(User.company)).all()
+    return {farmer.game_farm_id: farmer for farmer in farmers}
+
+
+def _sync_balances(farms, farmers):
+    """Moves each linked farmer's personal account to the farm's money; returns how many changed."""
+    synced = 0
+    for farm in farms:
+        farmer = farmers.get(farm['farm_id'])
+        money = _float_attribute(farm['money'])
+        if farmer is None or money is None:
+            continue
+        account = Account.query.filter_by(user_id=farmer.user_id, is_company=False).order_by(Account.id).first()
+        money = Decimal(str(money)).quantize(Decimal('0.01'))
+        if account and account.balance != money:
+            posting_service.set_balance(account.id, money, TransactionType.FS25_SYNC, 'Balance synced from savegame',
+                                        commit=False)
+            synced += 1
+    return synced
+
+
+def _update_stats(farmers, column, counts_by_farm):
+    for farm_id, farmer in farmers.items():
+        stats = FarmerStats.query.filter_by(farmer_id=farmer.id).first()
+        if not stats:
+            stats = FarmerStats(farmer_id=farmer.id)
+            db.session.add(stats)
+        setattr(stats, column, counts_by_farm.get(farm_id, 0))
+        stats.last_synced = datetime.utcnow()
+
+
+def _reconcile_parcels(path, farmers):
+    """
+    Makes each linked farmer's parcels match the farmlands their farm owns in farmland.xml:
+    missing ones are bulk inserted, and parcels for farmlands listed as owned by someone else
+    are deleted. Parcels whose location is not a farmland id in the file (manual entries) are
+    left alone. The savegame only has an area when the map provides one; otherwise the size
+    already recorded for that farmland (e.g. from an admin farmland.xml upload) is used.
+    """
+    farmer_by_farm = {farm_id: farmer.id for farm_id, farmer in farmers.items()}
+    owned = defaultdict(dict)
+    listed = set()
+    with open(path, 'rb') as source:
+        for _, attributes in parcel_import_service.iter_farmland_elements(source):
+            location = (attributes.get('id') or '').strip()
+            if not location or len(location) > parcel_import_service.MAX_LOCATION_LENGTH:
+                continue
+            listed.add(location)
+            farmer_id = farmer_by_farm.get(_int_attribute(attributes.get('farmId')))
+            if farmer_id is not None:
+                owned[farmer_id][location] = _positive_float(attributes.get('area'))
+
+    unknown = list({location for parcels in owned.values() for location, area in parcels.items() if area is None})
+    known_sizes = {}
+    for start in range(0, len(unknown), parcel_import_service.BATCH_SIZE):
+        known_sizes.update(db.session.execute(
+            db.select(Parcel.location, db.func.max(Parcel.size))
+              .where(Parcel.location.in_(unknown[start:start + parcel_import_service.BATCH_SIZE]), Parcel.size > 0)
+              .group_by(Parcel.location)
+        ).all())
+
+    counts = Counter()
+    for farmer_id, parcels in owned.items():
+        sizes = [(location, area or known_sizes.get(location, 0.0)) for location, area in parcels.items()]
+        counts['parcels_without_area'] += sum(1 for _, size in sizes if not size)
+        for start in range(0, len(sizes), parcel_import_service.BATCH_SIZE):
+            inserted, updated, _ = parcel_import_service.upsert_parcels(
+                farmer_id, dict(sizes[start:start + parcel_import_service.BATCH_SIZE]))
+            counts['parcels_added'] += inserted
+            counts['parcels_resized'] += updated
+
+    sold = [parcel_id for parcel_id, farmer_id, location in db.session.execute(
+        db.select(Parcel.id, Parcel.farmer_id, Parcel.location).where(Parcel.farmer_id.in_(farmer_by_farm.values()))
+    ) if location in listed and location not in owned.get(farmer_id, {})]
+    for start in range(0, len(sold), parcel_import_service.BATCH_SIZE):
+        db.session.execute(db.delete(Parcel).where(Parcel.id.in_(sold[start:start + parcel_import_service.BATCH_SIZE])))
+    counts['parcels_removed'] = len(sold)
+
+    _update_stats(farmers, 'fields_owned', {farm_id: len(owned.get(farmer_id, {}))
+                                            for farm_id, farmer_id in farmer_by_farm.items()})
+    return counts
+
+
+def _reconcile_silos(path, farmers):
+    """Sets each linked farmer's silo rows to the savegame's levels; crops no longer stored drop to zero."""
+    with open(path, 'rb') as source:
+        levels = silo_levels(source)
+
+    farmer_by_farm = {farm_id: farmer.id for farm_id, farmer in farmers.items()}
+    targets = defaultdict(dict)
+    for (farm_id, fill_type), level in levels.items():
+        if farm_id in farmer_by_farm:
+            targets[farmer_by_farm[farm_id]][fill_type[:100]] = level
+    existing = {(row.farmer_id, row.crop_type): row for row in db.session.execute(
+        db.select(SiloStorage.id, SiloStorage.farmer_id, SiloStorage.crop_type, SiloStorage.quantity)
+          .where(SiloStorage.farmer_id.in_(farmer_by_farm.values()))
+    )}
+
+    now = datetime.utcnow()
+    updates = []
+    for (farmer_id, crop_type), row in existing.items():
+        quantity = targets.get(farmer_id, {}).get(crop_type, 0.0)
+        if row.quantity != quantity:
+            updates.append({'id': row.id, 'quantity': quantity, 'last_updated': now})
+    inserts = [{'farmer_id': farmer_id, 'crop_type': crop_type, 'quantity': quantity,
+                'capacity': SILO_DEFAULT_CAPACITY, 'last_updated': now}
+               for farmer_id, crops in targets.items() for crop_type, quantity in crops.items()
+               if (farmer_id, crop_type) not in existing]
+    if updates:
+        db.session.execute(db.update(SiloStorage), updates)
+    if inserts:
+        db.session.execute(db.insert(SiloStorage), inserts)
+    return Counter(silos_updated=len(updates), silos_added=len(inserts))
+
+
+def _reconcile_vehicles(path, farmers):
+    """Registers new savegame vehicles to the companies of linked farmers and records equipment counts."""
+    region = VehicleRegion[current_app.config.get('SAVEGAME_VEHICLE_REGION', 'US').upper()]
+    farm_companies = {farm_id: farmer.user.company.id for farm_id, farmer in farmers.items() if farmer.user.company}
+    with open(path, 'rb') as source:
+        result, farm_counts = fleet_import_service.import_farm_fleets(source, region, farm_companies, commit=False)
+    _update_stats(farmers, 'equipment_owned', farm_counts)
+    return Counter(vehicles_registered=result.created)
+
+
+def ingest_savegame(force=False):
+    """
+    One sync of the whole server from its savegame: farm balances, farmland ownership (parcels),
+    silo contents and vehicles, each reconciled with bulk statements for every farmer linked
+    through link_farm. A file whose SHA-256 matches the last ingested copy is skipped unless
+    `force` is set. Everything, including the recorded hashes, is committed at once, so a failed
+    run leaves nothing half-applied and is retried in full next time.
+    Returns a SavegameIngestResult.
+    """
+    files = {}
+    counts = Counter()
+    try:
+        with savegame_files() as paths:
+            recorded = {row.name: row.sha256 for row in SavegameFile.query}
+            digests = {name: file_digest(path) for name, path in paths.items()}
+            changed = {name for name, digest in digests.items() if force or recorded.get(name) != digest}
+
+            farmers = _linked_farmers()
+            if FARMS_FILE in changed:
+                with open(paths[FARMS_FILE], 'rb') as source:
+                    farms = list(iter_farms(source))
+                counts['balances_synced'] = _sync_balances(farms, farmers)
+
+            if farmers:
+                if FARMLAND_FILE in changed:
+                    counts.update(_reconcile_parcels(paths[FARMLAND_FILE], farmers))
+                if PLACEABLES_FILE in changed:
+                    counts.update(_reconcile_silos(paths[PLACEABLES_FILE], farmers))
+                if VEHICLES_FILE in changed:
+                    counts.update(_reconcile_vehicles(paths[VEHICLES_FILE], farmers))
+                # The bulk statements bypass the ORM flush that normally evicts dashboards.
+                dashboard_service.note_changed_owners(db.session, {('farmer', farmer.id) for farmer in farmers.values()})
+
+            for name in changed:
+                db.session.merge(SavegameFile(name=name, sha256=digests[name], size=os.path.getsize(paths[name]),
+                                              ingested_at=datetime.utcnow()))
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for name in SAVEGAME_FILES:
+        files[name] = 'missing' if name not in digests else 'ingested' if name in changed else 'unchanged'
+    return SavegameIngestResult(files, {key: value for key, value in counts.items() if value})
@@ -0,0 +1,234 @@
+from app import db
+from app.models import Account, AccountStatement, Transaction
+from app.services import reconciliation_service
+from datetime import datetime
+from decimal import Decimal
+from flask import current_app
+from itertools import groupby
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+import csv
+import importlib.util
+import os
+
+STREAM_BATCH_SIZE = 1000
+CSV_HEADER = ['Date', 'Type', 'Description', 'Amount', 'Running Balance']
+
+
+def pdf_available():
+    return importlib.util.find_spec('weasyprint') is not None
+
+
+def artifact_formats():
+    formats = ['html', 'csv']
+    if pdf_available():
+        formats.append('pdf')
+    return formats
+
+
+def storage_dir():
+    path = current_app.config.get('STATEMENT_STORAGE_DIR') or os.path.join(current_app.instance_path, 'statements')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def month_bounds(year, month):
+    """[start, end) of a calendar month."""
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+def previous_month(now=None):
+    now = now or datetime.utcnow()
+    return (now.year - 1, 12) if now.month == 1 else (now.year, now.month - 1)
+
+
+def parse_period(value):
+    """Parses "YYYY-MM" into (year, month); raises ValueError when malformed."""
+    parsed = datetime.strptime(value, '%Y-%m')
+    return parsed.year, parsed.month
+
+
+def is_closed(period_end):
+    return period_end <= datetime.utcnow()
+
+
+# --- Statement data ---
+
+def _entry_query(start_at, end_before, account_ids=None):
+    """
+    Transactions in [start_at, end_before) with each row's running total since start_at,
+    computed in SQL by a window partitioned per account. Add the opening balance to get the
+    running balance.
+    """
+    running = func.sum(Transaction.amount).over(
+        partition_by=Transaction.account_id,
+        order_by=(Transaction.timestamp, Transaction.id)
+    )
+    query = db.select(Transaction.account_id, Transaction.timestamp, Transaction.type, Transaction.description,
+                      Transaction.amount, running.label('running_total')) \
+              .where(Transaction.timestamp >= start_at, Transaction.timestamp < end_before)
+    if account_ids is not None:
+        query = query.where(Transaction.account_id.in_(account_ids))
+    return query.order_by(Transaction.account_id, Transaction.timestamp, Transaction.id) \
+                .execution_options(yield_per=STREAM_BATCH_SIZE)
+
+
+def _summarise(account, start_at, end_before, opening_balance, rows):
+    entries = [{
+        'timestamp': timestamp,
+        'type': tx_type,
+        'description': description,
+        'amount': Decimal(amount),
+        'running_balance': opening_balance + Decimal(running_total),
+    } for _, timestamp, tx_type, description, amount, running_total in rows]
+    return {
+        'account': account,
+        'period_start': start_at,
+        'period_end': end_before,
+        'opening_balance': opening_balance,
+        'closing_balance': entries[-1]['running_balance'] if entries else opening_balance,
+        'total_credits': sum((e['amount'] for e in entries if e['amount'] > 0), Decimal('0.00')),
+        'total_debits': sum((-e['amount'] for e in entries if e['amount'] < 0), Decimal('0.00')),
+        'entries': entries,
+    }
+
+
+def build_statement(account, start_at, end_before):
+    """
+    Statement for any date range: the opening balance comes from the nearest balance snapshot
+    plus the transactions since it, and the running balances from one windowed query over the
+    range itself, so the cost depends on the range and not on the account's full history.
+    """
+    opening_balance = reconciliation_service.get_balance_as_of(account.id, start_at)
+    rows = db.session.execute(_entry_query(start_at, end_before, [account.id]))
+    return _summarise(account, start_at, end_before, opening_balance, rows)
+
+
+def statement_csv_rows(statement):
+    for entry in statement['entries']:
+        yield [entry['timestamp'].strftime('%Y-%m-%d %H:%M:%S'), entry['type'].value, entry['description'] or '',
+               entry['amount'], entry['running_balance']]
+
+
+# --- Month-end artifacts ---
+
+def artifact_path(statement_row, fmt):
+    return os.path.join(storage_dir(), statement_row.period_label, f"account_{statement_row.account_id}.{fmt}")
+
+
+def _write_atomically(path, write):
+    partial_path = path + '.part'
+    try:
+        write(partial_path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    os.replace(partial_path, path)
+
+
+def _write_artifacts(statement, period_label):
+    directory = os.path.join(storage_dir(), period_label)
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"account_{statement['account'].id}")
+    formats = artifact_formats()
+
+    # Rendered straight from the Jinja environment: the site's context processors expect a request.
+    html = current_app.jinja_env.get_template('banking/statement_document.html') \
+                                .render(statement=statement, generation_time=datetime.utcnow())
+
+    def write_html(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+
+    def write_csv(path):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            writer.writerows(statement_csv_rows(statement))
+
+    def write_pdf(path):
+        from weasyprint import HTML
+        HTML(string=html).write_pdf(path)
+
+    writers = {'html': write_html, 'csv': write_csv, 'pdf': write_pdf}
+    for fmt in formats:
+        _write_atomically(f"{base}.{fmt}", writers[fmt])
+    return formats
+
+
+def _record(statement, formats):
+    return AccountStatement(
+        account_id=statement['account'].id,
+        period_start=statement['period_start'],
+        period_end=statement['period_end'],
+        opening_balance=statement['opening_balance'],
+        closing_balance=statement['closing_balance'],
+        total_credits=statement['total_credits'],
+        total_debits=statement['total_debits'],
+        transaction_count=len(statement['entries']),
+        formats=','.join(formats),
+    )
+
+
+def generate_month_statements(year, month):
+    """
+    Pre-generates the statement artifacts of a closed month for every account that does not
+    have one yet. Opening balances for all accounts come from one snapshot-based pass and the
+    month's transactions from one windowed query, streamed account by account. Existing
+    statements are never rewritten. Returns the number of statements generated.
+    """
+    start_at, end_before = month_bounds(year, month)
+    if not is_closed(end_before):
+        raise ValueError(f"{start_at:%Y-%m} has not closed yet")
+
+    done = set(db.session.execute(
+        db.select(AccountStatement.account_id).where(AccountStatement.period_start == start_at)).scalars())
+    openings = {account_id: balance for account_id, balance in reconciliation_service.iter_ledger_balances(start_at)
+                if account_id not in done}
+    if not openings:
+        return 0
+
+    # Snapshot the month end as well, so next month's openings are a single lookup.
+    reconciliation_service.take_balance_snapshots(as_of=end_before)
+
+    accounts = {account.id: account for account in Account.query.options(joinedload(Account.user))}
+    # Both sides are ordered by account id, so the month's rows are merged in a single pass.
+    # Nothing is committed until the stream is exhausted: a commit would close a server-side cursor.
+    groups = groupby(db.session.execute(_entry_query(start_at, end_before)), key=lambda row: row[0])
+    current = next(groups, None)
+    generated = 0
+    for account_id in sorted(openings):
+        while current and current[0] < account_id:
+            current = next(groups, None)
+        rows = list(current[1]) if current and current[0] == account_id else []
+        statement = _summarise(accounts[account_id], start_at, end_before, openings[account_id], rows)
+        db.session.add(_record(statement, _write_artifacts(statement, f"{start_at:%Y-%m}")))
+        generated += 1
+    db.session.commit()
+    return generated
+
+
+def get_month_statement(account, year, month):
+    """
+    The archived statement of a closed month, generating it on first access if the month-end
+    job has not covered this account yet. Returns None for months that are still open.
+    """
+    start_at, end_before = month_bounds(year, month)
+    statement_row = AccountStatement.query.filter_by(account_id=account.id, period_start=start_at).first()
+    if statement_row or not is_closed(end_before):
+        return statement_row
+
+    statement = build_statement(account, start_at, end_before)
+    statement_row = _record(statement, _write_artifacts(statement, f"{start_at:%Y-%m}"))
+    db.session.add(statement_row)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # The month-end job archived it in the meantime; its artifacts are identical.
+        db.session.rollback()
+        statement_row = AccountStatement.query.filter_by(account_id=account.id, period_start=start_at).first()
+    return statement_row
@@ -0,0 +1,97 @@
+from app import db
+from app.models import (
+    SiteStats, User, Ticket, TicketStatus, PermitApplication, PermitApplicationStatus,
+    InsuranceClaim, Transaction, TransactionType
+)
+from datetime import datetime
+from decimal import Decimal
+from flask import current_app
+
+# Transaction types counted towards the admin dashboard revenue figure.
+REVENUE_TRANSACTION_TYPES = [
+    TransactionType.TICKET_PAYMENT,
+    TransactionType.PERMIT_FEE_PAYMENT,
+    TransactionType.PERMIT_FEE
+]
+
+SITE_STATS_ROW_ID = 1
+
+
+def _get_stats_row():
+    stats = SiteStats.query.get(SITE_STATS_ROW_ID)
+    if not stats:
+        stats = SiteStats(id=SITE_STATS_ROW_ID, revenue=Decimal('0.00'), revenue_settled=Decimal('0.00'),
+                          revenue_last_transaction_id=0)
+        db.session.add(stats)
+    return stats
+
+
+def _revenue_between(after_id, up_to_id):
+    """Sum of revenue transactions with after_id < id <= up_to_id (no upper bound when None)."""
+    query = db.session.query(db.func.sum(Transaction.amount)).filter(
+        Transaction.id > after_id,
+        Transaction.type.in_(REVENUE_TRANSACTION_TYPES)
+    )
+    if up_to_id is not None:
+        query = query.filter(Transaction.id <= up_to_id)
+    return Decimal(query.scalar() or 0)
+
+
+def refresh_site_stats(full=False):
+    """
+    Recomputes the cached site counters and stores them in the single `site_stats` row.
+    Counts are cheap indexed lookups. Revenue is folded in incrementally, but ids are handed
+    out at insert time, not at commit, so a transaction that commits late lands below ids
+    already seen. Only transactions more than SITE_STATS_REVENUE_RESCAN_IDS ids behind the
+    newest one are folded into the settled total; the ones above that watermark are summed
+    again on every refresh, which picks up late commits without rescanning the ledger.
+    Pass full=True to rebuild revenue from scratch (e.g. after an admin edits old transactions).
+    """
+    stats = _get_stats_row()
+
+    if full:
+        stats.revenue_settled = Decimal('0.00')
+        stats.revenue_last_transaction_id = 0
+
+    rescan_ids = current_app.config.get('SITE_STATS_REVENUE_RESCAN_IDS', 10000)
+    latest_transaction_id = db.session.query(db.func.max(Transaction.id)).scalar() or 0
+    settle_up_to = latest_transaction_id - rescan_ids
+    if settle_up_to > stats.revenue_last_transaction_id:
+        settled = _revenue_between(stats.revenue_last_transaction_id, settle_up_to)
+        stats.revenue_settled = (stats.revenue_settled or Decimal('0.00')) + settled
+        stats.revenue_last_transaction_id = settle_up_to
+    recent = _revenue_between(stats.revenue_last_transaction_id, None)
+    stats.revenue = (stats.revenue_settled or Decimal('0.00')) + recent
+
+    stats.total_users = User.query.count()
+    stats.open_tickets = Ticket.query.filter_by(status=TicketStatus.OUTSTANDING).count()
+    stats.pending_permits = PermitApplication.query.filter_by(status=PermitApplicationStatus.PENDING_REVIEW).count()
+    stats.insurance_claims = InsuranceClaim.query.count()
+    stats.refreshed_at = datetime.utcnow()
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error refreshing site stats: {e}", exc_info=True)
+    return stats
+
+
+def get_site_stats():
+    """
+    Returns the cached site counters as a dict. It only reads: the counters are refreshed by
+    the site stats job (scripts/run_stats_job.py), and are all zero until its first run.
+    """
+    stats = SiteStats.query.get(SITE_STATS_ROW_ID)
+    if not stats:
+        return {'total_users': 0, 'open_tickets': 0, 'pending_permits': 0, 'insurance_claims': 0,
+                'revenue': 0.0, 'refreshed_at': None}
+
+    return {
+        'total_users': stats.total_users,
+        'open_tickets': stats.open_tickets,
+        'pending_permits': stats.pending_permits,
+        'insurance_claims': stats.insurance_claims,
+        'revenue': float(stats.revenue or 0),
+        'refreshed_at': stats.refreshed_at
+    }
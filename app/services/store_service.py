@@ -0,0 +1,75 @@
+from app import db
+from app.models import StoreItem, StoreFacet
+from datetime import datetime
+from sqlalchemy import func, literal
+
+PER_PAGE = 24
+FACET_KINDS = ('brand', 'category')
+
+# Orderings offered by the store browser; id breaks ties so pages never overlap.
+SORT_ORDERS = {
+    'brand': (StoreItem.brand, StoreItem.name, StoreItem.id),
+    'name': (StoreItem.name, StoreItem.id),
+    'price_asc': (StoreItem.price, StoreItem.id),
+    'price_desc': (StoreItem.price.desc(), StoreItem.id),
+}
+DEFAULT_SORT = 'brand'
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def replace_inventory(items):
+    """
+    Replaces the store catalog with the pushed items in one bulk insert and rebuilds the
+    brand and category facet counts from it with an INSERT ... SELECT per facet. Nothing is
+    committed; the caller commits so the catalog and its facets change together.
+    """
+    db.session.execute(db.delete(StoreFacet))
+    db.session.execute(db.delete(StoreItem))
+    if items:
+        db.session.execute(db.insert(StoreItem), [{
+            'name': item.get('name'),
+            'price': item.get('price'),
+            'brand': item.get('brand'),
+            'category': item.get('category'),
+            'xml_filename': item.get('xml_filename'),
+        } for item in items])
+
+    computed_at = datetime.utcnow()
+    for kind in FACET_KINDS:
+        column = getattr(StoreItem, kind)
+        db.session.execute(db.insert(StoreFacet).from_select(
+            ['kind', 'value', 'item_count', 'computed_at'],
+            db.select(literal(kind), column, func.count(), literal(computed_at))
+              .where(column.isnot(None), column != '')
+              .group_by(column)
+        ))
+
+
+def get_facets():
+    """{'brand': [(value, item_count), ...], 'category': [...]}, each sorted by value."""
+    facets = {kind: [] for kind in FACET_KINDS}
+    for facet in db.session.execute(db.select(StoreFacet).order_by(StoreFacet.kind, StoreFacet.value)).scalars():
+        facets.setdefault(facet.kind, []).append((facet.value, facet.item_count))
+    return facets
+
+
+def browse_store(text=None, brand=None, category=None, min_price=None, max_price=None,
+                 sort=DEFAULT_SORT, page=1, per_page=PER_PAGE):
+    """One page of store items matching a name search and brand, category and price filters."""
+    query = StoreItem.query
+    text = (text or '').strip()
+    if text:
+        query = query.filter(func.lower(StoreItem.name).like(f"%{_escape_like(text.lower())}%", escape='\\'))
+    if brand:
+        query = query.filter(StoreItem.brand == brand)
+    if category:
+        query = query.filter(StoreItem.category == category)
+    if min_price is not None:
+        query = query.filter(StoreItem.price >= min_price)
+    if max_price is not None:
+        query = query.filter(StoreItem.price <= max_price)
+    return query.order_by(*SORT_ORDERS.get(sort, SORT_ORDERS[DEFAULT_SORT])) \
+                .paginate(page=page, per_page=per_page, error_out=False)
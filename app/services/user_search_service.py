@@ -0,0 +1,74 @@
+from app import db
+from app.models import User, Farmer
+from sqlalchemy import and_, case, func, or_
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+MIN_SUBSTRING_LENGTH = 3    # trigram indexes cannot serve shorter substrings
+
+# Rank of a hit: the typed name exactly, a name starting with it, or one containing it.
+EXACT, PREFIX, CONTAINS = 0, 1, 2
+
+
+def _username_key():
+    return func.lower(User.username)
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _prefix_match(key):
+    username_key = _username_key()
+    if db.engine.dialect.name == 'postgresql':
+        # Served by the text_pattern_ops btree on lower(username).
+        return username_key.like(f"{_escape_like(key)}%", escape='\\')
+    # SQLite only uses an expression index for LIKE under case_sensitive_like; a range scan always can.
+    return and_(username_key >= key, username_key < key[:-1] + chr(ord(key[-1]) + 1))
+
+
+def username_contains(text):
+    """Case-insensitive substring filter on User.username, served by the trigram index on PostgreSQL."""
+    return _username_key().like(f"%{_escape_like(text.strip().lower())}%", escape='\\')
+
+
+def find_by_username(username):
+    """
+    Case-insensitive exact lookup through the lower(username) index. Replaces
+    `User.username.ilike(username)`, which could not use an index and treated % and _ in
+    the typed name as wildcards.
+    """
+    key = (username or '').strip().lower()
+    if not key:
+        return None
+    return User.query.filter(_username_key() == key).first()
+
+
+def search_users(text, limit=DEFAULT_LIMIT, farmers_only=False):
+    """
+    Top matches for a username typeahead: exact match first, then names starting with the
+    text, then (on PostgreSQL, for three or more characters) names containing it. Shorter
+    names rank first within each group. Returns dicts with id, username, role and farmer_id.
+    """
+    key = (text or '').strip().lower()
+    if not key:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    username_key = _username_key()
+    prefix = _prefix_match(key)
+    where = prefix
+    if db.engine.dialect.name == 'postgresql' and len(key) >= MIN_SUBSTRING_LENGTH:
+        where = or_(prefix, username_contains(key))
+    rank = case((username_key == key, EXACT), (prefix, PREFIX), else_=CONTAINS)
+
+    query = db.select(User.id, User.username, User.role, Farmer.id.label('farmer_id')) \
+              .where(where) \
+              .order_by(rank, func.length(User.username), username_key) \
+              .limit(limit)
+    if farmers_only:
+        query = query.join(Farmer, Farmer.user_id == User.id)
+    else:
+        query = query.outerjoin(Farmer, Farmer.user_id == User.id)
+    return [{'id': row.id, 'username': row.username, 'role': row.role.value, 'farmer_id': row.farmer_id}
+            for row in db.session.execute(query)]
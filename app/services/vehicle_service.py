@@ -1,45 +1,196 @@
 from app import db
-from app.models import UserVehicle, CompanyVehicle, VehicleRegion, User
+from app.models import UserVehicle, CompanyVehicle, VehicleRegion, User, LicensePlate, LICENSE_PLATE_SEQUENCES, plate_search_key
+from app.services import plate_search_service
 from datetime import datetime
+from sqlalchemy import event, func, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import hashlib
+import math
 import random
 import string
 from flask import current_app
 
+# Plate templates per region: N is a digit, L a letter, anything else is copied as-is.
+PLATE_FORMATS = {
+    VehicleRegion.US: 'NNN-LLL',    # 123-ABC
+    VehicleRegion.EURO: 'LLL-NNN',  # ABC-123
+}
+DEFAULT_PLATE_FORMAT = 'LLLNNN'     # XYZ123
+_PLATE_ALPHABETS = {'N': string.digits, 'L': string.ascii_uppercase}
+
+# Postgres sequences feeding the allocator (declared in the models, so create_all makes them too).
+PLATE_SEQUENCES = LICENSE_PLATE_SEQUENCES
+PERMUTATION_ROUNDS = 4
+MAX_PLATE_COLLISIONS = 20
+
+
+def plate_format(region_enum):
+    return PLATE_FORMATS.get(region_enum, DEFAULT_PLATE_FORMAT)
+
+
+def namespace_size(template):
+    return math.prod(len(_PLATE_ALPHABETS[c]) for c in template if c in _PLATE_ALPHABETS)
+
+
+def format_plate(template, index):
+    """Writes `index` (0 <= index < namespace_size) as a plate in the template's mixed radix."""
+    chars = []
+    for c in reversed(template):
+        alphabet = _PLATE_ALPHABETS.get(c)
+        if alphabet:
+            index, digit = divmod(index, len(alphabet))
+            chars.append(alphabet[digit])
+        else:
+            chars.append(c)
+    return ''.join(reversed(chars))
+
+
+def _round_value(value, key, round_index, modulus):
+    digest = hashlib.blake2b(f"{key}:{round_index}:{value}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % modulus
+
+
+def permute(serial, size, key):
+    """
+    Bijection on [0, size): a Feistel network over the smallest square covering the namespace,
+    cycle-walking the rare results that land outside it. Consecutive serials map to scattered
+    plates, and no two serials ever share one. The key must never change once plates are issued.
+    """
+    side = math.isqrt(size - 1) + 1
+    value = serial
+    while True:
+        left, right = divmod(value, side)
+        for round_index in range(PERMUTATION_ROUNDS):
+            left, right = right, (left + _round_value(right, key, round_index, side)) % side
+        value = left * side + right
+        if value < size:
+            return value
+
+
+def _next_serials(region_enum, count, previous=None):
+    """`count` unused serials for the region, ascending."""
+    if db.engine.dialect.name == 'postgresql':
+        # nextval never blocks and is never rolled back, so concurrent registrations cannot collide.
+        values = db.session.execute(
+            db.select(PLATE_SEQUENCES[region_enum].next_value()).select_from(func.generate_series(1, count))
+        ).scalars()
+        return sorted(value - 1 for value in values)
+    if previous is None:
+        previous = db.session.execute(
+            db.select(func.max(LicensePlate.serial)).where(LicensePlate.region_format == region_enum)
+        ).scalar()
+    first = 0 if previous is None else previous + 1
+    return list(range(first, first + count))
+
+
+def _next_serial(region_enum, previous=None):
+    return _next_serials(region_enum, 1, previous)[0]
+
+
 def generate_license_plate_number(region_enum):
     """
-    Generates a license plate number based on the region.
+    Allocates the next plate for the region and reserves it in the license_plates registry
+    (part of the caller's transaction). A per-region serial is mapped through a fixed
+    permutation of the plate namespace, so allocation is O(1) with no lookups per candidate.
+    The only retry is for a plate already held by a vehicle registered before the allocator.
     US: 123-ABC
     EURO: ABC-123
-    Ensures basic uniqueness attempt by checking existing plates.
     """
-    MAX_TRIES = 100 # Max attempts to find a unique plate
-    for _ in range(MAX_TRIES):
-        if region_enum == VehicleRegion.US:
-            numbers = ''.join(random.choices(string.digits, k=3))
-            letters = ''.join(random.choices(string.ascii_uppercase, k=3))
-            plate = f"{numbers}-{letters}"
-        elif region_enum == VehicleRegion.EURO:
-            letters = ''.join(random.choices(string.ascii_uppercase, k=3))
-            numbers = ''.join(random.choices(string.digits, k=3))
-            plate = f"{letters}-{numbers}"
-        else:
-            # Fallback for OTHER_DEFAULT or any unexpected region
-            # Generic format: LLLNNN (L=Letter, N=Number)
-            letters = ''.join(random.choices(string.ascii_uppercase, k=3))
-            numbers = ''.join(random.choices(string.digits, k=3))
-            plate = f"{letters}{numbers}" # e.g., XYZ123
-
-        if not UserVehicle.query.filter_by(license_plate=plate).first() and \
-           not CompanyVehicle.query.filter_by(license_plate=plate).first():
+    template = plate_format(region_enum)
+    size = namespace_size(template)
+    key = f"plates:{template}"
+    serial = None
+    for _ in range(MAX_PLATE_COLLISIONS):
+        serial = _next_serial(region_enum, serial)
+        if serial >= size:
+            current_app.logger.error(f"License plate namespace {template} is exhausted.")
+            break
+        plate = format_plate(template, permute(serial, size, key))
+        try:
+            with db.session.begin_nested():
+                db.session.add(LicensePlate(plate=plate, region_format=region_enum, serial=serial))
+            db.session.info.setdefault('reserved_plates', set()).add(plate)
             return plate
+        except IntegrityError:
+            continue
+    else:
+        current_app.logger.error("Could not allocate a unique license plate after max collisions.")
 
-    current_app.logger.error("Could not generate a unique license plate after max tries.")
-    # Fallback to a more robust unique string if simple random generation fails repeatedly
-    # This indicates a very high number of plates or a flaw in the random generation for the namespace size.
+    # Callers treat ERR- plates as a failed allocation.
     timestamp_ms = int(datetime.utcnow().timestamp() * 1000)
     random_suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
     return f"ERR-{timestamp_ms}-{random_suffix}"[:20] # Ensure it fits in DB field
 
+
+def allocate_license_plates(region_enum, count):
+    """
+    Batch form of generate_license_plate_number for fleet imports: draws the serials for all
+    `count` plates at once, drops the few whose plate a pre-allocator vehicle already holds
+    (one registry lookup per round) and reserves the rest with a single bulk insert. The
+    registry rows are part of the caller's transaction. Returns the plates in serial order,
+    or None if the namespace cannot hold them all.
+    """
+    template = plate_format(region_enum)
+    size = namespace_size(template)
+    key = f"plates:{template}"
+    rows = []
+    previous = None
+    while len(rows) < count:
+        serials = [serial for serial in _next_serials(region_enum, count - len(rows), previous) if serial < size]
+        if not serials:
+            current_app.logger.error(f"License plate namespace {template} is exhausted.")
+            return None
+        previous = serials[-1]
+        candidates = {format_plate(template, permute(serial, size, key)): serial for serial in serials}
+        taken = set()
+        plates = list(candidates)
+        for start in range(0, len(plates), 1000):
+            taken.update(db.session.execute(
+                db.select(LicensePlate.plate).where(LicensePlate.plate.in_(plates[start:start + 1000]))
+            ).scalars())
+        rows.extend({'plate': plate, 'region_format': region_enum, 'serial': serial, 'created_at': datetime.utcnow()}
+                    for plate, serial in candidates.items() if plate not in taken)
+
+    db.session.execute(db.insert(LicensePlate), rows)
+    return [row['plate'] for row in rows]
+
+
+@event.listens_for(Session, 'before_flush')
+def _register_vehicle_plates(session, flush_context, instances):
+    """
+    Every new vehicle, and every vehicle whose plate is edited, takes its plate's row in the
+    registry, whose primary key enforces uniqueness across both vehicle tables. Plates
+    reserved by the allocator in this session already have their row; any other plate
+    (imports, scripts, admin edits) is registered here. A replaced plate keeps its row, as a
+    deleted vehicle's does, so it is never handed out again.
+    """
+    reserved = session.info.get('reserved_plates', set())
+    vehicles = [obj for obj in session.new if isinstance(obj, (UserVehicle, CompanyVehicle))]
+    vehicles.extend(obj for obj in session.dirty
+                    if isinstance(obj, (UserVehicle, CompanyVehicle))
+                    and inspect(obj).attrs.license_plate.history.has_changes())
+    for obj in vehicles:
+        if obj.license_plate in reserved:
+            reserved.discard(obj.license_plate)
+        else:
+            session.add(LicensePlate(plate=obj.license_plate))
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_reserved_plates(session):
+    # Also fires when the allocator's savepoint is released; only the outer commit ends the reservations.
+    if not session.in_nested_transaction():
+        session.info.pop('reserved_plates', None)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_rolled_back_plates(session, previous_transaction):
+    # A savepoint rollback (an allocator collision) leaves the other reservations in place.
+    if not session.in_transaction():
+        session.info.pop('reserved_plates', None)
+
+
 def register_vehicle(user_id, make, model, description, vehicle_type_from_form, region_name_from_form):
     """
     Registers a new vehicle for a user, generating a license plate.
@@ -104,8 +255,9 @@ def get_user_owned_vehicles(user_id):
                             .order_by(UserVehicle.registration_date.desc()).all()
 
 def get_vehicle_by_plate(license_plate_str):
-    """Finds an active vehicle by its license plate."""
-    return UserVehicle.query.filter(UserVehicle.license_plate.ilike(license_plate_str), UserVehicle.is_active==True).first()
+    """Finds an active vehicle by its license plate, ignoring case, dashes and spaces."""
+    key = plate_search_service.normalize_plate(license_plate_str)
+    return UserVehicle.query.filter(plate_search_key(UserVehicle.license_plate) == key, UserVehicle.is_active==True).first()
 
 def deactivate_vehicle(vehicle_id, user_id):
     """Deactivates a vehicle for a specific user."""
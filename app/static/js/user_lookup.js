@@ -0,0 +1,95 @@
+// Username typeahead for inputs marked with data-user-lookup="<search url>".
+// Optional attributes:
+//   data-lookup-target  id of a hidden input that receives the chosen result
+//   data-lookup-value   result key written to the target (default "id")
+(function () {
+    const DEBOUNCE_MS = 200;
+
+    function attach(input) {
+        const target = input.dataset.lookupTarget ? document.getElementById(input.dataset.lookupTarget) : null;
+        const valueKey = input.dataset.lookupValue || 'id';
+        const menu = document.createElement('div');
+        menu.className = 'list-group position-absolute w-100 shadow-sm d-none';
+        menu.style.zIndex = 1050;
+        input.parentNode.style.position = 'relative';
+        input.parentNode.appendChild(menu);
+
+        let timer = null;
+        let pending = null;
+
+        function close() {
+            menu.classList.add('d-none');
+            menu.innerHTML = '';
+        }
+
+        function render(results) {
+            menu.innerHTML = '';
+            if (!results.length) {
+                close();
+                return;
+            }
+            results.forEach(function (user) {
+                const item = document.createElement('button');
+                item.type = 'button';
+                item.className = 'list-group-item list-group-item-action d-flex justify-content-between';
+                item.textContent = user.username;
+                const role = document.createElement('small');
+                role.className = 'text-muted';
+                role.textContent = user.role;
+                item.appendChild(role);
+                item.addEventListener('mousedown', function (event) {
+                    // mousedown fires before the input's blur closes the menu.
+                    event.preventDefault();
+                    input.value = user.username;
+                    if (target) {
+                        target.value = user[valueKey];
+                    }
+                    close();
+                });
+                menu.appendChild(item);
+            });
+            menu.classList.remove('d-none');
+        }
+
+        function search() {
+            const text = input.value.trim();
+            if (pending) {
+                pending.abort();
+            }
+            if (!text) {
+                close();
+                return;
+            }
+            pending = new AbortController();
+            const url = new URL(input.dataset.userLookup, window.location.origin);
+            url.searchParams.set('q', text);
+            fetch(url, { signal: pending.signal, headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(data => render(data.results || []))
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('Error searching users:', error);
+                    }
+                });
+        }
+
+        input.addEventListener('input', function () {
+            // Typing invalidates an earlier pick until a result is chosen again.
+            if (target) {
+                target.value = '';
+            }
+            clearTimeout(timer);
+            timer = setTimeout(search, DEBOUNCE_MS);
+        });
+        input.addEventListener('blur', close);
+        input.addEventListener('keydown', function (event) {
+            if (event.key === 'Escape') {
+                close();
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('input[data-user-lookup]').forEach(attach);
+    });
+})();
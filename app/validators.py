@@ -1,6 +1,7 @@
 
 from wtforms.validators import ValidationError
-from app.models import User, UserVehicle
+from app import db
+from app.models import User, LicensePlate
 import re
 
 def unique_username(form, field):
@@ -16,9 +17,8 @@ def unique_email(form, field):
         raise ValidationError('Email already registered.')
 
 def unique_license_plate(form, field):
-    """Validate license plate is unique"""
-    vehicle = UserVehicle.query.filter_by(license_plate=field.data).first()
-    if vehicle:
+    """Validate license plate is unique across user and company vehicles"""
+    if db.session.get(LicensePlate, field.data):
         raise ValidationError('License plate already registered.')
 
 def strong_password(form, field):
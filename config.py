@@ -36,6 +36,13 @@ class Config:
     LIVEMAP_REMOTE_PATH_STATIC = os.environ.get('LIVEMAP_REMOTE_PATH_STATIC', '/path/on/game/server/modSettings/livemap_static.xml')
     LIVEMAP_LOCAL_PATH_DYNAMIC = os.environ.get('LIVEMAP_LOCAL_PATH_DYNAMIC', 'data/livemap_dynamic.xml')
     LIVEMAP_LOCAL_PATH_STATIC = os.environ.get('LIVEMAP_LOCAL_PATH_STATIC', 'data/livemap_static.xml')
+    LIVEMAP_CACHE_SECONDS = int(os.environ.get('LIVEMAP_CACHE_SECONDS', 15))
+
+    # Savegame Ingestion (SCP reuses the LIVEMAP_REMOTE_* connection settings)
+    SAVEGAME_ACCESS_METHOD = os.environ.get('SAVEGAME_ACCESS_METHOD', 'LOCAL_PATH')
+    SAVEGAME_LOCAL_DIR = os.environ.get('SAVEGAME_LOCAL_DIR', 'data/savegame1')
+    SAVEGAME_REMOTE_DIR = os.environ.get('SAVEGAME_REMOTE_DIR', '/path/on/game/server/savegame1')
+    SAVEGAME_VEHICLE_REGION = os.environ.get('SAVEGAME_VEHICLE_REGION', 'US')
 
     # Auction House Settings
     AUCTION_DEFAULT_DURATION_HOURS = int(os.environ.get('AUCTION_DEFAULT_DURATION_HOURS', 24))
@@ -44,6 +51,65 @@ class Config:
     AUCTION_DEFAULT_MIN_BID_INCREMENT = float(os.environ.get('AUCTION_DEFAULT_MIN_BID_INCREMENT', 1.0))
     AUCTION_JOB_RUN_INTERVAL_SECONDS = int(os.environ.get('AUCTION_JOB_RUN_INTERVAL_SECONDS', 60))
 
+    # Site Statistics
+    # Newest transaction ids whose revenue is re-summed on every stats refresh (late commits).
+    SITE_STATS_REVENUE_RESCAN_IDS = int(os.environ.get('SITE_STATS_REVENUE_RESCAN_IDS', 10000))
+    DASHBOARD_CACHE_SECONDS = int(os.environ.get('DASHBOARD_CACHE_SECONDS', 30))
+    # Where per-worker caches share their version tokens (use a redis:// URL with several workers)
+    CACHE_VERSION_STORAGE_URL = os.environ.get('CACHE_VERSION_STORAGE_URL', 'memory://')
+
+    # Request Profiling
+    REQUEST_PROFILING_ENABLED = os.environ.get('REQUEST_PROFILING_ENABLED', 'true').lower() == 'true'
+    SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 500))
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+    REQUEST_QUERY_COUNT_THRESHOLD = int(os.environ.get('REQUEST_QUERY_COUNT_THRESHOLD', 25))
+
+    # Prometheus Metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN')
+
+    # Health Probes
+    READINESS_CACHE_SECONDS = float(os.environ.get('READINESS_CACHE_SECONDS', 2))
+    READINESS_DB_TIMEOUT_MS = int(os.environ.get('READINESS_DB_TIMEOUT_MS', 1000))
+    SCHEDULER_HEARTBEAT_MAX_AGE_SECONDS = int(os.environ.get('SCHEDULER_HEARTBEAT_MAX_AGE_SECONDS', 900))
+    LIVEMAP_MAX_STALENESS_SECONDS = int(os.environ.get('LIVEMAP_MAX_STALENESS_SECONDS', 300))
+
+    # Rate Limiting (use a redis:// URL so all gunicorn workers share the same counters)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL', 'memory://')
+    RATE_LIMIT_MAX_MEMORY_KEYS = int(os.environ.get('RATE_LIMIT_MAX_MEMORY_KEYS', 10000))
+    RATE_LIMIT_FS25_REQUESTS = int(os.environ.get('RATE_LIMIT_FS25_REQUESTS', 120))
+    RATE_LIMIT_FS25_INVENTORY_REQUESTS = int(os.environ.get('RATE_LIMIT_FS25_INVENTORY_REQUESTS', 10))
+    RATE_LIMIT_FS25_PURCHASE_REQUESTS = int(os.environ.get('RATE_LIMIT_FS25_PURCHASE_REQUESTS', 60))
+    RATE_LIMIT_FS25_WINDOW_SECONDS = int(os.environ.get('RATE_LIMIT_FS25_WINDOW_SECONDS', 60))
+    # Failed FS25 API key checks allowed per client IP and window before it is refused outright.
+    RATE_LIMIT_FS25_AUTH_FAILURES = int(os.environ.get('RATE_LIMIT_FS25_AUTH_FAILURES', 10))
+
+    # Reverse proxies in front of the app (Render's load balancer is one). X-Forwarded-For and
+    # X-Forwarded-Proto are only trusted for this many hops; set 0 when clients connect directly.
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 1))
+
+    # FS25 API Keys
+    FS25_API_KEYS_REQUIRED = os.environ.get('FS25_API_KEYS_REQUIRED', 'true').lower() == 'true'
+    API_KEY_CACHE_SECONDS = int(os.environ.get('API_KEY_CACHE_SECONDS', 300))
+    API_KEY_CACHE_SIZE = int(os.environ.get('API_KEY_CACHE_SIZE', 256))
+    IDEMPOTENCY_KEY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_KEY_TTL_SECONDS', 86400))
+    IDEMPOTENCY_KEY_REQUIRED = os.environ.get('IDEMPOTENCY_KEY_REQUIRED', 'false').lower() == 'true'
+    # How long a request may hold a key before a retry can take it over; keep it above the worker timeout.
+    IDEMPOTENCY_CLAIM_LEASE_SECONDS = int(os.environ.get('IDEMPOTENCY_CLAIM_LEASE_SECONDS', 120))
+
+    # Admin Reports (the directory must be shared by the web service and the report worker)
+    REPORT_STORAGE_DIR = os.environ.get('REPORT_STORAGE_DIR')
+    REPORT_RETENTION_DAYS = int(os.environ.get('REPORT_RETENTION_DAYS', 7))
+    # A RUNNING job that commits no progress for this long is failed as abandoned by its worker.
+    REPORT_JOB_LEASE_SECONDS = int(os.environ.get('REPORT_JOB_LEASE_SECONDS', 900))
+
+    # Ledger Reconciliation
+    RECONCILIATION_TOLERANCE = os.environ.get('RECONCILIATION_TOLERANCE', '0.00')
+
+    # Account Statements (archived month-end statements; shared by the web service and the statement job)
+    STATEMENT_STORAGE_DIR = os.environ.get('STATEMENT_STORAGE_DIR')
+
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
@@ -0,0 +1,21 @@
+# gunicorn picks this file up automatically from the working directory.
+import os
+import shutil
+import tempfile
+
+# Share Prometheus metrics between workers: each worker writes to files in this directory
+# and /metrics merges them. It must be set before the app (and prometheus_client) is imported.
+_multiproc_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'dixieland_metrics')
+)
+
+
+def on_starting(server):
+    # Start each deploy with an empty directory so stale worker files don't inflate counters.
+    shutil.rmtree(_multiproc_dir, ignore_errors=True)
+    os.makedirs(_multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,34 @@
+"""Add balance_snapshots table
+
+Revision ID: 0b7e4a1d93c8
+Revises: f2a6b9c04d71
+Create Date: 2026-10-19 20:37:52.180664
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7e4a1d93c8'
+down_revision = 'f2a6b9c04d71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('balance_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('as_of', sa.DateTime(), nullable=False),
+    sa.Column('ledger_balance', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('account_balance', sa.Numeric(precision=14, scale=2), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id', 'as_of', name='uq_balance_snapshots_account_id_as_of')
+    )
+
+
+def downgrade():
+    op.drop_table('balance_snapshots')
@@ -0,0 +1,34 @@
+"""Add site_stats table
+
+Revision ID: 26807051e503
+Revises: 402f6320fd0c
+Create Date: 2026-10-19 09:12:40.318514
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '26807051e503'
+down_revision = '402f6320fd0c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('site_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('total_users', sa.Integer(), nullable=False),
+    sa.Column('open_tickets', sa.Integer(), nullable=False),
+    sa.Column('pending_permits', sa.Integer(), nullable=False),
+    sa.Column('insurance_claims', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('revenue_last_transaction_id', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('site_stats')
@@ -0,0 +1,76 @@
+"""Add composite and partial indexes for hot query patterns
+
+Replaces scripts/add_database_indexes.py. On PostgreSQL the indexes are built with
+CREATE INDEX CONCURRENTLY outside the migration transaction, so writes are not blocked
+while they build. If a concurrent build fails it leaves an INVALID index behind: drop it
+and run the upgrade again.
+
+Revision ID: 4f8e2c6a1b57
+Revises: 9d3f6c2b8a41
+Create Date: 2026-10-19 23:05:41.772910
+
+"""
+from contextlib import nullcontext
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8e2c6a1b57'
+down_revision = '9d3f6c2b8a41'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_accounts_user_id_is_company', 'accounts', ['user_id', 'is_company'], None),
+    ('ix_tickets_issued_to_user_id_status_issue_date', 'tickets', ['issued_to_user_id', 'status', 'issue_date'], None),
+    ('ix_tickets_issued_by_officer_id_issue_date', 'tickets', ['issued_by_officer_id', 'issue_date'], None),
+    ('ix_tickets_issue_date', 'tickets', ['issue_date'], None),
+    ('ix_permit_applications_user_id_application_date', 'permit_applications', ['user_id', 'application_date'], None),
+    ('ix_permit_applications_status_application_date', 'permit_applications', ['status', 'application_date'], None),
+    ('ix_marketplace_listings_status_creation_date', 'marketplace_listings', ['status', 'creation_date'], None),
+    ('ix_inspections_officer_user_id_timestamp', 'inspections', ['officer_user_id', 'timestamp'], None),
+    ('ix_conversations_user_id_last_message_time', 'conversations', ['user_id', 'last_message_time'], None),
+    ('ix_conversations_user_id_unread', 'conversations', ['user_id'], 'user_has_unread'),
+    ('ix_conversations_admin_id_unread', 'conversations', ['admin_id'], 'admin_has_unread'),
+    ('ix_messages_conversation_id_timestamp', 'messages', ['conversation_id', 'timestamp'], None),
+    ('ix_notifications_user_id_is_read_created_at', 'notifications', ['user_id', 'is_read', sa.text('created_at DESC')], None),
+    ('ix_auction_items_status_current_end_time', 'auction_items', ['status', 'current_end_time'], None),
+    ('ix_auction_bids_auction_item_id_bid_amount', 'auction_bids', ['auction_item_id', 'bid_amount'], None),
+    ('ix_silo_storage_farmer_id_crop_type', 'silo_storage', ['farmer_id', 'crop_type'], None),
+]
+
+# Created by the old add_database_indexes.py script, outside of migrations; each one is
+# covered by an index above (or by ix_transactions_type_timestamp_id).
+LEGACY_INDEXES = [
+    ('idx_tickets_status_date', 'tickets'),
+    ('idx_transactions_type_timestamp', 'transactions'),
+    ('idx_marketplace_status_creation', 'marketplace_listings'),
+    ('idx_notifications_user_read', 'notifications'),
+    ('idx_auctions_status_end_time', 'auction_items'),
+    ('idx_permits_status_app_date', 'permit_applications'),
+]
+
+
+def _outside_transaction():
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+    if op.get_bind().dialect.name == 'postgresql':
+        return op.get_context().autocommit_block()
+    return nullcontext()
+
+
+def upgrade():
+    with _outside_transaction():
+        for name, table, columns, where in INDEXES:
+            predicate = sa.text(where) if where else None
+            op.create_index(name, table, columns, unique=False, if_not_exists=True,
+                            postgresql_concurrently=True, postgresql_where=predicate, sqlite_where=predicate)
+        for name, table in LEGACY_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with _outside_transaction():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,28 @@
+"""Add game_vehicle_id to company_vehicles for fleet imports
+
+Revision ID: 5a2d8f0c7e19
+Revises: b1c7e9d2a6f3
+Create Date: 2026-10-20 10:32:47.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a2d8f0c7e19'
+down_revision = 'b1c7e9d2a6f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('company_vehicles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('game_vehicle_id', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_company_vehicles_company_game_vehicle', ['company_id', 'game_vehicle_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('company_vehicles', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_company_vehicles_company_game_vehicle', type_='unique')
+        batch_op.drop_column('game_vehicle_id')
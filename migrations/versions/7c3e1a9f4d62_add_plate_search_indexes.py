@@ -0,0 +1,57 @@
+"""Add normalised license plate indexes for plate search
+
+Both vehicle tables get a btree on the normalised plate key (upper case, no dashes or
+spaces) for exact and prefix lookups, and on PostgreSQL a pg_trgm GIN index on the same
+expression for fuzzy matches. The expression must stay identical to
+app.models.plate_search_key or the planner will not use these indexes. On PostgreSQL
+they are built CONCURRENTLY; if a build fails, drop the INVALID index and run the
+upgrade again.
+
+Revision ID: 7c3e1a9f4d62
+Revises: 5a2d8f0c7e19
+Create Date: 2026-10-20 14:06:19.504831
+
+"""
+from contextlib import nullcontext
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e1a9f4d62'
+down_revision = '5a2d8f0c7e19'
+branch_labels = None
+depends_on = None
+
+TABLES = ['user_vehicles', 'company_vehicles']
+PLATE_KEY = "upper(replace(replace(license_plate, '-', ''), ' ', ''))"
+
+
+def _outside_transaction():
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+    if op.get_bind().dialect.name == 'postgresql':
+        return op.get_context().autocommit_block()
+    return nullcontext()
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    if postgres:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    with _outside_transaction():
+        for table in TABLES:
+            if postgres:
+                op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_plate_key '
+                           f'ON {table} ({PLATE_KEY} text_pattern_ops)')
+                op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_plate_key_trgm '
+                           f'ON {table} USING gin ({PLATE_KEY} gin_trgm_ops)')
+            else:
+                op.create_index(f'ix_{table}_plate_key', table, [sa.text(PLATE_KEY)], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with _outside_transaction():
+        for table in reversed(TABLES):
+            op.drop_index(f'ix_{table}_plate_key_trgm', table_name=table, if_exists=True, postgresql_concurrently=True)
+            op.drop_index(f'ix_{table}_plate_key', table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,29 @@
+"""Add job_heartbeats table
+
+Revision ID: 7c41d2e9a0b3
+Revises: 26807051e503
+Create Date: 2026-10-19 17:40:12.604217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c41d2e9a0b3'
+down_revision = '26807051e503'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_heartbeats',
+    sa.Column('job_name', sa.String(length=64), nullable=False),
+    sa.Column('last_success_at', sa.DateTime(), nullable=False),
+    sa.Column('last_rows', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('job_name')
+    )
+
+
+def downgrade():
+    op.drop_table('job_heartbeats')
@@ -0,0 +1,39 @@
+"""Add account_statements table
+
+Revision ID: 9d3f6c2b8a41
+Revises: 0b7e4a1d93c8
+Create Date: 2026-10-19 22:14:06.318257
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3f6c2b8a41'
+down_revision = '0b7e4a1d93c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('account_statements',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('period_start', sa.DateTime(), nullable=False),
+    sa.Column('period_end', sa.DateTime(), nullable=False),
+    sa.Column('opening_balance', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('closing_balance', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('total_credits', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('total_debits', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.Column('formats', sa.String(length=50), nullable=False),
+    sa.Column('generated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id', 'period_start', name='uq_account_statements_account_id_period_start')
+    )
+
+
+def downgrade():
+    op.drop_table('account_statements')
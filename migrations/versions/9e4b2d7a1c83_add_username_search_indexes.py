@@ -0,0 +1,53 @@
+"""Add lower(username) indexes for the user typeahead
+
+A btree on lower(username) serves case-insensitive exact and prefix lookups, and on
+PostgreSQL a pg_trgm GIN index on the same expression serves substring matches. The
+expression must stay identical to the one in app.services.user_search_service or the
+planner will not use these indexes. On PostgreSQL they are built CONCURRENTLY; if a
+build fails, drop the INVALID index and run the upgrade again.
+
+Revision ID: 9e4b2d7a1c83
+Revises: 7c3e1a9f4d62
+Create Date: 2026-10-20 16:41:07.218564
+
+"""
+from contextlib import nullcontext
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4b2d7a1c83'
+down_revision = '7c3e1a9f4d62'
+branch_labels = None
+depends_on = None
+
+USERNAME_KEY = 'lower(username)'
+
+
+def _outside_transaction():
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+    if op.get_bind().dialect.name == 'postgresql':
+        return op.get_context().autocommit_block()
+    return nullcontext()
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    if postgres:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    with _outside_transaction():
+        if postgres:
+            op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_username_lower '
+                       f'ON users ({USERNAME_KEY} text_pattern_ops)')
+            op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_username_lower_trgm '
+                       f'ON users USING gin ({USERNAME_KEY} gin_trgm_ops)')
+        else:
+            op.create_index('ix_users_username_lower', 'users', [sa.text(USERNAME_KEY)], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with _outside_transaction():
+        op.drop_index('ix_users_username_lower_trgm', table_name='users', if_exists=True, postgresql_concurrently=True)
+        op.drop_index('ix_users_username_lower', table_name='users', if_exists=True, postgresql_concurrently=True)
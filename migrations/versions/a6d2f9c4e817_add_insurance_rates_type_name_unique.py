@@ -0,0 +1,32 @@
+"""Make insurance rates unique per type and name
+
+The boot-time seeder re-added the default rates whenever there were four or fewer rows, so
+most databases hold copies of them. The oldest row of each (rate_type, name) group is kept
+and the others are deleted (nothing references insurance_rates). The unique constraint then
+backs the idempotent seeding done by `flask bootstrap`.
+
+Revision ID: a6d2f9c4e817
+Revises: f4c8a1d6b392
+Create Date: 2026-10-23 09:12:40.318562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2f9c4e817'
+down_revision = 'f4c8a1d6b392'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("DELETE FROM insurance_rates WHERE id NOT IN (SELECT min(id) FROM insurance_rates GROUP BY rate_type, name)")
+    with op.batch_alter_table('insurance_rates', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_insurance_rates_type_name', ['rate_type', 'name'])
+
+
+def downgrade():
+    with op.batch_alter_table('insurance_rates', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_insurance_rates_type_name', type_='unique')
@@ -0,0 +1,56 @@
+"""Add license_plates registry and plate sequences
+
+Every plate held by a user or company vehicle gets a row here, so the primary key keeps
+plates unique across both tables. Existing plates are backfilled without a serial; on
+PostgreSQL the allocator draws serials from one sequence per region.
+
+Revision ID: b1c7e9d2a6f3
+Revises: 4f8e2c6a1b57
+Create Date: 2026-10-19 23:48:12.604381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1c7e9d2a6f3'
+down_revision = '4f8e2c6a1b57'
+branch_labels = None
+depends_on = None
+
+SEQUENCES = ['license_plate_us_seq', 'license_plate_euro_seq']
+
+
+def upgrade():
+    op.create_table('license_plates',
+    sa.Column('plate', sa.String(length=20), nullable=False),
+    sa.Column('region_format', postgresql.ENUM('US', 'EURO', name='vehicleregion', create_type=False), nullable=True),
+    sa.Column('serial', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('plate')
+    )
+    with op.batch_alter_table('license_plates', schema=None) as batch_op:
+        batch_op.create_index('ix_license_plates_region_format_serial', ['region_format', 'serial'], unique=False)
+
+    op.execute(
+        "INSERT INTO license_plates (plate, created_at) "
+        "SELECT license_plate, CURRENT_TIMESTAMP FROM "
+        "(SELECT license_plate FROM user_vehicles UNION SELECT license_plate FROM company_vehicles) AS plates"
+    )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        for name in SEQUENCES:
+            op.execute(sa.schema.CreateSequence(sa.Sequence(name, start=1)))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for name in SEQUENCES:
+            op.execute(sa.schema.DropSequence(sa.Sequence(name)))
+
+    with op.batch_alter_table('license_plates', schema=None) as batch_op:
+        batch_op.drop_index('ix_license_plates_region_format_serial')
+
+    op.drop_table('license_plates')
@@ -0,0 +1,39 @@
+"""Make transactions.timestamp NOT NULL
+
+The ledger's keyset cursor is (timestamp, id), so a legacy row without a timestamp broke
+paging. Such rows get the timestamp of the nearest earlier transaction (ids follow insert
+order), or the oldest one when none precedes them. They were never part of a balance
+snapshot (those sum timestamp < as_of), and placing them at or before their neighbours
+keeps it that way for every snapshot already taken.
+
+Revision ID: b5f1d8e3a294
+Revises: d7a4c2e9f160
+Create Date: 2026-10-24 14:21:47.530918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5f1d8e3a294'
+down_revision = 'd7a4c2e9f160'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "UPDATE transactions SET timestamp = COALESCE("
+        "(SELECT max(earlier.timestamp) FROM transactions earlier WHERE earlier.id < transactions.id), "
+        "(SELECT min(oldest.timestamp) FROM transactions oldest), "
+        "CURRENT_TIMESTAMP) "
+        "WHERE timestamp IS NULL"
+    )
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=True)
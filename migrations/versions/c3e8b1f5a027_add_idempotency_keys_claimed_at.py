@@ -0,0 +1,33 @@
+"""Add claimed_at to idempotency_keys
+
+A pending key stayed claimed until it expired when the worker handling it died before
+storing the response, so every retry got 409 for the whole TTL. claimed_at lets a retry
+take over a claim older than the lease. Existing rows were claimed when they were created.
+
+Revision ID: c3e8b1f5a027
+Revises: a6d2f9c4e817
+Create Date: 2026-10-24 10:05:31.847219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8b1f5a027'
+down_revision = 'a6d2f9c4e817'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE idempotency_keys SET claimed_at = created_at")
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.alter_column('claimed_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.drop_column('claimed_at')
@@ -0,0 +1,76 @@
+"""Add full-text search to marketplace listings
+
+On PostgreSQL, a generated tsvector column (item name weighted above description) with a
+GIN index; the index is built CONCURRENTLY, so if the build fails, drop the INVALID index
+and run the upgrade again. On SQLite, an external-content FTS5 table kept in sync by
+triggers, filled from the existing listings. Both definitions must stay identical to those
+in app.models (LISTING_SEARCH_VECTOR and LISTING_FTS_DDL).
+
+Revision ID: c5f1a8e3d290
+Revises: 9e4b2d7a1c83
+Create Date: 2026-10-21 09:12:44.630172
+
+"""
+from contextlib import nullcontext
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f1a8e3d290'
+down_revision = '9e4b2d7a1c83'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR = ("setweight(to_tsvector('english', coalesce(item_name, '')), 'A') || "
+                 "setweight(to_tsvector('english', coalesce(description, '')), 'B')")
+FTS_TABLE = 'marketplace_listings_fts'
+FTS_TRIGGERS = ['marketplace_listings_fts_insert', 'marketplace_listings_fts_delete', 'marketplace_listings_fts_update']
+FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "item_name, description, content='marketplace_listings', content_rowid='id', tokenize='porter unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS marketplace_listings_fts_insert AFTER INSERT ON marketplace_listings BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, item_name, description) VALUES (new.id, new.item_name, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS marketplace_listings_fts_delete AFTER DELETE ON marketplace_listings BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, item_name, description) "
+    "VALUES ('delete', old.id, old.item_name, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS marketplace_listings_fts_update AFTER UPDATE OF item_name, description ON marketplace_listings BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, item_name, description) "
+    "VALUES ('delete', old.id, old.item_name, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, item_name, description) VALUES (new.id, new.item_name, new.description); END",
+]
+
+
+def _outside_transaction():
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+    if op.get_bind().dialect.name == 'postgresql':
+        return op.get_context().autocommit_block()
+    return nullcontext()
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Adding a stored generated column rewrites the table once to fill it.
+        op.execute('ALTER TABLE marketplace_listings ADD COLUMN IF NOT EXISTS search_vector tsvector '
+                   f'GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED')
+        with _outside_transaction():
+            op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_marketplace_listings_search_vector '
+                       'ON marketplace_listings USING gin (search_vector)')
+    elif dialect == 'sqlite':
+        for statement in FTS_DDL:
+            op.execute(statement)
+        op.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        with _outside_transaction():
+            op.drop_index('ix_marketplace_listings_search_vector', table_name='marketplace_listings',
+                          if_exists=True, postgresql_concurrently=True)
+        op.execute('ALTER TABLE marketplace_listings DROP COLUMN IF EXISTS search_vector')
+    elif dialect == 'sqlite':
+        for trigger in FTS_TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
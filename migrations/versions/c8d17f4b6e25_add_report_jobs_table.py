@@ -0,0 +1,50 @@
+"""Add report_jobs table
+
+Revision ID: c8d17f4b6e25
+Revises: 5a9c3e7d2f10
+Create Date: 2026-10-19 19:20:44.871053
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8d17f4b6e25'
+down_revision = '5a9c3e7d2f10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('report_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('requested_by_user_id', sa.Integer(), nullable=False),
+    sa.Column('report_type', sa.String(length=50), nullable=False),
+    sa.Column('format', sa.String(length=10), nullable=False),
+    sa.Column('filters', sa.Text(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='reportjobstatus'), nullable=False),
+    sa.Column('total_rows', sa.Integer(), nullable=True),
+    sa.Column('rows_written', sa.Integer(), nullable=False),
+    sa.Column('artifact_path', sa.String(length=512), nullable=True),
+    sa.Column('artifact_size', sa.BigInteger(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['requested_by_user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('report_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_report_jobs_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_report_jobs_requested_by_user_id'), ['requested_by_user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_report_jobs_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('report_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_report_jobs_status'))
+        batch_op.drop_index(batch_op.f('ix_report_jobs_requested_by_user_id'))
+        batch_op.drop_index(batch_op.f('ix_report_jobs_created_at'))
+
+    op.drop_table('report_jobs')
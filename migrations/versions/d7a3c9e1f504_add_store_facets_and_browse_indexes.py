@@ -0,0 +1,49 @@
+"""Add store_facets table and store browser indexes
+
+store_facets holds the item count per brand and per category, rebuilt with every FS25
+inventory push; it is filled here from the current catalog.
+
+Revision ID: d7a3c9e1f504
+Revises: c5f1a8e3d290
+Create Date: 2026-10-21 15:37:52.904118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3c9e1f504'
+down_revision = 'c5f1a8e3d290'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('store_facets',
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=100), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'value')
+    )
+    with op.batch_alter_table('store_items', schema=None) as batch_op:
+        batch_op.create_index('ix_store_items_brand_name', ['brand', 'name'], unique=False)
+        batch_op.create_index('ix_store_items_category_price', ['category', 'price'], unique=False)
+        batch_op.create_index('ix_store_items_price', ['price'], unique=False)
+
+    for kind in ('brand', 'category'):
+        op.execute(
+            f"INSERT INTO store_facets (kind, value, item_count, computed_at) "
+            f"SELECT '{kind}', {kind}, count(*), CURRENT_TIMESTAMP FROM store_items "
+            f"WHERE {kind} IS NOT NULL AND {kind} != '' GROUP BY {kind}"
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('store_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_store_items_price')
+        batch_op.drop_index('ix_store_items_category_price')
+        batch_op.drop_index('ix_store_items_brand_name')
+
+    op.drop_table('store_facets')
@@ -0,0 +1,34 @@
+"""Add revenue_settled to site_stats
+
+Transaction ids are allocated at insert, not at commit, so folding revenue in above a
+watermark on the newest id missed transactions that committed late. The refresh now keeps
+a settled total below a trailing watermark and re-sums the newest ids on every run. Existing
+totals covered exactly the rows up to the watermark, so they become the settled total.
+
+Revision ID: d7a4c2e9f160
+Revises: c3e8b1f5a027
+Create Date: 2026-10-24 11:38:02.164953
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a4c2e9f160'
+down_revision = 'c3e8b1f5a027'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('site_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revenue_settled', sa.Numeric(precision=14, scale=2), nullable=True))
+    op.execute("UPDATE site_stats SET revenue_settled = revenue")
+    with op.batch_alter_table('site_stats', schema=None) as batch_op:
+        batch_op.alter_column('revenue_settled', existing_type=sa.Numeric(precision=14, scale=2), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('site_stats', schema=None) as batch_op:
+        batch_op.drop_column('revenue_settled')
@@ -0,0 +1,39 @@
+"""Add api_keys table
+
+Revision ID: e3b5f08a19c4
+Revises: 7c41d2e9a0b3
+Create Date: 2026-10-19 18:05:31.227904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b5f08a19c4'
+down_revision = '7c41d2e9a0b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('api_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('prefix', sa.String(length=16), nullable=False),
+    sa.Column('key_hash', sa.String(length=256), nullable=False),
+    sa.Column('scopes', sa.String(length=255), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('revoked_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('api_keys', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_api_keys_prefix'), ['prefix'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('api_keys', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_api_keys_prefix'))
+
+    op.drop_table('api_keys')
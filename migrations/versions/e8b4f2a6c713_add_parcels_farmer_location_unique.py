@@ -0,0 +1,37 @@
+"""Make parcels unique per farmer and farmland id
+
+Farmland imports used to add every parcel again on re-import. Duplicates are merged first:
+the oldest row of each (farmer_id, location) group is kept, marked validated if any copy
+was, and the others are deleted. The unique constraint then backs the import's upsert.
+
+Revision ID: e8b4f2a6c713
+Revises: d7a3c9e1f504
+Create Date: 2026-10-22 10:24:18.553091
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b4f2a6c713'
+down_revision = 'd7a3c9e1f504'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "UPDATE parcels SET validated = true "
+        "WHERE id IN (SELECT min(id) FROM parcels GROUP BY farmer_id, location HAVING count(*) > 1) "
+        "AND EXISTS (SELECT 1 FROM parcels AS other WHERE other.farmer_id = parcels.farmer_id "
+        "AND other.location = parcels.location AND other.validated = true)"
+    )
+    op.execute("DELETE FROM parcels WHERE id NOT IN (SELECT min(id) FROM parcels GROUP BY farmer_id, location)")
+    with op.batch_alter_table('parcels', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_parcels_farmer_location', ['farmer_id', 'location'])
+
+
+def downgrade():
+    with op.batch_alter_table('parcels', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_parcels_farmer_location', type_='unique')
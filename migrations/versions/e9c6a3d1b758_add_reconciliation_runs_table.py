@@ -0,0 +1,36 @@
+"""Add reconciliation_runs table
+
+Revision ID: e9c6a3d1b758
+Revises: b5f1d8e3a294
+Create Date: 2026-10-24 16:03:12.648301
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9c6a3d1b758'
+down_revision = 'b5f1d8e3a294'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reconciliation_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('checked_at', sa.DateTime(), nullable=False),
+    sa.Column('drifted_count', sa.Integer(), nullable=False),
+    sa.Column('total_drift', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('drifted_accounts', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('reconciliation_runs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_reconciliation_runs_checked_at'), ['checked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reconciliation_runs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_reconciliation_runs_checked_at'))
+
+    op.drop_table('reconciliation_runs')
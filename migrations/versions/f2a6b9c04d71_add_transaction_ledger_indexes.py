@@ -0,0 +1,49 @@
+"""Add transaction ledger composite indexes
+
+transactions is the largest and most written table, so on PostgreSQL the indexes are built
+with CREATE INDEX CONCURRENTLY outside the migration transaction and writes carry on while
+they build. If a concurrent build fails it leaves an INVALID index behind: drop it and run
+the upgrade again.
+
+Revision ID: f2a6b9c04d71
+Revises: c8d17f4b6e25
+Create Date: 2026-10-19 20:02:17.339481
+
+"""
+from contextlib import nullcontext
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6b9c04d71'
+down_revision = 'c8d17f4b6e25'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_transactions_timestamp_id', ['timestamp', 'id']),
+    ('ix_transactions_account_id_timestamp_id', ['account_id', 'timestamp', 'id']),
+    ('ix_transactions_type_timestamp_id', ['type', 'timestamp', 'id']),
+]
+
+
+def _outside_transaction():
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+    if op.get_bind().dialect.name == 'postgresql':
+        return op.get_context().autocommit_block()
+    return nullcontext()
+
+
+def upgrade():
+    with _outside_transaction():
+        for name, columns in INDEXES:
+            op.create_index(name, 'transactions', columns, unique=False, if_not_exists=True,
+                            postgresql_concurrently=True)
+
+
+def downgrade():
+    with _outside_transaction():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='transactions', if_exists=True, postgresql_concurrently=True)
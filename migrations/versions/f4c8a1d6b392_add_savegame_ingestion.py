@@ -0,0 +1,37 @@
+"""Add savegame_files table and farmers.game_farm_id
+
+Revision ID: f4c8a1d6b392
+Revises: e8b4f2a6c713
+Create Date: 2026-10-22 17:48:31.076245
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c8a1d6b392'
+down_revision = 'e8b4f2a6c713'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('savegame_files',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ingested_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    with op.batch_alter_table('farmers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('game_farm_id', sa.Integer(), nullable=True))
+        batch_op.create_unique_constraint('uq_farmers_game_farm_id', ['game_farm_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('farmers', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_farmers_game_farm_id', type_='unique')
+        batch_op.drop_column('game_farm_id')
+
+    op.drop_table('savegame_files')
@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+"""
+Issues or revokes API keys for the FS25 game server endpoints.
+
+    python scripts/manage_api_keys.py create "Main server" --scopes sync store:inventory store:purchase
+    python scripts/manage_api_keys.py revoke <prefix>
+    python scripts/manage_api_keys.py list
+"""
+
+import argparse
+from app import create_app
+from app.models import ApiKey
+from app.services import api_key_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    create = subparsers.add_parser('create')
+    create.add_argument('name')
+    create.add_argument('--scopes', nargs='+', default=list(api_key_service.ALL_SCOPES),
+                        choices=api_key_service.ALL_SCOPES)
+    revoke = subparsers.add_parser('revoke')
+    revoke.add_argument('prefix')
+    subparsers.add_parser('list')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.command == 'create':
+            api_key, raw_key = api_key_service.generate_api_key(args.name, args.scopes)
+            print(f"Created key '{api_key.name}' with scopes: {api_key.scopes}")
+            print(f"API key (shown once, send it as the X-API-Key header): {raw_key}")
+        elif args.command == 'revoke':
+            api_key = api_key_service.revoke_api_key(args.prefix)
+            if not api_key:
+                print(f"No API key with prefix {args.prefix}.")
+                sys.exit(1)
+            print(f"Revoked key '{api_key.name}'. Other workers drop it within API_KEY_CACHE_SECONDS.")
+        else:
+            for api_key in ApiKey.query.order_by(ApiKey.created_at).all():
+                state = 'active' if api_key.is_active else f"revoked {api_key.revoked_at}"
+                print(f"{api_key.prefix}  {api_key.name}  [{api_key.scopes}]  {state}")
+
+
+if __name__ == '__main__':
+    main()
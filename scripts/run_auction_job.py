@@ -10,7 +10,7 @@ from app.jobs.auctions import close_completed_auctions_job # Corrected import pa
 import os
 
 if __name__ == "__main__":
-    app = create_app()
+    app = create_app(minimal=True)
 
     with app.app_context():
         print("Starting scheduled run of auction closing job...")
@@ -0,0 +1,20 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# This script is intended to be run by a Render Cron Job (e.g. hourly).
+
+from app import create_app
+from app.jobs.idempotency import purge_idempotency_keys_job
+
+if __name__ == "__main__":
+    app = create_app(minimal=True)
+
+    with app.app_context():
+        try:
+            purge_idempotency_keys_job()
+        except Exception as e:
+            app.logger.error(f"Error during idempotency key purge: {e}", exc_info=True)
+            print(f"ERROR during idempotency key purge: {e}")
+
+    print("Idempotency purge job script finished.")
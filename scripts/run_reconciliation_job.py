@@ -0,0 +1,21 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# This script is intended to be run by a Render Cron Job (e.g. daily just after midnight UTC).
+# Pass --no-snapshot to only check for drift without recording today's balance snapshots.
+
+from app import create_app
+from app.jobs.reconciliation import reconcile_balances_job
+
+if __name__ == "__main__":
+    app = create_app(minimal=True)
+
+    with app.app_context():
+        try:
+            reconcile_balances_job(snapshot='--no-snapshot' not in sys.argv)
+        except Exception as e:
+            app.logger.error(f"Error during ledger reconciliation: {e}", exc_info=True)
+            print(f"ERROR during ledger reconciliation: {e}")
+
+    print("Reconciliation job script finished.")
@@ -0,0 +1,28 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Processes queued admin report jobs. Run it from a Render Cron Job (e.g. every minute),
+# or pass --loop to keep polling as a background worker service.
+
+import time
+from app import create_app
+from app.jobs.reports import run_report_worker_job
+
+POLL_INTERVAL_SECONDS = 15
+
+if __name__ == "__main__":
+    app = create_app(minimal=True)
+
+    while True:
+        with app.app_context():
+            try:
+                run_report_worker_job()
+            except Exception as e:
+                app.logger.error(f"Error during admin report generation: {e}", exc_info=True)
+                print(f"ERROR during admin report generation: {e}")
+        if '--loop' not in sys.argv:
+            break
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+    print("Report worker script finished.")
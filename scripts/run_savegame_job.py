@@ -0,0 +1,21 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# This script is intended to be run by a Render Cron Job (e.g. every few minutes, after the
+# game server's autosave). Pass --force to ingest every file even if its hash is unchanged.
+
+from app import create_app
+from app.jobs.savegame import ingest_savegame_job
+
+if __name__ == "__main__":
+    app = create_app(minimal=True)
+
+    with app.app_context():
+        try:
+            ingest_savegame_job(force='--force' in sys.argv)
+        except Exception as e:
+            app.logger.error(f"Error during savegame ingestion: {e}", exc_info=True)
+            print(f"ERROR during savegame ingestion: {e}")
+
+    print("Savegame job script finished.")
@@ -0,0 +1,27 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# This script is intended to be run by a Render Cron Job (e.g. on the 1st of each month after midnight UTC).
+# Pass --month YYYY-MM to archive a specific closed month instead of last month; re-runs skip
+# accounts that already have a statement for that month.
+
+from app import create_app
+from app.jobs.statements import generate_monthly_statements_job
+from app.services import statement_service
+
+if __name__ == "__main__":
+    app = create_app(minimal=True)
+    period = sys.argv[sys.argv.index('--month') + 1] if '--month' in sys.argv else None
+
+    with app.app_context():
+        try:
+            if period:
+                generate_monthly_statements_job(*statement_service.parse_period(period))
+            else:
+                generate_monthly_statements_job()
+        except Exception as e:
+            app.logger.error(f"Error during monthly statement generation: {e}", exc_info=True)
+            print(f"ERROR during monthly statement generation: {e}")
+
+    print("Statement job script finished.")
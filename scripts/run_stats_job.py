@@ -0,0 +1,21 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# This script is intended to be run by a Render Cron Job.
+# Pass --full to rebuild the revenue total from the entire ledger instead of incrementally.
+
+from app import create_app
+from app.jobs.stats import refresh_site_stats_job
+
+if __name__ == "__main__":
+    app = create_app(minimal=True)
+
+    with app.app_context():
+        try:
+            refresh_site_stats_job(full='--full' in sys.argv)
+        except Exception as e:
+            app.logger.error(f"Error during scheduled site stats refresh: {e}", exc_info=True)
+            print(f"ERROR during site stats refresh: {e}")
+
+    print("Stats job script finished.")
@@ -13,7 +13,7 @@ if __name__ == "__main__":
     # Create a Flask app instance
     # It needs to be configured to connect to the database, so environment variables
     # like DATABASE_URL must be available in the Cron Job's environment.
-    app = create_app()
+    app = create_app(minimal=True)
 
     # The apply_weekly_taxes function already uses app.app_context(),
     # but for standalone scripts, it's good practice to ensure an app context.